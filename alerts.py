@@ -0,0 +1,89 @@
+import queue
+import threading
+import time
+
+from instrumentation import Instrumentation
+
+
+class AlertDispatcher:
+    """Delivers alerts (notifications, popups, sounds, log writes) off the camera thread
+
+    Producers call ``post(kind, **payload)``, which only enqueues and never
+    blocks. A single worker thread runs the handler registered for each kind,
+    in order. If the queue is full the event is dropped and counted rather
+    than stalling the producer.
+    """
+
+    def __init__(self, max_pending=64, instrumentation=None):
+        self.handlers = {}
+        self.dropped = 0
+        self.delivered = 0
+        self.metrics = instrumentation if instrumentation is not None else Instrumentation()
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._running = False
+
+    def register(self, kind, handler):
+        """Route events of ``kind`` to ``handler(**payload)``"""
+        self.handlers[kind] = handler
+
+    def post(self, kind, **payload):
+        """Queue an event for delivery; returns False if it had to be dropped"""
+        return self._enqueue((time.monotonic(), kind, payload))
+
+    def _enqueue(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+            self.metrics.count("alerts_dropped")
+            print(f"Alert queue full, dropping '{event[1]}'")
+            return False
+        self.metrics.set_gauge("alert_queue_depth", self._queue.qsize())
+        return True
+
+    def pending(self):
+        """Events waiting to be delivered"""
+        return self._queue.qsize()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """Deliver what is already queued (up to ``timeout``), then stop the worker"""
+        self._running = False
+        try:
+            self._queue.put_nowait((time.monotonic(), None, None))  # wake the worker
+        except queue.Full:
+            pass   # the worker is busy draining and stops once the queue is empty
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            posted, kind, payload = self._queue.get()
+            if kind is None:
+                break
+            self._deliver(kind, payload, time.monotonic() - posted)
+            if not self._running and self._queue.empty():
+                break
+
+    def _deliver(self, kind, payload, delay):
+        handler = self.handlers.get(kind)
+        if handler is None:
+            print(f"No alert handler for '{kind}'")
+            return
+
+        self.metrics.record("alert_delay", delay)
+        start = time.perf_counter()
+        try:
+            handler(**payload)
+        except Exception as e:
+            print(f"Alert handler '{kind}' failed: {e}")
+        self.metrics.record(f"alert_{kind}", time.perf_counter() - start)
+        self.delivered += 1
+        self.metrics.set_gauge("alert_queue_depth", self._queue.qsize())
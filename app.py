@@ -1,20 +1,30 @@
-import os, time, threading
+import time, threading
 import cv2
-import pygame
-import pandas as pd
 import tkinter as tk
 from tkinter import ttk, messagebox, DoubleVar, IntVar, StringVar
-from datetime import datetime
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
+from datetime import datetime, timedelta
 
-# Import modules (assume all above classes are imported)
-from eye_tracking import face_mesh, calculate_EAR, extract_stress_features, LEFT_EYE, RIGHT_EYE
-from stress_detector import StressDetector
-from heart_rate_monitor import HeartRateMonitor
+# Import modules (assume all above classes are imported). The heavy ones
+# (MediaPipe, scipy, sklearn via session) are imported by _warm_up, and
+# pandas/matplotlib only when the statistics window opens.
+from face_roi import AdaptiveFaceMesh
 from music_therapy import MusicTherapy
-from logging_utils import log_event
+from logging_utils import log_event, get_event_store
 from reminder_popup import ReminderPopup
+from pipeline import Pipeline, SnapshotSlot
+from alerts import AlertDispatcher
+from audio_engine import AudioEngine
+from telemetry import TelemetryRecorder
+from presence import PresenceMonitor
+from live_dashboard import SignalBuffer
+from instrumentation import Instrumentation
+from startup_profile import mark, dump_marks
+from config import BEEP_FILE, MUSIC_FOLDER, MUSIC_INDEX_FILE, MUSIC_RESCAN_INTERVAL
+from config import METRICS_ENABLED, METRICS_FILE, METRICS_PORT, METRICS_OVERLAY
+from config import TELEMETRY_ENABLED, TELEMETRY_DIR, UI_REFRESH_HZ
+from config import FACE_INPUT_MODE, FACE_BUDGET_MS
+from config import PRESENCE_ABSENT_AFTER, PRESENCE_PROBE_FPS, PRESENCE_PROBE_SCALE
+from config import DASHBOARD_WINDOW_MIN, DASHBOARD_SAMPLE_HZ, DASHBOARD_REFRESH_HZ
 
 try:
     from plyer import notification
@@ -22,11 +32,10 @@ try:
 except Exception:
     PLYER_AVAILABLE = False
 
-pygame.mixer.init()
-
 class EnhancedWellnessApp:
-    def __init__(self, root):
+    def __init__(self, root, profile_startup=False):
         self.root = root
+        self.profile_startup = profile_startup
         self.root.title("Enhanced Eye Health & Wellness Monitor")
         self.root.geometry("650x600")
         self.root.resizable(False, False)
@@ -43,37 +52,135 @@ class EnhancedWellnessApp:
         self.eye_closure_alert_time = 20.0  # seconds
         self.stress_sustained_time = 20.0   # seconds
         
-        # Blink tracking
-        self.frame_counter = 0
-        self.blink_count = 0
-        self.blinks_timestamps = []
-        self.last_reminder_time = datetime.now()
-        
-        # Drowsiness tracking
-        self.eyes_closed_start = None
-        self.eyes_open_start = None
-        self.drowsy_state = False
-        self.drowsiness_score = 0
-        self.last_drowsy_beep = 0
-        
-        # Stress tracking with sustained timer
-        self.high_stress_start = None
-        self.last_stress_alert = 0
-        
-        # Advanced modules
-        self.stress_detector = StressDetector()
-        self.hr_monitor = HeartRateMonitor()
-        self.music_therapy = MusicTherapy()
-        
-        # Current metrics
-        self.current_stress = 0
-        self.current_hr = 0
+        # Hot-path instrumentation (near-zero cost when disabled)
+        self.metrics = Instrumentation(enabled=METRICS_ENABLED)
+        self.metrics_overlay = METRICS_OVERLAY
+        self.metrics.start_exporter(path=METRICS_FILE, port=METRICS_PORT)
+        
+        # Per-user state for the local camera (the UI is just one consumer of it),
+        # landmark inference and telemetry are created by _warm_up in the background
+        self.session = None
+        self.analyzer = None
+        self.stress_detector = None
+        self.hr_monitor = None
+        self.face_input = None
+        self.telemetry = None
+        
+        # Last few minutes of the live signals for the trends window
+        self.trends = SignalBuffer(DASHBOARD_WINDOW_MIN * 60, DASHBOARD_SAMPLE_HZ)
+        self.dashboard = None
+        
+        # Cues, popup sounds and therapy music all go through one audio thread
+        self.audio = AudioEngine(instrumentation=self.metrics)
+        self.music_therapy = MusicTherapy(MUSIC_FOLDER, autoload=False, audio=self.audio,
+                                          index_path=MUSIC_INDEX_FILE,
+                                          rescan_interval=MUSIC_RESCAN_INTERVAL)
+        
+        # Notifications, popups, sounds and log writes run on the dispatcher thread
+        self.alerts = AlertDispatcher(instrumentation=self.metrics)
+        self.alerts.register("beep", self._play_beep_sound)
+        self.alerts.register("reminder", self._deliver_reminder)
+        self.alerts.register("log", log_event)
+        self.alerts.start()
+        
+        # Drop to a low-rate probe while nobody is in front of the camera
+        self.presence = PresenceMonitor(absent_after=PRESENCE_ABSENT_AFTER,
+                                        probe_fps=PRESENCE_PROBE_FPS,
+                                        probe_scale=PRESENCE_PROBE_SCALE)
         
         # Camera
         self.camera_thread = None
         self.cam_running = False
+        self.pipeline = None
+        self.pipeline_queue_size = 2  # Frames buffered between pipeline stages
+        
+        # Camera side publishes label snapshots; Tk applies the latest at a fixed rate
+        self._ui_slot = SnapshotSlot()
+        self._ui_seq = 0
+        self._ui_applied = {}
+        self._ui_interval_ms = max(1, int(1000 / UI_REFRESH_HZ))
+        self._ui_poll_due = time.perf_counter()
         
         self._build_ui()
+        self.root.after(self._ui_interval_ms, self._poll_ui)
+        
+        # The window is usable right away; Start unlocks when warm-up finishes
+        self.warmed_up = False
+        self.start_btn.config(state="disabled")
+        threading.Thread(target=self._warm_up, name="warm-up", daemon=True).start()
+    
+    def _warm_up(self):
+        """Load everything the camera loop needs, reporting progress in the status label"""
+        steps = [
+            ("Loading analytics", self._warm_up_analytics),
+            ("Building face tracker", self._warm_up_face_input),
+            ("Loading stress model", lambda: self.stress_detector.warm_up()),
+            ("Scanning music library", self.music_therapy.load_library),
+            ("Starting audio", self._warm_up_audio),
+            ("Opening telemetry", self._warm_up_telemetry),
+        ]
+        for i, (text, step) in enumerate(steps, 1):
+            self.root.after(0, lambda t=f"Status: ⏳ {text}... ({i}/{len(steps)})":
+                            self.status_label.config(text=t, foreground="gray"))
+            try:
+                step()
+            except Exception as e:
+                print(f"Warm-up step '{text}' failed: {e}")
+        
+        mark("warmup_done")
+        self.root.after(0, self._warm_up_done)
+    
+    def _warm_up_analytics(self):
+        # Blink/drowsiness/stress/HR analytics (timestamp-driven, no UI)
+        from session import Session
+        # Reminders stay with _check_alerts, which honours the snooze
+        self.session = Session("local", instrumentation=self.metrics, raise_reminders=False)
+        # The desktop UI is one consumer of the session's results
+        self.session.subscribe(self._on_session_result)
+        self.analyzer = self.session.analyzer
+        self.stress_detector = self.analyzer.stress_detector
+        self.hr_monitor = self.analyzer.hr_monitor
+    
+    def _warm_up_face_input(self):
+        # Landmark inference on a downscaled frame / face crop, with a resolution ladder
+        from eye_tracking import face_mesh
+        self.face_input = AdaptiveFaceMesh(face_mesh, mode=FACE_INPUT_MODE,
+                                           budget_ms=FACE_BUDGET_MS)
+    
+    def _warm_up_audio(self):
+        self.audio.start()
+        self.audio.preload(BEEP_FILE)
+    
+    def _warm_up_telemetry(self):
+        # Per-frame time series for later analysis (bounded ring files on disk)
+        if TELEMETRY_ENABLED:
+            try:
+                self.telemetry = TelemetryRecorder(TELEMETRY_DIR)
+                self.telemetry.start()
+            except OSError as e:
+                print(f"Telemetry disabled: {e}")
+    
+    def _warm_up_done(self):
+        if self.analyzer is None or self.face_input is None:
+            self.status_label.config(text="Status: ❌ Startup failed (see console)",
+                                     foreground="red")
+            return
+        self.warmed_up = True
+        self.start_btn.config(state="normal")
+        self.status_label.config(text="Status: Idle", foreground="blue")
+        if self.profile_startup:
+            # Stop at the first processed frame, or give up after a minute (no camera)
+            self.root.after(60000, self._finish_profile)
+            self.start_camera()
+    
+    def _finish_profile(self):
+        """--profile-startup: print the milestones and leave the main loop"""
+        if not self.profile_startup:
+            return
+        self.profile_startup = False
+        dump_marks()
+        self.cam_running = False
+        self.root.quit()
     
     def _build_ui(self):
         """Build enhanced UI"""
@@ -140,6 +247,9 @@ class EnhancedWellnessApp:
         ttk.Button(btn_frame, text="📊 Statistics", 
                   command=self.show_stats, width=15).grid(row=0, column=2, padx=5)
         
+        ttk.Button(btn_frame, text="📈 Live Trends", 
+                  command=self.show_trends, width=15).grid(row=0, column=3, padx=5)
+        
         # Real-time Metrics Dashboard
         metrics_frame = ttk.LabelFrame(main_frame, text="📈 Real-time Metrics", padding=10)
         metrics_frame.pack(fill="both", expand=True, pady=5)
@@ -206,6 +316,8 @@ class EnhancedWellnessApp:
     
     def start_camera(self):
         """Start camera and monitoring"""
+        if not self.warmed_up:
+            return
         try:
             self.interval_minutes = float(self.interval_var.get())
             self.blink_threshold = int(self.blink_thresh_var.get())
@@ -217,6 +329,13 @@ class EnhancedWellnessApp:
             messagebox.showerror("Invalid settings", "Please enter valid numbers.")
             return
         
+        self.analyzer.interval_minutes = self.interval_minutes
+        self.analyzer.blink_threshold = self.blink_threshold
+        self.analyzer.ear_threshold = self.ear_threshold
+        self.analyzer.consec_frames = self.consec_frames
+        self.analyzer.eye_closure_alert_time = self.eye_closure_alert_time
+        self.analyzer.stress_sustained_time = self.stress_sustained_time
+        
         self.cam_running = True
         self.start_btn.config(state="disabled")
         self.stop_btn.config(state="normal")
@@ -234,114 +353,204 @@ class EnhancedWellnessApp:
         self.music_therapy.stop_music()
     
     def _camera_loop(self):
-        """Main camera processing loop with all features"""
+        """Run the staged capture -> inference -> analytics -> render pipeline"""
         cap = cv2.VideoCapture(0)
         
         if not cap.isOpened():
             messagebox.showerror("Camera error", "Could not open webcam.")
-            self.stop_camera()
+            self.root.after(0, self.stop_camera)
             return
         
-        frame_count = 0
-        last_hr_update = time.time()
+        self._cap = cap
         
-        while self.cam_running:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            frame_count += 1
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = face_mesh.process(frame_rgb)
-            
-            h, w = frame.shape[:2]
-            avg_ear = None
-            stress_features = None
-            
-            if results.multi_face_landmarks:
-                for face_landmarks in results.multi_face_landmarks:
-                    # 1. EYE TRACKING & BLINK DETECTION
-                    left_ear = calculate_EAR(LEFT_EYE, face_landmarks.landmark, w, h)
-                    right_ear = calculate_EAR(RIGHT_EYE, face_landmarks.landmark, w, h)
-                    avg_ear = (left_ear + right_ear) / 2.0
-                    
-                    # Blink detection
-                    if avg_ear < self.ear_threshold:
-                        self.frame_counter += 1
-                    else:
-                        if self.frame_counter >= self.consec_frames:
-                            self.blink_count += 1
-                            self.blinks_timestamps.append(time.time())
-                        self.frame_counter = 0
-                    
-                    # 2. DROWSINESS DETECTION (FIXED)
-                    self._detect_drowsiness(avg_ear)
-                    
-                    # 3. STRESS DETECTION (FIXED)
-                    stress_features = extract_stress_features(face_landmarks.landmark, w, h)
-                    self.current_stress = self.stress_detector.calculate_stress(stress_features)
-                    
-                    # Track sustained high stress
-                    self._track_sustained_stress()
-                    
-                    # 4. HEART RATE MONITORING (FIXED)
-                    self.hr_monitor.add_frame(frame, face_landmarks, w, h)
-                    
-                    # Update heart rate every 5 seconds
-                    if time.time() - last_hr_update > 5:
-                        self.current_hr = self.hr_monitor.calculate_heart_rate()
-                        last_hr_update = time.time()
-            
-            # Clean old blink timestamps
-            now = time.time()
-            self.blinks_timestamps = [t for t in self.blinks_timestamps if now - t <= 60.0]
-            blinks_last_min = len(self.blinks_timestamps)
-            
-            # Update UI
+        # Each stage runs on its own thread; bounded drop-oldest queues between
+        # them mean a slow stage loses stale frames instead of stalling upstream
+        self.pipeline = Pipeline(queue_size=self.pipeline_queue_size,
+                                 instrumentation=self.metrics)
+        self.pipeline.add_stage("capture", self._capture_stage)
+        self.pipeline.add_stage("inference", self._inference_stage)
+        self.pipeline.add_stage("analytics", self._analytics_stage)
+        self.pipeline.add_stage("render", self._render_stage,
+                                on_stop=cv2.destroyAllWindows)
+        self.pipeline.start()
+        
+        while self.cam_running and self.pipeline.running:
+            time.sleep(0.1)
+        
+        self.pipeline.stop()
+        self.pipeline.join(timeout=2.0)
+        cap.release()
+        self.root.after(0, self.stop_camera)
+    
+    def _capture_stage(self):
+        """Stage 1: grab a frame from the camera (only one per probe interval while away)"""
+        presence = self.presence
+        presence.tick(time.monotonic(), time.process_time())
+        delay = presence.probe_delay(time.monotonic())
+        if delay > 0:
+            # Sleep in short steps so stopping the pipeline stays responsive
+            time.sleep(min(delay, 0.1))
+            return None
+        if presence.probing:
+            self._cap.grab()  # Skip the frame buffered while we slept
+        
+        ret, frame = self._cap.read()
+        if not ret:
+            self.pipeline.stop()
+            return None
+        
+        return {"frame": frame, "timestamp": time.time()}
+    
+    def _inference_stage(self, packet):
+        """Stage 2: run face mesh landmark inference"""
+        presence = self.presence
+        if presence.probing:
+            face_landmarks = self.face_input.probe(packet["frame"], presence.probe_scale)
+        else:
+            face_landmarks = self.face_input.process(packet["frame"])
+        packet["face_landmarks"] = face_landmarks
+        packet["presence_change"] = presence.update(face_landmarks is not None,
+                                                    time.monotonic())
+        packet["away"] = presence.probing
+        
+        self.metrics.set_gauge("inference_scale", self.face_input.scale)
+        self.metrics.set_gauge("inference_cpu_ms", self.face_input.avg_cpu_ms)
+        self.metrics.set_gauge("presence_state", 0 if presence.probing else 1)
+        return packet
+    
+    def _analytics_stage(self, packet):
+        """Stage 3: blink, drowsiness, stress and heart rate analytics"""
+        a = self.analyzer
+        change = packet["presence_change"]
+        if change == "absent":
+            a.pause(packet["timestamp"])
+        elif change == "present":
+            a.resume(packet["timestamp"])
+        
+        if packet["away"]:
+            # Nobody in view: HR/stress buffers stay paused until a face is back
+            result = {"avg_ear": None, "blinks_last_min": a.blink_stats.count(60.0),
+                      "perclos": a.perclos.perclos(60.0), "events": [],
+                      "timestamp": packet["timestamp"], "face": False,
+                      "stress": a.current_stress, "hr": a.current_hr,
+                      "drowsiness": a.drowsiness_score}
+            self._on_session_result(self.session, result)
+        else:
+            # Runs the analyzer and notifies the session's consumers (_on_session_result)
+            result = self.session.process_frame(packet["frame"], packet["face_landmarks"],
+                                                packet["timestamp"])
+        packet.update(result)
+        
+        mark("first_frame")
+        if self.profile_startup:
+            self.root.after(0, self._finish_profile)
+        return packet
+    
+    def _on_session_result(self, session, result):
+        """Session consumer: feed the live trends and telemetry (analytics thread)"""
+        face = result["face"]
+        # NaNs while nobody is in view leave a gap in the trend lines
+        self.trends.append(result["timestamp"], result["avg_ear"],
+                           result["stress"] if face else None,
+                           (result["hr"] or None) if face else None,
+                           result["blinks_last_min"])
+        
+        if self.telemetry is not None:
+            self.telemetry.record(result["timestamp"], ear=result["avg_ear"],
+                                  stress=result["stress"] if face else None,
+                                  drowsiness=result["drowsiness"] if face else None,
+                                  hr=result["hr"] or None,
+                                  blinks_last_min=result["blinks_last_min"], face=face,
+                                  blink=any(kind == "blink" for kind, _ in result["events"]))
+    
+    def _render_stage(self, packet):
+        """Stage 4: UI updates, preview window and alerts"""
+        frame = packet["frame"]
+        avg_ear = packet["avg_ear"]
+        blinks_last_min = packet["blinks_last_min"]
+        
+        metrics = self.metrics
+        
+        if packet["away"]:
+            self._render_away(packet)
+            return None
+        
+        # Update UI
+        with metrics.timer("ui_publish"):
             self._update_ui(avg_ear, blinks_last_min)
-            
-            # Update music therapy (FIXED - only plays after 20 seconds)
-            self._update_music_therapy()
-            
-            # Draw on frame
+        
+        # Update music therapy (FIXED - only plays after 20 seconds)
+        self._update_music_therapy()
+        
+        # Draw on frame
+        with metrics.timer("draw"):
             self._draw_on_frame(frame, avg_ear, blinks_last_min)
+            self._draw_pipeline_stats(frame)
+            if self.metrics_overlay:
+                metrics.draw_overlay(frame)
             
             cv2.imshow("Wellness Monitor", frame)
+        
+        with metrics.timer("alerts"):
+            # Beeps and reminders raised by the analytics stage
+            for kind, detail in packet["events"]:
+                if kind == "beep":
+                    self.alerts.post("beep")
+                elif kind == "reminder":
+                    self._trigger_reminder(detail, 0)
             
             # Check for alerts
             self._check_alerts(blinks_last_min)
-            
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                self.cam_running = False
-                break
         
-        cap.release()
-        cv2.destroyAllWindows()
-        self.root.after(0, self.stop_camera)
-    
-    def _track_sustained_stress(self):
-        """Track sustained high stress levels"""
-        current_time = time.time()
+        metrics.mark_frame()
+        metrics.set_gauge("dropped_frames", self.pipeline.dropped_total())
         
-        if self.current_stress >= 70:
-            if self.high_stress_start is None:
-                self.high_stress_start = current_time
-        else:
-            self.high_stress_start = None
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            self.cam_running = False
+            self.pipeline.stop()
+        return None
+    
+    def _render_away(self, packet):
+        """Probe-mode render: no alerts or music, one UI refresh, a dimmed preview"""
+        if packet["presence_change"] == "absent":
+            self.music_therapy.stop_music()
+            self._update_ui(None, packet["blinks_last_min"])
+        
+        presence = self.presence
+        metrics = self.metrics
+        metrics.set_gauge("presence_absent_seconds", presence.time_absent())
+        metrics.set_gauge("presence_cpu_saved_seconds", presence.cpu_saved())
+        metrics.set_gauge("dropped_frames", self.pipeline.dropped_total())
+        
+        frame = cv2.convertScaleAbs(packet["frame"], alpha=0.4)
+        cv2.putText(frame, "No face - low power mode", (30, 40),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200, 200, 200), 2)
+        cv2.putText(frame, f"CPU saved: {presence.cpu_saved():.1f}s", (30, 70),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 1)
+        cv2.imshow("Wellness Monitor", frame)
+        
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            self.cam_running = False
+            self.pipeline.stop()
+    
+    def _draw_pipeline_stats(self, frame):
+        """Draw per-stage throughput along the bottom of the preview"""
+        h = frame.shape[0]
+        cv2.putText(frame, self.pipeline.summary(), (10, h - 10),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1)
     
     def _update_music_therapy(self):
         """Update music - only play after sustained high stress"""
-        current_time = time.time()
-        stress_text = self.stress_detector.get_stress_level_text(self.current_stress)
+        current_stress = self.analyzer.current_stress
+        stress_text = self.stress_detector.get_stress_level_text(current_stress)
         
         # Only play music if stress has been high for sustained time
-        if self.high_stress_start is not None:
-            stress_duration = current_time - self.high_stress_start
-            
+        stress_duration = self.analyzer.stress_duration(time.time())
+        if stress_duration is not None:
             if stress_duration >= self.stress_sustained_time:
                 # Play music
                 if not self.music_therapy.is_playing:
-                    self.music_therapy.update_stress_level(self.current_stress, stress_text)
+                    self.music_therapy.update_stress_level(current_stress, stress_text)
             else:
                 # Not sustained long enough yet
                 self.music_therapy.stop_music()
@@ -349,132 +558,48 @@ class EnhancedWellnessApp:
             # Stress not high anymore
             self.music_therapy.stop_music()
     
-    def _detect_drowsiness(self, avg_ear):
-        """Detect drowsiness based on eye closure duration (FIXED)"""
-        if avg_ear is None:
-            return
-        
-        current_time = time.time()
-        
-        # Eyes closed
-        if avg_ear < self.ear_threshold:
-            if self.eyes_closed_start is None:
-                self.eyes_closed_start = current_time
-            
-            self.eyes_open_start = None  # Reset open timer
-            
-            closed_duration = current_time - self.eyes_closed_start
-            
-            # Calculate drowsiness score (0-100)
-            self.drowsiness_score = min(100, int((closed_duration / 4.0) * 100))
-            
-            # Alert when eyes closed for configured time
-            if closed_duration >= self.eye_closure_alert_time:
-                if current_time - self.last_drowsy_beep >= 3.0:
-                    self.last_drowsy_beep = current_time
-                    self._play_beep_sound()  # FIXED: Audible beep
-                    
-                    if not self.drowsy_state:
-                        self.drowsy_state = True
-                        self._trigger_reminder("Drowsiness Detected", 0)
-        
-        else:
-            # Eyes open
-            if self.eyes_open_start is None:
-                self.eyes_open_start = current_time
-            
-            self.eyes_closed_start = None  # Reset closed timer
-            self.drowsy_state = False
-            self.drowsiness_score = max(0, self.drowsiness_score - 5)  # Decay score
-            
-            # Alert if eyes open for too long (staring)
-            open_duration = current_time - self.eyes_open_start
-            if open_duration >= self.eye_closure_alert_time:
-                if current_time - self.last_drowsy_beep >= 10.0:
-                    self.last_drowsy_beep = current_time
-                    self._play_beep_sound()  # FIXED: Audible beep
-    
     def _play_beep_sound(self):
-        """Play beep sound (FIXED - audible)"""
-        try:
-            beep_file = "assets/beep.mp3"
-            if os.path.exists(beep_file) and self.sound_on:
-                # Stop music temporarily
-                music_was_playing = self.music_therapy.is_playing
-                if music_was_playing:
-                    pygame.mixer.music.pause()
-                
-                # Play beep using a separate channel
-                beep_sound = pygame.mixer.Sound(beep_file)
-                beep_sound.set_volume(1.0)  # Full volume
-                beep_sound.play()
-                
-                # Resume music after beep
-                if music_was_playing:
-                    time.sleep(0.5)  # Wait for beep
-                    pygame.mixer.music.unpause()
-        except Exception as e:
-            print(f"Beep error: {e}")
+        """Play beep sound (FIXED - audible); runs on the alert dispatcher"""
+        if self.sound_on:
+            # Cached cue on its own channel; therapy music is ducked, not stopped
+            self.audio.play_cue(BEEP_FILE, volume=1.0)
     
     def _update_ui(self, avg_ear, blinks_last_min):
-        """Update all UI elements"""
+        """Publish one immutable snapshot of every label's text/colour (camera side)"""
+        a = self.analyzer
+        
         # Eye metrics
         ear_text = f"EAR: {avg_ear:.3f}" if avg_ear else "EAR: N/A"
-        self.root.after(0, self.ear_label.config, {"text": ear_text})
-        
-        self.root.after(0, self.blinks_label.config, 
-                       {"text": f"Blinks: {self.blink_count}"})
-        
-        self.root.after(0, self.blink_rate_label.config, 
-                       {"text": f"Rate: {blinks_last_min}/min"})
         
         # Drowsiness
-        if self.drowsiness_score > 70:
+        if a.drowsiness_score > 70:
             drowsy_state = "😴 SLEEPING"
             drowsy_color = "red"
-        elif self.drowsiness_score > 40:
+        elif a.drowsiness_score > 40:
             drowsy_state = "😪 Drowsy"
             drowsy_color = "orange"
         else:
             drowsy_state = "✅ Alert"
             drowsy_color = "green"
         
-        self.root.after(0, self.drowsy_label.config, 
-                       {"text": f"State: {drowsy_state}", "foreground": drowsy_color})
-        
-        self.root.after(0, self.drowsy_score_label.config, 
-                       {"text": f"Score: {self.drowsiness_score}/100"})
-        
-        closure_time = 0
-        if self.eyes_closed_start:
-            closure_time = time.time() - self.eyes_closed_start
-        
-        self.root.after(0, self.eye_closure_label.config, 
-                       {"text": f"Closure: {closure_time:.1f}s"})
+        closure_time = a.closure_duration(time.time())
         
         # Stress
-        stress_text = self.stress_detector.get_stress_level_text(self.current_stress)
-        stress_color = "green" if self.current_stress < 40 else \
-                      "orange" if self.current_stress < 70 else "red"
-        
-        self.root.after(0, self.stress_label.config, 
-                       {"text": f"Level: {stress_text}", "foreground": stress_color})
-        
-        self.root.after(0, self.stress_score_label.config, 
-                       {"text": f"Score: {self.current_stress}/100"})
+        stress_text = self.stress_detector.get_stress_level_text(a.current_stress)
+        stress_color = "green" if a.current_stress < 40 else \
+                      "orange" if a.current_stress < 70 else "red"
         
         music_status = "🎵 Playing" if self.music_therapy.is_playing else "🎵 Off"
-        self.root.after(0, self.music_label.config, {"text": music_status})
         
         # Heart rate (FIXED - better calibration)
-        if self.current_hr > 0:
-            hr_text = f"HR: {self.current_hr} BPM"
+        if a.current_hr > 0:
+            hr_text = f"HR: {a.current_hr} BPM"
             hrv = self.hr_monitor.get_hr_variability()
             hrv_text = f"HRV: {hrv} ms"
             
-            if self.current_hr < 60:
+            if a.current_hr < 60:
                 hr_status = "Low"
-            elif self.current_hr > 100:
+            elif a.current_hr > 100:
                 hr_status = "High"
             else:
                 hr_status = "Normal"
@@ -483,12 +608,58 @@ class EnhancedWellnessApp:
             hrv_text = "HRV: --"
             hr_status = "Buffering"
         
-        self.root.after(0, self.hr_label.config, {"text": hr_text})
-        self.root.after(0, self.hrv_label.config, {"text": hrv_text})
-        self.root.after(0, self.hr_status_label.config, {"text": f"Status: {hr_status}"})
+        # (label attribute, text, foreground or None)
+        self._ui_slot.publish((
+            ("ear_label", ear_text, None),
+            ("blinks_label", f"Blinks: {a.blink_count}", None),
+            ("blink_rate_label", f"Rate: {blinks_last_min}/min", None),
+            ("drowsy_label", f"State: {drowsy_state}", drowsy_color),
+            ("drowsy_score_label", f"Score: {a.drowsiness_score}/100", None),
+            ("eye_closure_label", f"Closure: {closure_time:.1f}s", None),
+            ("stress_label", f"Level: {stress_text}", stress_color),
+            ("stress_score_label", f"Score: {a.current_stress}/100", None),
+            ("music_label", music_status, None),
+            ("hr_label", hr_text, None),
+            ("hrv_label", hrv_text, None),
+            ("hr_status_label", f"Status: {hr_status}", None),
+        ))
+    
+    def _poll_ui(self):
+        """Tk side: apply the newest snapshot at UI_REFRESH_HZ, then reschedule"""
+        start = time.perf_counter()
+        # How late this callback ran: a growing lag means the Tk queue is backed up
+        self.metrics.record("ui_poll_lag", max(0.0, start - self._ui_poll_due))
+        
+        seq, snapshot = self._ui_slot.latest()
+        if seq != self._ui_seq and snapshot is not None:
+            skipped = seq - self._ui_seq - 1
+            self._ui_seq = seq
+            if skipped > 0:
+                self.metrics.count("ui_snapshots_coalesced", skipped)
+            self._apply_ui_snapshot(snapshot)
+        
+        self.metrics.record("ui_callback", time.perf_counter() - start)
+        self._ui_poll_due = time.perf_counter() + self._ui_interval_ms / 1000.0
+        self.root.after(self._ui_interval_ms, self._poll_ui)
+    
+    def _apply_ui_snapshot(self, snapshot):
+        """Configure only the labels whose text or colour changed"""
+        changed = 0
+        for name, text, color in snapshot:
+            if self._ui_applied.get(name) == (text, color):
+                continue
+            options = {"text": text}
+            if color is not None:
+                options["foreground"] = color
+            getattr(self, name).config(**options)
+            self._ui_applied[name] = (text, color)
+            changed += 1
+        self.metrics.count("ui_label_updates", changed)
     
     def _draw_on_frame(self, frame, avg_ear, blinks_last_min):
         """Draw metrics on video frame"""
+        a = self.analyzer
+        
         # EAR
         if avg_ear:
             color = (0, 255, 0) if avg_ear > self.ear_threshold else (0, 0, 255)
@@ -496,59 +667,47 @@ class EnhancedWellnessApp:
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
         
         # Blinks
-        cv2.putText(frame, f"Blinks: {self.blink_count} ({blinks_last_min}/min)", 
+        cv2.putText(frame, f"Blinks: {a.blink_count} ({blinks_last_min}/min)", 
                    (30, 70), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
         
         # Drowsiness warning
-        if self.drowsiness_score > 40:
-            warning_text = "DROWSY!" if self.drowsiness_score < 70 else "SLEEPING!"
+        if a.drowsiness_score > 40:
+            warning_text = "DROWSY!" if a.drowsiness_score < 70 else "SLEEPING!"
             cv2.putText(frame, warning_text, (30, 110),
                        cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 255), 3)
         
         # Stress level
-        stress_text = self.stress_detector.get_stress_level_text(self.current_stress)
-        stress_color = (0, 255, 0) if self.current_stress < 30 else \
-                      (0, 165, 255) if self.current_stress < 50 else (0, 0, 255)
+        stress_text = self.stress_detector.get_stress_level_text(a.current_stress)
+        stress_color = (0, 255, 0) if a.current_stress < 30 else \
+                      (0, 165, 255) if a.current_stress < 50 else (0, 0, 255)
         
-        cv2.putText(frame, f"Stress: {stress_text} ({self.current_stress})", 
+        cv2.putText(frame, f"Stress: {stress_text} ({a.current_stress})", 
                    (30, 140), cv2.FONT_HERSHEY_SIMPLEX, 0.7, stress_color, 2)
         
         # Heart rate
-        if self.current_hr > 0:
-            cv2.putText(frame, f"HR: {self.current_hr} BPM", 
+        if a.current_hr > 0:
+            cv2.putText(frame, f"HR: {a.current_hr} BPM", 
                        (30, 170), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 255), 2)
     
     def _check_alerts(self, blinks_last_min):
         """Check all alert conditions"""
-        current_time = datetime.now()
-        
         # Skip if snoozed
-        if self.snooze_until and current_time < self.snooze_until:
+        if self.snooze_until and datetime.now() < self.snooze_until:
             return
         
-        # 1. Low blink rate alert
-        if blinks_last_min < self.blink_threshold:
-            if (current_time - self.last_reminder_time).total_seconds() > 30:
-                self.last_reminder_time = current_time
-                self._trigger_reminder("Low Blink Rate", blinks_last_min)
-        
-        # 2. High stress alert (FIXED - only after sustained time)
-        if self.high_stress_start is not None:
-            stress_duration = time.time() - self.high_stress_start
-            
-            if stress_duration >= self.stress_sustained_time:
-                if (current_time - self.last_reminder_time).total_seconds() > 60:
-                    self.last_reminder_time = current_time
-                    self._trigger_reminder("High Stress Level", blinks_last_min)
-        
-        # 3. Regular interval reminder
-        interval_seconds = self.interval_minutes * 60.0
-        if (current_time - self.last_reminder_time).total_seconds() >= interval_seconds:
-            self.last_reminder_time = current_time
-            self._trigger_reminder("Scheduled Reminder", blinks_last_min)
+        for trigger_type in self.analyzer.check_alerts(time.time(), blinks_last_min):
+            self._trigger_reminder(trigger_type, blinks_last_min)
     
     def _trigger_reminder(self, trigger_type, blinks_last_min):
-        """Trigger reminder popup"""
+        """Queue a reminder; returns immediately so the camera loop keeps its frame rate"""
+        a = self.analyzer
+        self.alerts.post("reminder", trigger_type=trigger_type, blinks_last_min=blinks_last_min,
+                         stress_level=a.current_stress, heart_rate=a.current_hr,
+                         drowsiness_score=a.drowsiness_score)
+    
+    def _deliver_reminder(self, trigger_type, blinks_last_min, stress_level, heart_rate,
+                          drowsiness_score):
+        """Notify and open the popup (alert dispatcher thread); logged when the popup closes"""
         if PLYER_AVAILABLE:
             try:
                 notification.notify(
@@ -559,87 +718,108 @@ class EnhancedWellnessApp:
             except Exception:
                 pass
         
-        popup_result = {}
+        def on_close(result):
+            # Tk thread: record the outcome, hand the log write back to the dispatcher
+            if result == "snoozed":
+                self.snooze_until = datetime.now() + timedelta(minutes=2)
+            self.metrics.count(f"reminders_{result}")
+            self.alerts.post("log", trigger=trigger_type, ack="ack" if result == "ack" else "ignored",
+                             blinks_last_min=blinks_last_min, stress_level=stress_level,
+                             heart_rate=heart_rate, drowsiness_score=drowsiness_score)
         
         def show_popup():
-            popup = ReminderPopup(
-                self.root, 
-                trigger_type, 
-                blinks_last_min,
-                self.current_stress,
-                self.current_hr,
-                sound_on=self.sound_on
-            )
-            self.root.wait_window(popup)
-            popup_result['ack'] = getattr(popup, "acknowledged", False)
+            try:
+                ReminderPopup(
+                    self.root, 
+                    trigger_type, 
+                    blinks_last_min,
+                    stress_level,
+                    heart_rate,
+                    sound_on=self.sound_on,
+                    on_close=on_close,
+                    audio=self.audio
+                )
+            except Exception as e:
+                print(f"Popup error: {e}")
+                on_close("ignored")
         
         self.root.after(0, show_popup)
-        
-        # Wait for acknowledgment
-        start_wait = time.time()
-        while 'ack' not in popup_result and (time.time() - start_wait) < 25:
-            time.sleep(0.2)
-        
-        ack = popup_result.get('ack', False)
-        
-        # Log event
-        log_event(trigger_type, "ack" if ack else "ignored", 
-                 blinks_last_min, self.current_stress, 
-                 self.current_hr, self.drowsiness_score)
+    
+    def show_trends(self):
+        """Open (or raise) the live trends window"""
+        if self.dashboard is not None and self.dashboard.alive():
+            self.dashboard.window.lift()
+            return
+        try:
+            from live_dashboard import LiveDashboard
+            self.dashboard = LiveDashboard(self.root, self.trends, DASHBOARD_REFRESH_HZ,
+                                           instrumentation=self.metrics)
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not open live trends: {e}")
     
     def show_stats(self):
         """Show enhanced statistics (FIXED)"""
-        log_file = "reminder_log.csv"
-        
-        if not os.path.exists(log_file):
-            messagebox.showinfo("No data", "No log data available yet.")
-            return
-        
         try:
-            # Read CSV with flexible parsing
-            df = pd.read_csv(log_file)
-            
-            # Convert timestamp column
-            if 'timestamp' in df.columns:
-                df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
-            else:
-                messagebox.showerror("Error", "Missing 'timestamp' column in log file.")
-                return
+            # Precomputed rollups: a few rows per day, no scan of raw events
+            store = get_event_store()
+            store.flush(timeout=1.0)
+            summary = store.summary("day")
         except Exception as e:
             messagebox.showerror("Error", f"Could not load data: {e}")
             return
         
-        if df.empty:
+        if not summary:
             messagebox.showinfo("No data", "No log data available yet.")
             return
         
-        # Prepare data
-        df['date'] = df['timestamp'].dt.date
-        
-        # Daily summary
-        daily = df.groupby('date').agg({
-            'timestamp': 'count',
-            'ack': lambda x: (x == 'ack').sum(),
-            'stress_level': 'mean',
-            'heart_rate': 'mean',
-            'drowsiness_score': 'mean'
-        }).rename(columns={'timestamp': 'total', 'ack': 'acknowledged'})
-        
-        daily['ack_rate'] = (daily['acknowledged'] / daily['total']) * 100
-        
         # Create statistics window
         win = tk.Toplevel(self.root)
         win.title("📊 Wellness Statistics")
         win.geometry("900x600")
         
+        periods = {"Daily": "day", "Weekly": "week", "Monthly": "month"}
+        period_var = StringVar(value="Daily")
+        controls = ttk.Frame(win)
+        controls.pack(fill="x", padx=10, pady=5)
+        ttk.Label(controls, text="View:").pack(side="left")
+        period_box = ttk.Combobox(controls, textvariable=period_var, values=list(periods),
+                                  state="readonly", width=10)
+        period_box.pack(side="left", padx=5)
+        
+        # Loaded on first use: pandas and matplotlib add seconds to startup
+        import pandas as pd
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
         # Create plots
         fig, axs = plt.subplots(2, 2, figsize=(12, 8))
+        canvas = FigureCanvasTkAgg(fig, master=win)
         
+        def redraw(rows):
+            for ax in axs.flat:
+                ax.clear()
+            self._plot_stats(axs, pd.DataFrame(rows).set_index('date'), period_var.get())
+            fig.tight_layout()
+            canvas.draw_idle()
+        
+        def on_period(_event=None):
+            try:
+                redraw(store.summary(periods[period_var.get()]))
+            except Exception as e:
+                messagebox.showerror("Error", f"Could not load data: {e}")
+        
+        period_box.bind("<<ComboboxSelected>>", on_period)
+        redraw(summary)
+        canvas.get_tk_widget().pack(fill="both", expand=True)
+    
+    def _plot_stats(self, axs, daily, period_label):
+        """Draw the four summary charts for one period granularity"""
+        unit = {"Daily": "Day", "Weekly": "Week", "Monthly": "Month"}[period_label]
         dates = [str(d) for d in daily.index]
         
-        # Plot 1: Reminders per day
+        # Plot 1: Reminders per period
         axs[0, 0].bar(dates, daily['total'], color='#2196F3')
-        axs[0, 0].set_title('Reminders per Day')
+        axs[0, 0].set_title(f'Reminders per {unit}')
         axs[0, 0].set_ylabel('Count')
         axs[0, 0].tick_params(axis='x', rotation=45)
         
@@ -667,9 +847,3 @@ class EnhancedWellnessApp:
         axs[1, 1].axhline(y=100, color='r', linestyle='--', alpha=0.5, label='High')
         axs[1, 1].axhline(y=60, color='g', linestyle='--', alpha=0.5, label='Normal')
         axs[1, 1].legend()
-        
-        plt.tight_layout()
-        
-        canvas = FigureCanvasTkAgg(fig, master=win)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
\ No newline at end of file
@@ -0,0 +1,215 @@
+import io
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+from instrumentation import Instrumentation
+
+pygame = None   # imported by the engine thread, keeping it off the path to the window
+
+MAX_PREFETCH_BYTES = 64 * 1024 * 1024   # don't hold tracks larger than this in memory
+
+
+class AudioEngine:
+    """All pygame.mixer work on one thread, driven by a command queue
+
+    Every public method only enqueues a command, so callers (camera path,
+    alert dispatcher, Tk) never wait on decoding or disk I/O. The engine
+    thread owns the mixer:
+
+    - short cues are decoded once into a cache of ``pygame.mixer.Sound``s
+      and played on reserved channels, so they never interrupt the music
+      stream (``pygame.mixer.music``);
+    - while a cue plays the music is ducked to ``duck_volume`` and restored
+      when the cue ends;
+    - ``prefetch`` reads an upcoming track into memory, so starting it later
+      doesn't touch the disk.
+    """
+
+    def __init__(self, cue_channels=2, music_volume=0.5, duck_volume=0.15, prefetch_slots=2,
+                 instrumentation=None):
+        self.cue_channels = cue_channels
+        self.music_volume = music_volume
+        self.duck_volume = duck_volume
+        self.prefetch_slots = prefetch_slots
+        self.metrics = instrumentation if instrumentation is not None else Instrumentation()
+
+        self._commands = queue.Queue()
+        self._thread = None
+        self.available = False
+        self.ready = threading.Event()   # set once the mixer is up (or failed)
+
+        # Engine-thread state
+        self._sounds = {}                # path -> Sound, or None if it failed to load
+        self._prefetched = OrderedDict() # path -> file bytes, oldest first
+        self._channels = []
+        self._music_buffer = None        # keeps an in-memory track alive while it streams
+        self._ducked = False
+        self._duck_until = 0.0
+        self.music_track = None
+
+    # Public API: enqueue only
+
+    def play_cue(self, path, loops=0, volume=1.0, duck=True):
+        """Play a short sound on a cue channel (decoded once, then cached)"""
+        self._commands.put(("cue", path, loops, volume, duck))
+
+    def preload(self, *paths):
+        """Decode cues ahead of their first use"""
+        self._commands.put(("preload", paths))
+
+    def play_music(self, path, loops=-1, volume=None):
+        """Stream a track (no-op if it is already playing)"""
+        self._commands.put(("music", path, loops, volume))
+
+    def prefetch(self, path):
+        """Read a track into memory so a later play_music starts without disk I/O"""
+        self._commands.put(("prefetch", path))
+
+    def stop_music(self, fade_ms=0):
+        self._commands.put(("stop_music", fade_ms))
+
+    def duck(self, seconds):
+        """Lower the music for ``seconds`` (e.g. while speaking a notification)"""
+        self._commands.put(("duck", seconds))
+
+    def set_music_volume(self, volume):
+        self._commands.put(("volume", volume))
+
+    def flush(self, timeout=2.0):
+        """Wait until every command queued so far has run; False on timeout"""
+        done = threading.Event()
+        self._commands.put(done)
+        return done.wait(timeout)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="audio-engine", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        if self._thread is None:
+            return
+        self._commands.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    # Engine thread
+
+    def _run(self):
+        global pygame
+        try:
+            import pygame
+            pygame.mixer.init()
+            pygame.mixer.set_reserved(self.cue_channels)
+            self._channels = [pygame.mixer.Channel(i) for i in range(self.cue_channels)]
+            self.available = True
+        except Exception as e:
+            print(f"Audio disabled: {e}")
+        self.ready.set()
+
+        metrics = self.metrics
+        while True:
+            if self._ducked and time.monotonic() >= self._duck_until:
+                self._unduck()
+            timeout = max(0.0, self._duck_until - time.monotonic()) if self._ducked else None
+            try:
+                command = self._commands.get(timeout=timeout)
+            except queue.Empty:
+                continue
+
+            if command is None:
+                break
+            if isinstance(command, threading.Event):
+                command.set()
+                continue
+            if not self.available:
+                continue
+
+            start = time.perf_counter()
+            try:
+                getattr(self, f"_do_{command[0]}")(*command[1:])
+            except Exception as e:
+                print(f"Audio {command[0]} failed: {e}")
+            metrics.record(f"audio_{command[0]}", time.perf_counter() - start)
+
+        if self.available:
+            pygame.mixer.quit()
+            self.available = False
+
+    def _sound(self, path):
+        if path not in self._sounds:
+            try:
+                self._sounds[path] = pygame.mixer.Sound(path)
+            except (pygame.error, OSError) as e:
+                print(f"Could not load sound {path}: {e}")
+                self._sounds[path] = None
+        return self._sounds[path]
+
+    def _do_preload(self, paths):
+        for path in paths:
+            self._sound(path)
+
+    def _do_cue(self, path, loops, volume, duck):
+        sound = self._sound(path)
+        if sound is None:
+            return
+        # A free cue channel, else cut off the oldest cue
+        channel = next((c for c in self._channels if not c.get_busy()), self._channels[0])
+        channel.set_volume(volume)
+        channel.play(sound, loops=loops)
+        if duck and self.music_track is not None:
+            self._do_duck(sound.get_length() * (loops + 1))
+
+    def _do_duck(self, seconds):
+        self._duck_until = max(self._duck_until, time.monotonic() + seconds)
+        if not self._ducked:
+            self._ducked = True
+            pygame.mixer.music.set_volume(self.duck_volume)
+
+    def _unduck(self):
+        self._ducked = False
+        pygame.mixer.music.set_volume(self.music_volume)
+
+    def _do_prefetch(self, path):
+        if path in self._prefetched:
+            self._prefetched.move_to_end(path)
+            return
+        if os.path.getsize(path) > MAX_PREFETCH_BYTES:
+            return
+        with open(path, "rb") as f:
+            self._prefetched[path] = f.read()
+        while len(self._prefetched) > self.prefetch_slots:
+            self._prefetched.popitem(last=False)
+
+    def _do_music(self, path, loops, volume):
+        if volume is not None:
+            self.music_volume = volume
+        if path == self.music_track and pygame.mixer.music.get_busy():
+            return
+
+        data = self._prefetched.pop(path, None)
+        if data is not None:
+            self._music_buffer = io.BytesIO(data)
+            pygame.mixer.music.load(self._music_buffer, os.path.splitext(path)[1].lstrip("."))
+        else:
+            self._music_buffer = None
+            pygame.mixer.music.load(path)
+        pygame.mixer.music.set_volume(self.duck_volume if self._ducked else self.music_volume)
+        pygame.mixer.music.play(loops)
+        self.music_track = path
+
+    def _do_stop_music(self, fade_ms):
+        if fade_ms:
+            pygame.mixer.music.fadeout(fade_ms)
+        else:
+            pygame.mixer.music.stop()
+        self.music_track = None
+
+    def _do_volume(self, volume):
+        self.music_volume = volume
+        if not self._ducked:
+            pygame.mixer.music.set_volume(volume)
@@ -0,0 +1,656 @@
+"""Benchmark suite for the per-frame hot paths
+
+Runs every per-frame hot path against synthetic landmarks and synthetic
+frames at 480p, 720p and 1080p, reporting p50/p95/p99 latency and the
+transient memory allocated per call. Results can be saved as a JSON
+baseline and later runs compared against it; any case slower than the
+baseline by more than the tolerance is flagged and the exit code is 1.
+
+Usage:
+    python benchmark.py                          # run the suite
+    python benchmark.py --save-baseline          # run and store results
+    python benchmark.py --compare --tolerance 0.2
+    python benchmark.py --paths                  # legacy vs vectorized / batch vs streaming
+    python benchmark.py --backends               # stress backend parity and calls/sec
+    python benchmark.py --ui                     # Tk queue depth: per-label posts vs snapshots
+    python benchmark.py --roi VIDEO              # crop/downscale inference vs full frame
+    python benchmark.py --sessions VIDEO         # multi-session frames/s vs worker processes
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+from eye_tracking import (calculate_EAR, extract_stress_features, landmarks_to_array,
+                          calculate_EAR_array, extract_stress_features_array,
+                          LEFT_EYE, RIGHT_EYE, NUM_LANDMARKS)
+from heart_rate_monitor import FOREHEAD_INDICES, HeartRateMonitor
+from stress_backends import BACKENDS, SklearnBackend, build_backend
+from pipeline import SnapshotSlot
+from stress_detector import StressDetector, STRESS_FEATURES
+from wellness_analyzer import WellnessAnalyzer
+
+BASELINE_FILE = "benchmark_baseline.json"
+FRAME_BUDGET_MS = 33.3
+RESOLUTIONS = {"480p": (640, 480), "720p": (1280, 720), "1080p": (1920, 1080)}
+
+
+def make_synthetic_landmarks(seed=0, n=NUM_LANDMARKS):
+    """A NormalizedLandmarkList like the ones FaceMesh returns, with random points"""
+    rng = np.random.default_rng(seed)
+    face_landmarks = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z in rng.uniform(0.3, 0.7, size=(n, 3)):
+        lm = face_landmarks.landmark.add()
+        lm.x, lm.y, lm.z = x, y, z - 0.5
+    return face_landmarks
+
+
+def make_synthetic_frame(w, h, seed=0):
+    """Noisy BGR frame of the given size"""
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, size=(h, w, 3), dtype=np.uint8)
+
+
+def legacy_frame(face_landmarks, w, h):
+    """Per-frame landmark work as done before the landmark array path"""
+    landmarks = face_landmarks.landmark
+    left_ear = calculate_EAR(LEFT_EYE, landmarks, w, h)
+    right_ear = calculate_EAR(RIGHT_EYE, landmarks, w, h)
+    features = extract_stress_features(landmarks, w, h)
+    roi = np.array([[int(landmarks[i].x * w), int(landmarks[i].y * h)]
+                    for i in FOREHEAD_INDICES])
+    return (left_ear + right_ear) / 2.0, features, roi
+
+
+def vectorized_frame(face_landmarks, w, h, out=None):
+    """Per-frame landmark work using one landmark array per frame"""
+    points = landmarks_to_array(face_landmarks, w, h, out=out)
+    left_ear, right_ear = calculate_EAR_array(points)
+    features = extract_stress_features_array(points)
+    roi = points[FOREHEAD_INDICES].astype(np.int32)
+    return (left_ear + right_ear) / 2.0, features, roi
+
+
+def synthetic_pulse(bpm, seconds=20, fps=30, seed=0):
+    """Green-channel trace with a pulse at ``bpm``, slow drift and sensor noise"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * fps)) / fps
+    return 120 + 0.5 * np.sin(2 * np.pi * bpm / 60 * t) + 0.05 * t + rng.normal(0, 0.3, len(t))
+
+
+# ---------------------------------------------------------------------------
+# Benchmark cases: each setup returns a zero-argument callable to time
+# ---------------------------------------------------------------------------
+
+def _setup_landmarks_to_array(w, h):
+    face_landmarks = make_synthetic_landmarks()
+    out = np.empty((NUM_LANDMARKS, 2))
+    return lambda: landmarks_to_array(face_landmarks, w, h, out=out)
+
+
+def _setup_calculate_ear(w, h):
+    landmarks = make_synthetic_landmarks().landmark
+    return lambda: calculate_EAR(LEFT_EYE, landmarks, w, h)
+
+
+def _setup_calculate_ear_array(w, h):
+    points = landmarks_to_array(make_synthetic_landmarks(), w, h)
+    return lambda: calculate_EAR_array(points)
+
+
+def _setup_extract_stress_features(w, h):
+    landmarks = make_synthetic_landmarks().landmark
+    return lambda: extract_stress_features(landmarks, w, h)
+
+
+def _setup_extract_stress_features_array(w, h):
+    points = landmarks_to_array(make_synthetic_landmarks(), w, h)
+    return lambda: extract_stress_features_array(points)
+
+
+def _calculate_stress_case(backend):
+    def setup(w, h):
+        detector = StressDetector(user_id=None, backend=backend)
+        features = extract_stress_features_array(landmarks_to_array(make_synthetic_landmarks(), w, h))
+        for _ in range(10):  # fill the history so every call reaches the model
+            detector.calculate_stress(features)
+        return lambda: detector.calculate_stress(features)
+    return setup
+
+
+def _setup_add_frame(w, h):
+    monitor = HeartRateMonitor()
+    frame = make_synthetic_frame(w, h)
+    points = landmarks_to_array(make_synthetic_landmarks(), w, h)
+    rng = np.random.default_rng(1)
+    jitter = rng.uniform(-1.5, 1.5, size=(64,) + points.shape)
+    state = {"i": 0}
+
+    def call():
+        # Sub-pixel to 1.5 px head motion: mostly mask reuse, occasional rebuild
+        state["i"] = (state["i"] + 1) % len(jitter)
+        monitor.add_frame(frame, None, w, h, points=points + jitter[state["i"]])
+    return call
+
+
+def _setup_calculate_heart_rate_batch(w, h):
+    monitor = HeartRateMonitor(mode="batch")
+    for value in synthetic_pulse(72, seconds=15):
+        monitor.add_sample((0, value, 0))
+    return monitor.calculate_heart_rate
+
+
+def _setup_add_sample_streaming(w, h):
+    monitor = HeartRateMonitor(mode="streaming")
+    samples = synthetic_pulse(72, seconds=15)
+    for value in samples:
+        monitor.add_sample((0, value, 0))
+    state = {"i": 0}
+
+    def call():
+        state["i"] = (state["i"] + 1) % len(samples)
+        monitor.add_sample((0, samples[state["i"]], 0))
+    return call
+
+
+def _setup_analyzer_process(w, h):
+    analyzer = WellnessAnalyzer()
+    frame = make_synthetic_frame(w, h)
+    face_landmarks = make_synthetic_landmarks()
+    state = {"t": 0.0}
+
+    def call():
+        state["t"] += 1 / 30
+        analyzer.process(frame, face_landmarks, state["t"])
+    return call
+
+
+class _RecordingRoot:
+    """Stands in for Tk: counts root.after callbacks instead of running them"""
+
+    def __init__(self):
+        self.scheduled = 0
+
+    def after(self, delay, func=None, *args):
+        self.scheduled += 1
+
+
+UI_LABELS = ("ear_label", "blinks_label", "blink_rate_label", "drowsy_label",
+             "drowsy_score_label", "eye_closure_label", "stress_label", "stress_score_label",
+             "music_label", "hr_label", "hrv_label", "hr_status_label")
+
+
+def _fake_app(w, h, label_factory=None):
+    """Minimal object carrying the attributes the app's UI methods read"""
+    analyzer = WellnessAnalyzer()
+    analyzer.process(make_synthetic_frame(w, h), make_synthetic_landmarks(), 0.0)
+    analyzer.current_hr = 72
+    label = SimpleNamespace(config=lambda **kwargs: None)
+    labels = {name: label_factory() if label_factory else label for name in UI_LABELS}
+    return SimpleNamespace(
+        root=_RecordingRoot(), analyzer=analyzer, metrics=analyzer.metrics,
+        stress_detector=analyzer.stress_detector, hr_monitor=analyzer.hr_monitor,
+        music_therapy=SimpleNamespace(is_playing=False), ear_threshold=0.21,
+        _ui_slot=SnapshotSlot(), _ui_seq=0, _ui_applied={}, _ui_interval_ms=100,
+        _ui_poll_due=time.perf_counter(), **labels,
+    )
+
+
+def _setup_update_ui(w, h):
+    from app import EnhancedWellnessApp
+    fake = _fake_app(w, h)
+    return lambda: EnhancedWellnessApp._update_ui(fake, 0.27, 12)
+
+
+def _setup_draw_on_frame(w, h):
+    from app import EnhancedWellnessApp
+    fake = _fake_app(w, h)
+    frame = make_synthetic_frame(w, h)
+    return lambda: EnhancedWellnessApp._draw_on_frame(fake, frame, 0.27, 12)
+
+
+# (name, setup, resolutions it depends on; None = resolution independent, run at 720p)
+CASES = [
+    ("eye_tracking.landmarks_to_array", _setup_landmarks_to_array, None),
+    ("eye_tracking.calculate_EAR", _setup_calculate_ear, None),
+    ("eye_tracking.calculate_EAR_array", _setup_calculate_ear_array, None),
+    ("eye_tracking.extract_stress_features", _setup_extract_stress_features, None),
+    ("eye_tracking.extract_stress_features_array", _setup_extract_stress_features_array, None),
+    ("StressDetector.calculate_stress[sklearn]", _calculate_stress_case("sklearn"), None),
+    ("StressDetector.calculate_stress[compiled_forest]", _calculate_stress_case("compiled_forest"), None),
+    ("StressDetector.calculate_stress[linear]", _calculate_stress_case("linear"), None),
+    ("HeartRateMonitor.add_frame", _setup_add_frame, RESOLUTIONS),
+    ("HeartRateMonitor.calculate_heart_rate[batch]", _setup_calculate_heart_rate_batch, None),
+    ("HeartRateMonitor.add_sample[streaming]", _setup_add_sample_streaming, None),
+    ("WellnessAnalyzer.process", _setup_analyzer_process, RESOLUTIONS),
+    ("EnhancedWellnessApp._update_ui", _setup_update_ui, None),
+    ("EnhancedWellnessApp._draw_on_frame", _setup_draw_on_frame, RESOLUTIONS),
+]
+
+
+def measure_latency(func, calls, warmup=20):
+    """Per-call latencies in milliseconds"""
+    for _ in range(warmup):
+        func()
+    samples = np.empty(calls)
+    perf = time.perf_counter
+    for i in range(calls):
+        start = perf()
+        func()
+        samples[i] = perf() - start
+    return samples * 1000.0
+
+
+def measure_allocations(func, calls=30):
+    """Median transient memory (KiB) allocated during one call, via tracemalloc"""
+    tracemalloc.start()
+    try:
+        peaks = []
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - base)
+    finally:
+        tracemalloc.stop()
+    return float(np.median(peaks)) / 1024.0
+
+
+def run_suite(calls=500, only=None):
+    """Run every case; returns {case_name: {p50_ms, p95_ms, p99_ms, alloc_kib}}"""
+    results = {}
+    for name, setup, resolutions in CASES:
+        if only and not any(pattern in name for pattern in only):
+            continue
+        variants = resolutions.items() if resolutions else [("", RESOLUTIONS["720p"])]
+        for label, (w, h) in variants:
+            case = f"{name}@{label}" if label else name
+            try:
+                func = setup(w, h)
+            except ImportError as e:
+                print(f"  skipped {case}: {e}")
+                continue
+
+            latency = measure_latency(func, calls)
+            results[case] = {
+                "p50_ms": round(float(np.percentile(latency, 50)), 4),
+                "p95_ms": round(float(np.percentile(latency, 95)), 4),
+                "p99_ms": round(float(np.percentile(latency, 99)), 4),
+                "alloc_kib": round(measure_allocations(func), 2),
+            }
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Cases whose p50 or p95 regressed beyond ``tolerance`` (fraction) vs baseline"""
+    regressions = []
+    for case, current in results.items():
+        previous = baseline.get(case)
+        if previous is None:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            if current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append((case, metric, previous[metric], current[metric]))
+    return regressions
+
+
+def print_results(results):
+    print(f"{'case':<52} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'alloc KiB':>10}")
+    for case, r in results.items():
+        flag = "  > frame budget" if r["p95_ms"] > FRAME_BUDGET_MS else ""
+        print(f"{case:<52} {r['p50_ms']:9.4f} {r['p95_ms']:9.4f} {r['p99_ms']:9.4f} "
+              f"{r['alloc_kib']:10.2f}{flag}")
+
+
+def bench_paths(frames=2000, w=1280, h=720):
+    """Legacy vs vectorized landmark path, and batch vs streaming heart rate"""
+    face_landmarks = make_synthetic_landmarks()
+
+    # Make sure both landmark paths agree before comparing their speed
+    ear_a, feat_a, roi_a = legacy_frame(face_landmarks, w, h)
+    ear_b, feat_b, roi_b = vectorized_frame(face_landmarks, w, h)
+    assert np.isclose(ear_a, ear_b), (ear_a, ear_b)
+    assert np.allclose(feat_a, feat_b), (feat_a, feat_b)
+    assert np.array_equal(roi_a, roi_b)
+
+    buffer = np.empty((NUM_LANDMARKS, 2))
+    legacy = np.median(measure_latency(lambda: legacy_frame(face_landmarks, w, h), frames))
+    vectorized = np.median(measure_latency(
+        lambda: vectorized_frame(face_landmarks, w, h, out=buffer), frames))
+
+    print(f"Landmark hot path ({frames} frames, {w}x{h})")
+    print(f"  legacy (per-landmark objects): {legacy * 1e3:8.1f} us/frame")
+    print(f"  vectorized (landmark array):   {vectorized * 1e3:8.1f} us/frame")
+    print(f"  speedup: {legacy / vectorized:.1f}x")
+
+    print("Heart rate: streaming vs batch (raw BPM before calibration offset)")
+    for bpm in (62, 72, 90, 105):
+        green = synthetic_pulse(bpm)
+        streaming = HeartRateMonitor(mode="streaming")
+        batch = HeartRateMonitor(mode="batch")
+
+        start = time.perf_counter()
+        for value in green:
+            streaming.add_sample((0, value, 0))
+        per_sample = (time.perf_counter() - start) / len(green)
+
+        for value in green:
+            batch.add_sample((0, value, 0))
+        start = time.perf_counter()
+        batch_bpm = batch.batch_estimate()
+        per_batch = time.perf_counter() - start
+
+        print(f"  true {bpm:3d}: streaming {streaming.streaming.estimate():6.1f} "
+              f"({per_sample * 1e6:.1f} us/sample) | batch {batch_bpm:6.1f} "
+              f"({per_batch * 1e3:.2f} ms/call)")
+
+
+def synthetic_stress_features(n=2000, seed=7):
+    """Feature rows spread over and beyond the baseline training distribution"""
+    rng = np.random.default_rng(seed)
+    centre = np.array([40, 40, 90, 0.22, 115, 0.22, 0.22])
+    spread = np.array([10, 10, 20, 0.2, 10, 0.08, 0.08])
+    return rng.standard_normal((n, len(STRESS_FEATURES))) * spread + centre
+
+
+def bench_backends(calls=2000):
+    """Check each backend against scikit-learn probabilities, then time single calls
+
+    Returns False if any backend's probabilities differ from scikit-learn's.
+    """
+    X = synthetic_stress_features()
+    forest = StressDetector(user_id=None, backend="sklearn").model
+    linear = StressDetector(user_id=None, backend="linear").model
+
+    print(f"Stress backend parity ({len(X)} rows, max |p - sklearn p|)")
+    parity = True
+    for name in BACKENDS:
+        model = linear if name == "linear" else forest
+        reference = SklearnBackend(model).predict_proba(X)
+        backend = build_backend(name, model)
+        batch_error = np.abs(backend.predict_proba(X) - reference).max()
+        single_error = max(abs(backend.score(x) - p) for x, p in zip(X[:200], reference))
+        status = "ok" if max(batch_error, single_error) < 1e-9 else "MISMATCH"
+        parity = parity and status == "ok"
+        print(f"  {name:<16} batch {batch_error:.2e}  single {single_error:.2e}  {status}")
+
+    print(f"Stress backend throughput ({calls} single-row calls)")
+    x = X[0]
+    for name in BACKENDS:
+        backend = build_backend(name, linear if name == "linear" else forest)
+        latency = measure_latency(lambda: backend.score(x), calls)
+        print(f"  {name:<16} {1000.0 / np.median(latency):10.0f} calls/sec "
+              f"(p50 {np.median(latency) * 1e3:.1f} us)")
+    return parity
+
+
+class _CountingRoot:
+    """Wraps a Tk root so every after() callback is counted and timed"""
+
+    def __init__(self, root):
+        self.root = root
+        self.scheduled = 0
+        self.executed = 0
+        self.busy = 0.0
+
+    def depth(self):
+        """Callbacks scheduled but not yet run (the Tk queue backlog we caused)"""
+        return self.scheduled - self.executed
+
+    def after(self, delay, func, *args):
+        def run():
+            start = time.perf_counter()
+            func(*args)
+            self.busy += time.perf_counter() - start
+            self.executed += 1
+        self.scheduled += 1
+        return self.root.after(delay, run)
+
+
+def bench_ui(seconds=5.0, fps=30):
+    """Tk queue depth and callback time: per-label root.after posts vs snapshot polling"""
+    try:
+        import tkinter as tk
+        from app import EnhancedWellnessApp
+        root = tk.Tk()
+    except Exception as e:
+        print(f"Skipping UI benchmark (needs Tk with a display and the app's dependencies): {e}")
+        return
+    root.withdraw()
+
+    def run(mode):
+        fake = _fake_app(*RESOLUTIONS["720p"], label_factory=lambda: tk.Label(root))
+        fake._apply_ui_snapshot = lambda snapshot: EnhancedWellnessApp._apply_ui_snapshot(fake, snapshot)
+        fake._poll_ui = lambda: EnhancedWellnessApp._poll_ui(fake)
+        counting = _CountingRoot(root)
+        fake.root = counting
+        depths = []
+        stop = threading.Event()
+
+        def producer():
+            while not stop.is_set():
+                EnhancedWellnessApp._update_ui(fake, 0.27, 12)
+                if mode == "per-label":
+                    # The previous behaviour: one root.after per label per frame
+                    _, snapshot = fake._ui_slot.latest()
+                    for name, text, color in snapshot:
+                        options = {"text": text}
+                        if color is not None:
+                            options["foreground"] = color
+                        counting.after(0, getattr(fake, name).config, options)
+                depths.append(counting.depth())
+                time.sleep(1.0 / fps)
+
+        if mode == "snapshot":
+            counting.after(fake._ui_interval_ms, fake._poll_ui)
+        thread = threading.Thread(target=producer, daemon=True)
+        thread.start()
+        root.after(int(seconds * 1000), root.quit)
+        root.mainloop()
+        stop.set()
+        thread.join()
+
+        executed = max(counting.executed, 1)
+        print(f"  {mode:<10} {counting.executed / seconds:7.1f} callbacks/s | queue depth "
+              f"mean {np.mean(depths):5.1f} max {max(depths):4d} | "
+              f"{counting.busy / executed * 1e3:.3f} ms/callback, "
+              f"{counting.busy / seconds * 1e3:.1f} ms/s on the Tk thread")
+
+    print(f"Tk UI updates at {fps} fps for {seconds:.0f}s each")
+    run("per-label")
+    run("snapshot")
+    root.destroy()
+
+
+def bench_roi(source, max_frames=300):
+    """CPU per frame and landmark deviation of scaled/cropped inference vs the full frame"""
+    import cv2
+    from eye_tracking import create_face_mesh
+    from face_roi import AdaptiveFaceMesh
+    from replay import iter_frames, source_fps
+
+    frames = []
+    for _, _, frame in iter_frames(source, source_fps(source)):
+        frames.append(frame)
+        if len(frames) >= max_frames:
+            break
+    if not frames:
+        print(f"No frames in {source}")
+        return
+    h, w = frames[0].shape[:2]
+
+    # Reference: whole frame at full resolution, as the app used to run it
+    reference_mesh = create_face_mesh()
+    reference = []
+    start = time.process_time()
+    for frame in frames:
+        results = reference_mesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        reference.append(landmarks_to_array(results.multi_face_landmarks[0], w, h)
+                         if results.multi_face_landmarks else None)
+    reference_cpu = (time.process_time() - start) / len(frames) * 1000.0
+    found = sum(r is not None for r in reference)
+    print(f"Landmark inference on {len(frames)} frames ({w}x{h}), face in {found}")
+    print(f"  {'full frame':<18} {reference_cpu:7.2f} ms CPU/frame")
+
+    # (label, mode, fixed ladder level or None to let it adapt)
+    variants = [("scale x0.5", "scale", 2), ("crop x1.0", "crop", 0),
+                ("crop x0.5", "crop", 2), ("crop adaptive", "crop", None)]
+    for label, mode, level in variants:
+        runner = AdaptiveFaceMesh(create_face_mesh(), mode=mode)
+        if level is not None:
+            runner.level = level
+            runner.patience = float("inf")
+        deviations, iod = [], []
+        start = time.process_time()
+        for frame, ref in zip(frames, reference):
+            face_landmarks = runner.process(frame)
+            if face_landmarks is not None and ref is not None:
+                points = landmarks_to_array(face_landmarks, w, h)
+                deviations.append(np.linalg.norm(points - ref, axis=1).mean())
+                iod.append(np.linalg.norm(ref[33] - ref[263]))
+        cpu = (time.process_time() - start) / len(frames) * 1000.0
+        if deviations:
+            dev = np.array(deviations)
+            rel = dev / np.array(iod) * 100.0
+            accuracy = (f"deviation mean {dev.mean():.2f} px, p95 {np.percentile(dev, 95):.2f} px "
+                        f"({rel.mean():.1f}% of eye distance)")
+        else:
+            accuracy = "no matched faces"
+        print(f"  {label:<18} {cpu:7.2f} ms CPU/frame ({cpu / reference_cpu:.0%}) | {accuracy} | "
+              f"crop {runner.crop_frames}, fallbacks {runner.fallbacks}, final scale {runner.scale}")
+
+
+def bench_sessions(source, sessions=4, seconds=10.0, max_frames=300):
+    """Total analyzed frames/s of N sessions with 1..cores inference workers
+
+    Each worker count runs with one analytics thread and with the manager's
+    default, to show whether analytics or inference is the limit.
+    """
+    from replay import iter_frames, source_fps
+    from session import SessionManager
+
+    frames = []
+    for _, _, frame in iter_frames(source, source_fps(source)):
+        frames.append(frame)
+        if len(frames) >= max_frames:
+            break
+    if not frames:
+        print(f"No frames in {source}")
+        return
+
+    cores = os.cpu_count() or 1
+    counts = sorted({1, max(1, cores // 2), cores})
+    print(f"{sessions} sessions replaying {len(frames)} frames each, {cores} cores")
+    for workers, threads in [(w, t) for w in counts for t in sorted({1, min(w, 4)})]:
+        manager = SessionManager(workers=workers, analytics_threads=threads)
+        stop = threading.Event()
+
+        def feed(session_id):
+            i = 0
+            while not stop.is_set():
+                manager.submit(session_id, frames[i % len(frames)], timestamp=i / 30.0)
+                i += 1
+                time.sleep(0.002)
+
+        ids = [f"s{i}" for i in range(sessions)]
+        for session_id in ids:
+            manager.add_session(session_id, user_id=None)
+        feeders = [threading.Thread(target=feed, args=(sid,), daemon=True) for sid in ids]
+        for t in feeders:
+            t.start()
+
+        # Let every worker build its graphs before timing
+        time.sleep(3.0)
+        before = sum(manager.sessions[sid].frames_processed for sid in ids)
+        start = time.perf_counter()
+        time.sleep(seconds)
+        done = sum(manager.sessions[sid].frames_processed for sid in ids) - before
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        for t in feeders:
+            t.join()
+        manager.close()
+        print(f"  {workers} worker(s), {threads} analytics thread(s): "
+              f"{done / elapsed:7.1f} frames/s total ({done / elapsed / sessions:.1f} per session)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite for the per-frame hot paths")
+    parser.add_argument("--calls", type=int, default=500, help="timed calls per case")
+    parser.add_argument("--only", nargs="*", help="run only cases whose name contains one of these")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline JSON path")
+    parser.add_argument("--save-baseline", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="flag regressions against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed slowdown vs baseline as a fraction (default 0.2 = 20%%)")
+    parser.add_argument("--paths", action="store_true",
+                        help="compare legacy/vectorized and batch/streaming paths instead")
+    parser.add_argument("--backends", action="store_true",
+                        help="check stress backend parity against scikit-learn and time them instead")
+    parser.add_argument("--ui", action="store_true",
+                        help="compare per-label Tk posts with snapshot polling instead (needs a display)")
+    parser.add_argument("--roi", metavar="VIDEO",
+                        help="compare scaled/cropped landmark inference with the full frame on a recording")
+    parser.add_argument("--sessions", metavar="VIDEO",
+                        help="measure multi-session throughput against inference worker count")
+    args = parser.parse_args()
+
+    if args.sessions:
+        bench_sessions(args.sessions)
+        return
+    if args.roi:
+        bench_roi(args.roi)
+        return
+    if args.ui:
+        bench_ui()
+        return
+    if args.paths:
+        bench_paths()
+        return
+    if args.backends:
+        if not bench_backends():
+            print("Stress backend parity check FAILED")
+            sys.exit(1)
+        return
+
+    results = run_suite(args.calls, args.only)
+    print_results(results)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"python": platform.python_version(),
+                       "machine": platform.machine(),
+                       "processor": platform.processor(),
+                       "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "results": results}, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    if args.compare:
+        try:
+            with open(args.baseline) as f:
+                baseline = json.load(f)["results"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Could not load baseline {args.baseline}: {e}")
+            sys.exit(2)
+
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for case, metric, before, after in regressions:
+                print(f"  {case} {metric}: {before:.4f} -> {after:.4f} ms")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
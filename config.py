@@ -1,10 +1,12 @@
 import os
-import csv
 
 
 BEEP_FILE = "assets/beep.mp3"
-LOG_FILE = "reminder_log.csv"
+LOG_FILE = "reminder_log.csv"        # Legacy CSV log, imported into EVENT_DB once
+EVENT_DB = "wellness_events.db"
 MUSIC_FOLDER = "assets/music"
+MUSIC_INDEX_FILE = "music_index.json"   # Cached track metadata, rescanned incrementally
+MUSIC_RESCAN_INTERVAL = 60.0            # Seconds between background library rescans
 
 # Detection Thresholds
 DEFAULT_INTERVAL_MIN = 20
@@ -29,14 +31,30 @@ HR_UPDATE_INTERVAL = 5           # Update every 5 seconds
 # Popup
 POPUP_AUTO_CLOSE_S = 20
 
-# Initialize log file
-if not os.path.exists(LOG_FILE):
-    with open(LOG_FILE, mode="w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["timestamp", "trigger", "ack", "blinks_in_last_min", 
-                        "stress_level", "heart_rate", "drowsiness_score"])
-
-# Create music folder
-os.makedirs(MUSIC_FOLDER, exist_ok=True)
-
-
+# Landmark inference input: "full", "scale" (downscaled frame) or "crop" (around the last face)
+FACE_INPUT_MODE = os.environ.get("WELLNESS_FACE_INPUT", "crop")
+FACE_BUDGET_MS = float(os.environ.get("WELLNESS_FACE_BUDGET_MS", "20"))  # step resolution down above this
+
+# Presence duty cycling: after this many seconds without a face, only probe
+# PRESENCE_PROBE_FPS frames per second (at PRESENCE_PROBE_SCALE) until one is back
+PRESENCE_ABSENT_AFTER = float(os.environ.get("WELLNESS_ABSENT_AFTER", "5"))
+PRESENCE_PROBE_FPS = float(os.environ.get("WELLNESS_PROBE_FPS", "2"))
+PRESENCE_PROBE_SCALE = 0.5
+
+# How often the Tk side applies the latest metrics snapshot to the labels
+UI_REFRESH_HZ = float(os.environ.get("WELLNESS_UI_HZ", "10"))
+
+# Live trends window: minutes of history kept, samples/s stored, chart redraws/s
+DASHBOARD_WINDOW_MIN = float(os.environ.get("WELLNESS_DASHBOARD_MIN", "5"))
+DASHBOARD_SAMPLE_HZ = 5.0
+DASHBOARD_REFRESH_HZ = float(os.environ.get("WELLNESS_DASHBOARD_HZ", "4"))
+
+# Hot-path instrumentation (off by default; env vars override)
+METRICS_ENABLED = os.environ.get("WELLNESS_METRICS", "0") == "1"
+METRICS_FILE = os.environ.get("WELLNESS_METRICS_FILE") or None      # Prometheus textfile
+METRICS_PORT = int(os.environ.get("WELLNESS_METRICS_PORT", "0")) or None  # http://127.0.0.1:PORT/metrics
+METRICS_OVERLAY = os.environ.get("WELLNESS_METRICS_OVERLAY", "0") == "1"
+
+# Per-frame telemetry recorder (mmap ring files + 1s/1m/1h tiers)
+TELEMETRY_ENABLED = os.environ.get("WELLNESS_TELEMETRY", "1") == "1"
+TELEMETRY_DIR = os.environ.get("WELLNESS_TELEMETRY_DIR", "telemetry")
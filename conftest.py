@@ -0,0 +1 @@
+# Lets pytest import the top-level modules (the app is not a package)
@@ -0,0 +1,333 @@
+import csv
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+# Columns of one logged reminder, in order (shared by the CSV migration)
+EVENT_COLUMNS = ("timestamp", "trigger", "ack", "blinks_last_min",
+                 "stress_level", "heart_rate", "drowsiness_score")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    trigger TEXT NOT NULL,
+    ack TEXT NOT NULL,
+    blinks_last_min INTEGER,
+    stress_level REAL,
+    heart_rate REAL,
+    drowsiness_score REAL
+);
+CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+CREATE TABLE IF NOT EXISTS daily_rollups (
+    day TEXT PRIMARY KEY,
+    total INTEGER NOT NULL,
+    acknowledged INTEGER NOT NULL,
+    stress_sum REAL NOT NULL,
+    hr_sum REAL NOT NULL,
+    drowsiness_sum REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_INSERT = ("INSERT INTO events (ts, trigger, ack, blinks_last_min, stress_level, heart_rate, "
+           "drowsiness_score) VALUES (?, ?, ?, ?, ?, ?, ?)")
+
+_UPSERT_ROLLUP = """
+INSERT INTO daily_rollups (day, total, acknowledged, stress_sum, hr_sum, drowsiness_sum)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (day) DO UPDATE SET
+    total = total + excluded.total,
+    acknowledged = acknowledged + excluded.acknowledged,
+    stress_sum = stress_sum + excluded.stress_sum,
+    hr_sum = hr_sum + excluded.hr_sum,
+    drowsiness_sum = drowsiness_sum + excluded.drowsiness_sum
+"""
+
+_REBUILD_ROLLUPS = """
+INSERT INTO daily_rollups (day, total, acknowledged, stress_sum, hr_sum, drowsiness_sum)
+SELECT date(ts, 'unixepoch', 'localtime'), COUNT(*), SUM(ack = 'ack'),
+       TOTAL(stress_level), TOTAL(heart_rate), TOTAL(drowsiness_score)
+FROM events GROUP BY 1
+"""
+
+# Bucket label for each summary period, computed from a daily_rollups day
+_PERIODS = {
+    "day": "day",
+    "week": "date(day, 'weekday 0', '-6 days')",   # Monday of the week
+    "month": "strftime('%Y-%m', day)",
+}
+
+
+def _to_float(value, default=0.0):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class EventStore:
+    """Reminder event log in SQLite (WAL mode) with one batching writer thread
+
+    ``append`` only enqueues, so it is safe and cheap from any thread. The
+    writer drains the queue in batches of up to ``batch_size`` rows per
+    transaction, waiting at most ``flush_interval`` seconds to fill a batch.
+    Readers use their own per-thread connections; WAL lets them run while
+    the writer commits. Timestamps are stored as epoch seconds and indexed.
+
+    Per-day aggregates (count, acks and the sums behind the means) are
+    updated in the same transaction as each insert, so summaries read a
+    handful of rollup rows instead of scanning raw events.
+    """
+
+    def __init__(self, path="wellness_events.db", batch_size=64, flush_interval=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._local = threading.local()
+        self._closed = False
+
+        # Create the schema up front so readers never see a missing table
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'rollups'").fetchone() is None:
+            # Databases from before the rollup table: build it once from raw events
+            conn.execute("DELETE FROM daily_rollups")
+            conn.execute(_REBUILD_ROLLUPS)
+            conn.execute("INSERT INTO meta (key, value) VALUES ('rollups', '1')")
+        conn.commit()
+        self._local.conn = conn
+
+        self._writer = threading.Thread(target=self._write_loop, name="event-store-writer",
+                                        daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    # Writing
+
+    def append(self, trigger, ack, blinks_last_min, stress_level=0, heart_rate=0,
+               drowsiness_score=0, timestamp=None):
+        """Queue one event for the writer (never blocks on disk)"""
+        ts = time.time() if timestamp is None else timestamp
+        self._queue.put((ts, trigger, ack, blinks_last_min, stress_level, heart_rate,
+                         drowsiness_score))
+
+    def submit(self, job):
+        """Run ``job(conn)`` on the writer thread, inside its transaction"""
+        self._queue.put(job)
+
+    def flush(self, timeout=5.0):
+        """Wait until everything queued so far is committed; False on timeout"""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join(timeout)
+
+    def _write_loop(self):
+        conn = self._connect()
+        running = True
+        while running:
+            item = self._queue.get()
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            # Keep collecting until the batch is full, the interval passes or a
+            # flush/close marker arrives
+            while (len(batch) < self.batch_size
+                   and isinstance(batch[-1], tuple)):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            rows = []
+            try:
+                for item in batch:
+                    if isinstance(item, tuple):
+                        rows.append(item)
+                        continue
+                    if rows:
+                        self._insert(conn, rows)
+                        rows = []
+                    if item is None:
+                        running = False
+                    elif isinstance(item, threading.Event):
+                        conn.commit()
+                        item.set()
+                    else:
+                        self._run_job(conn, item)
+                if rows:
+                    self._insert(conn, rows)
+                conn.commit()
+            except Exception as e:
+                # Never let one bad batch stop the writer: later appends would
+                # queue forever and every flush would time out
+                conn.rollback()
+                print(f"Event store write failed: {e}")
+                for item in batch:
+                    if item is None:
+                        running = False
+                    elif isinstance(item, threading.Event):
+                        item.set()
+        conn.close()
+
+    def _run_job(self, conn, job):
+        """Run a submitted job in a savepoint, so a failing job only undoes its own writes"""
+        conn.execute("SAVEPOINT job")
+        try:
+            job(conn)
+        except Exception as e:
+            conn.execute("ROLLBACK TO job")
+            print(f"Event store job failed: {e}")
+        conn.execute("RELEASE job")
+
+    def _insert(self, conn, rows):
+        """Insert event rows and fold them into the daily rollups (caller commits)"""
+        conn.executemany(_INSERT, rows)
+
+        days = {}
+        for ts, _, ack, _, stress, hr, drowsiness in rows:
+            day = datetime.fromtimestamp(ts).date().isoformat()
+            bucket = days.setdefault(day, [0, 0, 0.0, 0.0, 0.0])
+            bucket[0] += 1
+            bucket[1] += ack == "ack"
+            bucket[2] += _to_float(stress)
+            bucket[3] += _to_float(hr)
+            bucket[4] += _to_float(drowsiness)
+        conn.executemany(_UPSERT_ROLLUP, [(day, *bucket) for day, bucket in days.items()])
+
+    # Reading
+
+    def query(self, start=None, end=None, trigger=None, limit=None):
+        """Events with start <= ts < end (epoch seconds), oldest first, as dicts"""
+        sql = ("SELECT ts, trigger, ack, blinks_last_min, stress_level, heart_rate, "
+               "drowsiness_score FROM events WHERE ts >= ? AND ts < ?")
+        params = [start if start is not None else float("-inf"),
+                  end if end is not None else float("inf")]
+        if trigger is not None:
+            sql += " AND trigger = ?"
+            params.append(trigger)
+        sql += " ORDER BY ts"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        rows = self._reader().execute(sql, params).fetchall()
+        return [dict(zip(EVENT_COLUMNS, row)) for row in rows]
+
+    def count(self, start=None, end=None):
+        row = self._reader().execute(
+            "SELECT COUNT(*) FROM events WHERE ts >= ? AND ts < ?",
+            (start if start is not None else float("-inf"),
+             end if end is not None else float("inf"))).fetchone()
+        return row[0]
+
+    def summary(self, period="day", start_day=None, end_day=None):
+        """Aggregates per day, week (keyed by Monday) or month, read from the rollups
+
+        Returns [{date, total, acknowledged, ack_rate, stress_level, heart_rate,
+        drowsiness_score}] oldest first; the means are per event. ``start_day``
+        and ``end_day`` are inclusive ISO dates.
+        """
+        try:
+            bucket = _PERIODS[period]
+        except KeyError:
+            raise ValueError(f"Unknown summary period: {period}")
+
+        rows = self._reader().execute(
+            f"SELECT {bucket} AS bucket, SUM(total), SUM(acknowledged), SUM(stress_sum), "
+            "SUM(hr_sum), SUM(drowsiness_sum) FROM daily_rollups "
+            "WHERE day >= ? AND day <= ? GROUP BY bucket ORDER BY bucket",
+            (start_day or "0000-00-00", end_day or "9999-99-99")).fetchall()
+        return [{"date": label, "total": total, "acknowledged": acked,
+                 "ack_rate": acked / total * 100 if total else 0.0,
+                 "stress_level": stress / total if total else 0.0,
+                 "heart_rate": hr / total if total else 0.0,
+                 "drowsiness_score": drowsy / total if total else 0.0}
+                for label, total, acked, stress, hr, drowsy in rows]
+
+    def daily_summary(self, start_day=None, end_day=None):
+        return self.summary("day", start_day, end_day)
+
+    # Migration
+
+    def migrate_csv(self, csv_path):
+        """Import a legacy reminder_log.csv once (runs on the writer thread)
+
+        Accepts both header spellings (blinks_last_min / blinks_in_last_min).
+        The import is recorded (with the file's size and mtime) in the meta
+        table, so the same CSV is never imported twice.
+        """
+        try:
+            stat = os.stat(csv_path)
+        except OSError:
+            return
+        marker = f"{stat.st_size}:{int(stat.st_mtime)}"
+        key = f"migrated:{os.path.abspath(csv_path)}"
+
+        def job(conn):
+            done = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+            if done is not None:
+                return
+
+            imported = 0
+            # An unreadable file undoes its partial import and is retried next start
+            conn.execute("SAVEPOINT migrate")
+            try:
+                with open(csv_path, newline="") as f:
+                    reader = csv.DictReader(f)
+                    rows = []
+                    for record in reader:
+                        try:
+                            ts = datetime.fromisoformat(record["timestamp"]).timestamp()
+                        except (KeyError, TypeError, ValueError):
+                            continue
+                        blinks = record.get("blinks_last_min", record.get("blinks_in_last_min"))
+                        rows.append((ts, record.get("trigger") or "", record.get("ack") or "",
+                                     int(_to_float(blinks)), _to_float(record.get("stress_level")),
+                                     _to_float(record.get("heart_rate")),
+                                     _to_float(record.get("drowsiness_score"))))
+                        if len(rows) >= 1000:
+                            self._insert(conn, rows)
+                            imported += len(rows)
+                            rows = []
+                    if rows:
+                        self._insert(conn, rows)
+                        imported += len(rows)
+            except (OSError, UnicodeDecodeError, csv.Error) as e:
+                conn.execute("ROLLBACK TO migrate")
+                conn.execute("RELEASE migrate")
+                print(f"Could not import {csv_path}: {e}")
+                return
+            conn.execute("RELEASE migrate")
+
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, marker))
+            print(f"Imported {imported} events from {csv_path}")
+
+        self.submit(job)
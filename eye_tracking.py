@@ -1,11 +1,22 @@
 import numpy as np
-import mediapipe as mp
 
-mp_face_mesh = mp.solutions.face_mesh
-face_mesh = mp_face_mesh.FaceMesh(refine_landmarks=True, 
-                                   max_num_faces=1,
-                                   min_detection_confidence=0.5,
-                                   min_tracking_confidence=0.5)
+def create_face_mesh():
+    """New FaceMesh graph with the app's settings (one per independent stream)"""
+    # MediaPipe takes about a second to import; only pay for it when a graph is built
+    import mediapipe as mp
+    return mp.solutions.face_mesh.FaceMesh(refine_landmarks=True, 
+                                 max_num_faces=1,
+                                 min_detection_confidence=0.5,
+                                 min_tracking_confidence=0.5)
+
+def __getattr__(name):
+    """Create the shared ``face_mesh`` on first use, so processes that only
+    need their own graphs (inference workers, replay) never build it"""
+    if name == "face_mesh":
+        global face_mesh
+        face_mesh = create_face_mesh()
+        return face_mesh
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 LEFT_EYE = [33, 160, 158, 133, 153, 144]
 RIGHT_EYE = [362, 385, 387, 263, 373, 380]
@@ -16,6 +27,30 @@ EYEBROW_RIGHT = [336, 296, 334, 293, 300]
 MOUTH = [61, 291, 0, 17, 314, 405]
 JAW = [172, 136, 150, 176, 148, 152]
 
+# Vectorized landmark access: with refine_landmarks=True FaceMesh returns 478 points
+NUM_LANDMARKS = 478
+
+# EAR distance pairs for both eyes: (p2, p6), (p3, p5), (p1, p4) per eye
+_EAR_A = np.array([LEFT_EYE[1], LEFT_EYE[2], LEFT_EYE[0], RIGHT_EYE[1], RIGHT_EYE[2], RIGHT_EYE[0]])
+_EAR_B = np.array([LEFT_EYE[5], LEFT_EYE[4], LEFT_EYE[3], RIGHT_EYE[5], RIGHT_EYE[4], RIGHT_EYE[3]])
+
+# Stress distances: brow gap, mouth width, mouth height, jaw width, then the EAR pairs
+_STRESS_A = np.concatenate([[70, 61, 0, 172], _EAR_A])
+_STRESS_B = np.concatenate([[300, 291, 17, 397], _EAR_B])
+
+# Vertical groups averaged for the brow-to-eye distances
+_Y_GROUPS = [EYEBROW_LEFT, EYEBROW_RIGHT, LEFT_EYE, RIGHT_EYE]
+_Y_INDICES = np.concatenate(_Y_GROUPS)
+_Y_OFFSETS = np.cumsum([0] + [len(g) for g in _Y_GROUPS[:-1]])
+_Y_SIZES = np.array([len(g) for g in _Y_GROUPS], dtype=np.float64)
+
+# Wire layout of a serialized NormalizedLandmark holding exactly x, y, z
+# (field tag 0x0a + length, then tagged little-endian float32 values)
+_LANDMARK_WIRE = np.dtype([("tag", "u1"), ("size", "u1"),
+                           ("x_tag", "u1"), ("x", "<f4"),
+                           ("y_tag", "u1"), ("y", "<f4"),
+                           ("z_tag", "u1"), ("z", "<f4")])
+
 def euclidean_distance(p1, p2):
     return np.linalg.norm(np.array(p1) - np.array(p2))
 
@@ -81,3 +116,111 @@ def extract_stress_features(landmarks, w, h):
     
     return np.array(features)
 
+
+
+def _decode_landmark_list(face_landmarks, n):
+    """Decode a NormalizedLandmarkList straight from its wire bytes, or None
+
+    Only used when every landmark carries exactly x, y and z, which gives
+    a fixed 17-byte record; anything else falls back to attribute access.
+    """
+    serialize = getattr(face_landmarks, "SerializeToString", None)
+    if serialize is None:
+        return None
+    
+    raw = serialize()
+    if len(raw) != n * _LANDMARK_WIRE.itemsize:
+        return None
+    
+    records = np.frombuffer(raw, dtype=_LANDMARK_WIRE)
+    if not ((records["tag"] == 0x0a).all() and (records["size"] == 15).all()
+            and (records["x_tag"] == 0x0d).all() and (records["y_tag"] == 0x15).all()
+            and (records["z_tag"] == 0x1d).all()):
+        return None
+    return records
+
+def remap_landmarks(face_landmarks, x0, y0, sx, sy):
+    """Map landmarks found in a crop back to full-frame normalized coordinates
+
+    The crop starts at (x0, y0) and spans (sx, sy), all as fractions of the
+    full frame. z is scaled with the width, as MediaPipe's z is. Returns a
+    new NormalizedLandmarkList, rebuilt from its wire bytes in one parse.
+    """
+    n = len(face_landmarks.landmark)
+    records = _decode_landmark_list(face_landmarks, n)
+    if records is None:
+        remapped = type(face_landmarks)()
+        remapped.CopyFrom(face_landmarks)
+        for lm in remapped.landmark:
+            lm.x = x0 + lm.x * sx
+            lm.y = y0 + lm.y * sy
+            lm.z = lm.z * sx
+        return remapped
+    
+    records = records.copy()
+    records["x"] = x0 + records["x"].astype(np.float64) * sx
+    records["y"] = y0 + records["y"].astype(np.float64) * sy
+    records["z"] = records["z"].astype(np.float64) * sx
+    remapped = type(face_landmarks)()
+    remapped.ParseFromString(records.tobytes())
+    return remapped
+
+def landmarks_to_array(face_landmarks, w, h, out=None):
+    """Convert face landmarks into an (N, 2) pixel-space array
+
+    Accepts a NormalizedLandmarkList (decoded in bulk) or any sequence of
+    objects with .x/.y, or an (N, 2) array of normalized coordinates (as
+    sent back by inference workers). Pass the array returned by the
+    previous call as ``out`` to reuse it instead of allocating a new one
+    every frame.
+    """
+    if isinstance(face_landmarks, np.ndarray):
+        if out is None or out.shape != face_landmarks.shape:
+            out = np.empty(face_landmarks.shape, dtype=np.float64)
+        np.multiply(face_landmarks, (w, h), out=out)
+        return out
+    
+    landmarks = getattr(face_landmarks, "landmark", face_landmarks)
+    n = len(landmarks)
+    if out is None or out.shape != (n, 2):
+        out = np.empty((n, 2), dtype=np.float64)
+    
+    records = _decode_landmark_list(face_landmarks, n)
+    if records is not None:
+        np.multiply(records["x"], w, out=out[:, 0], dtype=np.float64)
+        np.multiply(records["y"], h, out=out[:, 1], dtype=np.float64)
+    else:
+        out[:, 0] = [lm.x for lm in landmarks]
+        out[:, 1] = [lm.y for lm in landmarks]
+        out *= (w, h)
+    return out
+
+def _pair_distances(points, idx_a, idx_b):
+    """Euclidean distances between points[idx_a[i]] and points[idx_b[i]]"""
+    diffs = points[idx_a] - points[idx_b]
+    return np.hypot(diffs[:, 0], diffs[:, 1]).tolist()
+
+def calculate_EAR_array(points):
+    """Eye Aspect Ratio for both eyes from a landmark array -> (left_ear, right_ear)"""
+    d = _pair_distances(points, _EAR_A, _EAR_B)
+    left_ear = (d[0] + d[1]) / (2.0 * d[2] + 1e-6)
+    right_ear = (d[3] + d[4]) / (2.0 * d[5] + 1e-6)
+    return left_ear, right_ear
+
+def extract_stress_features_array(points):
+    """Vectorized extract_stress_features operating on a landmark array"""
+    left_brow, right_brow, left_eye_center, right_eye_center = (
+        np.add.reduceat(points[_Y_INDICES, 1], _Y_OFFSETS) / _Y_SIZES).tolist()
+    
+    brow_distance, mouth_width, mouth_height, jaw_width, *ear = \
+        _pair_distances(points, _STRESS_A, _STRESS_B)
+    
+    return np.array([
+        abs(left_eye_center - left_brow),
+        abs(right_eye_center - right_brow),
+        brow_distance,
+        mouth_height / (mouth_width + 1e-6),
+        jaw_width,
+        (ear[0] + ear[1]) / (2.0 * ear[2] + 1e-6),
+        (ear[3] + ear[4]) / (2.0 * ear[5] + 1e-6),
+    ])
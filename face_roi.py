@@ -0,0 +1,176 @@
+import time
+
+import cv2
+
+from eye_tracking import create_face_mesh, landmarks_to_array, remap_landmarks
+
+RESOLUTION_LADDER = (1.0, 0.75, 0.5, 0.35)   # input scales, best quality first
+MIN_INPUT_SIDE = 128   # never feed FaceMesh a crop smaller than this (pixels)
+
+
+class AdaptiveFaceMesh:
+    """Runs FaceMesh on a downscaled frame or a padded crop around the last face
+
+    Modes:
+        "full"  - whole frame at full resolution (the original behaviour)
+        "scale" - whole frame, downscaled by the current ladder step
+        "crop"  - a padded box around the previous face, downscaled by the
+                  ladder step; the box is kept while the face stays well
+                  inside it, so MediaPipe's own tracking stays valid
+
+    Landmarks are always returned in full-frame normalized coordinates.
+    When the crop loses the face, the same frame is re-run on the whole
+    (scaled) image. The ladder steps down when inference time stays above
+    ``budget_ms`` and back up when it stays well below.
+
+    Crops go through their own FaceMesh (``crop_mesh``): MediaPipe tracks
+    the face between calls in image coordinates, so mixing crops and whole
+    frames in one graph makes its tracked region wrong on every switch.
+    """
+
+    def __init__(self, face_mesh, mode="crop", padding=0.5, ladder=RESOLUTION_LADDER,
+                 budget_ms=20.0, patience=15, crop_mesh=None):
+        if mode not in ("full", "scale", "crop"):
+            raise ValueError(f"Unknown face input mode: {mode}")
+        self.face_mesh = face_mesh
+        self.crop_mesh = crop_mesh
+        if mode == "crop" and crop_mesh is None:
+            self.crop_mesh = create_face_mesh()
+        self.mode = mode
+        self.padding = padding
+        self.ladder = ladder if mode != "full" else (1.0,)
+        self.budget_ms = budget_ms
+        self.patience = patience
+        self.level = 0
+        self._over = 0
+        self._under = 0
+        self._crop = None   # (x0, y0, x1, y1) in full-frame pixels
+
+        # Stats
+        self.frames = 0
+        self.crop_frames = 0
+        self.fallbacks = 0
+        self.probes = 0
+        self.last_ms = 0.0
+        self.avg_ms = 0.0
+        self.avg_cpu_ms = 0.0
+
+    @property
+    def scale(self):
+        return self.ladder[self.level]
+
+    def _run(self, mesh, image_bgr, scale):
+        h, w = image_bgr.shape[:2]
+        if scale < 1.0 and min(w, h) * scale >= MIN_INPUT_SIDE:
+            image_bgr = cv2.resize(image_bgr, (int(w * scale), int(h * scale)),
+                                   interpolation=cv2.INTER_AREA)
+        results = mesh.process(cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB))
+        if results.multi_face_landmarks:
+            return results.multi_face_landmarks[0]
+        return None
+
+    def process(self, frame_bgr):
+        """Face landmarks for this frame (full-frame normalized), or None"""
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        h, w = frame_bgr.shape[:2]
+
+        face_landmarks = None
+        if self.mode == "crop" and self._crop is not None:
+            x0, y0, x1, y1 = self._crop
+            found = self._run(self.crop_mesh, frame_bgr[y0:y1, x0:x1], self.scale)
+            if found is not None:
+                face_landmarks = remap_landmarks(found, x0 / w, y0 / h, (x1 - x0) / w, (y1 - y0) / h)
+                self.crop_frames += 1
+            else:
+                # Tracking lost: fall back to the whole frame
+                self.fallbacks += 1
+                self._crop = None
+
+        if face_landmarks is None:
+            face_landmarks = self._run(self.face_mesh, frame_bgr,
+                                       self.scale if self.mode != "full" else 1.0)
+
+        if self.mode == "crop":
+            self._update_crop(face_landmarks, w, h)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        cpu_ms = (time.process_time() - cpu_start) * 1000.0
+        self.frames += 1
+        self.last_ms = elapsed_ms
+        self.avg_ms = elapsed_ms if self.frames == 1 else 0.9 * self.avg_ms + 0.1 * elapsed_ms
+        self.avg_cpu_ms = cpu_ms if self.frames == 1 else 0.9 * self.avg_cpu_ms + 0.1 * cpu_ms
+        self._adapt(elapsed_ms)
+        return face_landmarks
+
+    def probe(self, frame_bgr, scale=0.5):
+        """Cheap presence check: the whole frame at ``scale``, outside the ladder stats
+
+        Used while nobody is in view. A hit seeds the crop so the next full
+        rate frame can go straight to crop mode.
+        """
+        h, w = frame_bgr.shape[:2]
+        self._crop = None
+        face_landmarks = self._run(self.face_mesh, frame_bgr, min(scale, self.scale))
+        self.probes += 1
+        if self.mode == "crop":
+            self._update_crop(face_landmarks, w, h)
+        return face_landmarks
+
+    def _update_crop(self, face_landmarks, w, h):
+        """Keep the crop while the face stays inside its inner area, else re-centre"""
+        if face_landmarks is None:
+            self._crop = None
+            return
+
+        points = landmarks_to_array(face_landmarks, w, h)
+        fx0, fy0 = points.min(axis=0)
+        fx1, fy1 = points.max(axis=0)
+        size = max(fx1 - fx0, fy1 - fy0)
+
+        if self._crop is not None:
+            x0, y0, x1, y1 = self._crop
+            margin = size * self.padding * 0.5
+            crop_size = x1 - x0
+            inside = (fx0 - x0 >= margin and fy0 - y0 >= margin
+                      and x1 - fx1 >= margin and y1 - fy1 >= margin)
+            expected = size * (1 + 2 * self.padding)
+            if inside and 0.75 * expected <= crop_size <= 1.33 * expected:
+                return
+
+        # Square box around the face, padded on every side and clipped to the frame
+        half = size * (0.5 + self.padding)
+        cx, cy = (fx0 + fx1) / 2.0, (fy0 + fy1) / 2.0
+        x0, y0 = int(max(0, cx - half)), int(max(0, cy - half))
+        x1, y1 = int(min(w, cx + half)), int(min(h, cy + half))
+        self._crop = (x0, y0, x1, y1) if x1 - x0 >= 32 and y1 - y0 >= 32 else None
+
+    def _adapt(self, elapsed_ms):
+        """Step the resolution ladder based on sustained inference time"""
+        if elapsed_ms > self.budget_ms:
+            self._over += 1
+            self._under = 0
+        elif elapsed_ms < self.budget_ms * 0.5:
+            self._under += 1
+            self._over = 0
+        else:
+            self._over = self._under = 0
+
+        if self._over >= self.patience and self.level < len(self.ladder) - 1:
+            self.level += 1
+            self._over = 0
+        elif self._under >= self.patience * 4 and self.level > 0:
+            self.level -= 1
+            self._under = 0
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "scale": self.scale,
+            "avg_ms": round(self.avg_ms, 2),
+            "avg_cpu_ms": round(self.avg_cpu_ms, 2),
+            "crop_frames": self.crop_frames,
+            "fallbacks": self.fallbacks,
+            "probes": self.probes,
+            "frames": self.frames,
+        }
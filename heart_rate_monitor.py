@@ -4,50 +4,287 @@ from scipy.fft import fft
 from collections import deque
 import cv2
 
+# Face-oval landmarks bounding the rPPG region of interest
+FOREHEAD_INDICES = [10, 338, 297, 332, 284, 251, 389, 356, 454, 323,
+                    361, 288, 397, 365, 379, 378, 400, 377, 152, 148,
+                    176, 149, 150, 136, 172, 58, 132, 93, 234, 127]
+
+# Named ROI polygons (landmark indices in contour order)
+ROI_REGIONS = {
+    "face": FOREHEAD_INDICES,
+    "forehead": [10, 338, 297, 299, 296, 336, 9, 107, 66, 69, 67, 109],
+    "left_cheek": [117, 118, 101, 36, 205, 187, 123, 116],
+    "right_cheek": [346, 347, 330, 266, 425, 411, 352, 345],
+}
+
+
+class RoiExtractor:
+    """Mean colour of landmark polygons, computed only inside each polygon's bounding box
+
+    Each ROI keeps its own mask buffer that is reused across frames, and the
+    mask is only redrawn when the polygon has moved more than
+    ``move_tolerance`` pixels since it was last rasterized.
+    """
+
+    def __init__(self, roi_names=("face",), move_tolerance=1.0):
+        self.roi_names = tuple(roi_names)
+        self.indices = {name: np.array(ROI_REGIONS[name]) for name in self.roi_names}
+        self.move_tolerance = move_tolerance
+        self._cache = {name: None for name in self.roi_names}
+        self.mask_rebuilds = 0
+        self.mask_reuses = 0
+
+    def _get_mask(self, name, polygon, w, h):
+        """Return (x0, y0, mask, pixel_count) for an ROI, rebuilding only when it moved"""
+        cached = self._cache[name]
+        if cached is not None and cached["frame_size"] == (w, h):
+            if np.abs(polygon - cached["polygon"]).max() <= self.move_tolerance:
+                self.mask_reuses += 1
+                return cached["x0"], cached["y0"], cached["mask"], cached["count"]
+
+        x0, y0 = np.maximum(polygon.min(axis=0), 0).astype(int)
+        x1, y1 = polygon.max(axis=0).astype(int) + 1
+        x1, y1 = min(x1, w), min(y1, h)
+        if x1 <= x0 or y1 <= y0:
+            self._cache[name] = None
+            return None
+
+        # Reuse the previous buffer when the new bounding box fits inside it
+        bw, bh = x1 - x0, y1 - y0
+        buffer = cached["buffer"] if cached is not None else None
+        if buffer is None or buffer.shape[0] < bh or buffer.shape[1] < bw:
+            buffer = np.empty((bh + 16, bw + 16), dtype=np.uint8)
+        mask = buffer[:bh, :bw]
+        mask.fill(0)
+
+        local = (polygon - (x0, y0)).astype(np.int32)
+        cv2.fillPoly(mask, [local], 255)
+        count = cv2.countNonZero(mask)
+
+        self._cache[name] = {"polygon": polygon.copy(), "frame_size": (w, h),
+                             "x0": x0, "y0": y0, "mask": mask, "buffer": buffer,
+                             "count": count}
+        self.mask_rebuilds += 1
+        return x0, y0, mask, count
+
+    def extract(self, frame, points):
+        """Return ({roi_name: mean_bgr}, combined_mean_bgr) for the current frame
+
+        The combined mean is weighted by each ROI's pixel count. Returns
+        (empty dict, None) when no ROI is visible.
+        """
+        h, w = frame.shape[:2]
+        means = {}
+        total = np.zeros(3)
+        total_count = 0
+
+        for name in self.roi_names:
+            polygon = points[self.indices[name]].astype(np.int32)
+            roi = self._get_mask(name, polygon, w, h)
+            if roi is None:
+                continue
+            x0, y0, mask, count = roi
+            if count == 0:
+                continue
+
+            bh, bw = mask.shape
+            crop = frame[y0:y0 + bh, x0:x0 + bw]
+            mean = cv2.mean(crop, mask=mask)[:3]
+            means[name] = mean
+            total += np.multiply(mean, count)
+            total_count += count
+
+        if total_count == 0:
+            return means, None
+        return means, tuple(total / total_count)
+
+
+class StreamingHeartRateEstimator:
+    """Constant-cost-per-sample rPPG estimator
+
+    Keeps the Butterworth band-pass state between samples (sosfilt with zi)
+    and a sliding DFT of the filtered signal restricted to the bins inside
+    the pass band, so every new sample costs O(bins) instead of a full
+    detrend/filter/FFT over the whole window. A Hamming window is applied
+    in the frequency domain, matching the batch path.
+    """
+
+    def __init__(self, fps=30, window_size=450, band=(0.8, 3.5),
+                 search_band=(1.0, 2.0), min_samples=None, publish_every=None):
+        self.fps = fps
+        self.window_size = window_size
+        self.min_samples = min_samples if min_samples is not None else fps * 10
+        self.publish_every = publish_every if publish_every is not None else fps
+        
+        # Filter is designed once; its state carries over between samples
+        self.sos = signal.butter(4, list(band), btype='band', fs=fps, output='sos')
+        self.zi = None
+        
+        # DFT bins covering the pass band plus one neighbour on each side,
+        # needed to apply the Hamming window as a 3-tap kernel across bins
+        all_freqs = np.arange(window_size) * fps / window_size
+        band_bins = np.where((all_freqs >= band[0]) & (all_freqs <= band[1]))[0]
+        self.bins = np.arange(max(band_bins[0] - 1, 0), band_bins[-1] + 2)
+        self.frequencies = self.bins[1:-1] * fps / window_size
+        self.search_mask = (self.frequencies >= search_band[0]) & \
+                           (self.frequencies <= search_band[1])
+        self.twiddle = np.exp(2j * np.pi * self.bins / window_size)
+        self.spectrum = np.zeros(len(self.bins), dtype=complex)
+        
+        # Ring buffer of filtered samples (needed to remove the oldest one)
+        self.window = np.zeros(window_size)
+        self.pos = 0
+        self.count = 0
+    
+    def reset(self):
+        self.zi = None
+        self.spectrum[:] = 0
+        self.window[:] = 0
+        self.pos = 0
+        self.count = 0
+    
+    def _resync(self):
+        """Recompute the tracked bins exactly to stop floating-point drift"""
+        ordered = np.roll(self.window, -self.pos)
+        self.spectrum = np.fft.rfft(ordered)[self.bins]
+    
+    def update(self, value):
+        """Add one raw green-channel sample; returns BPM when one is due, else None"""
+        x = float(value)
+        if self.zi is None:
+            self.zi = signal.sosfilt_zi(self.sos) * x
+        y, self.zi = signal.sosfilt(self.sos, [x], zi=self.zi)
+        y = y[0]
+        
+        # Sliding DFT: X_k <- (X_k - oldest + newest) * e^(j*2*pi*k/N)
+        oldest = self.window[self.pos]
+        self.window[self.pos] = y
+        self.pos = (self.pos + 1) % self.window_size
+        self.count += 1
+        self.spectrum += y - oldest
+        self.spectrum *= self.twiddle
+        
+        if self.count % self.window_size == 0:
+            self._resync()
+        
+        if self.count % self.publish_every == 0:
+            return self.estimate()
+        return None
+    
+    def estimate(self):
+        """Peak frequency in the search band as BPM, or None while warming up"""
+        if self.count < self.min_samples:
+            return None
+        
+        X = self.spectrum
+        windowed = 0.54 * X[1:-1] - 0.23 * (X[:-2] + X[2:])
+        magnitudes = np.abs(windowed[self.search_mask])
+        if len(magnitudes) == 0:
+            return None
+        
+        peak_freq = self.frequencies[self.search_mask][np.argmax(magnitudes)]
+        return peak_freq * 60
+
+
 class HeartRateMonitor:
-    def __init__(self, fps=30, buffer_seconds=15):
+    """rPPG heart rate from face ROI colour
+
+    ``mode="streaming"`` updates the estimate with every frame and
+    publishes it once per second; ``mode="batch"`` recomputes it from the
+    whole buffer each time calculate_heart_rate is called (reference path).
+    """
+
+    def __init__(self, fps=30, buffer_seconds=15, roi_names=("face",), mode="streaming"):
+        if mode not in ("streaming", "batch"):
+            raise ValueError(f"Unknown heart rate mode: {mode}")
+        
         self.fps = fps
+        self.mode = mode
         self.buffer_size = fps * buffer_seconds
         self.rgb_buffer = deque(maxlen=self.buffer_size)
         self.time_buffer = deque(maxlen=self.buffer_size)
         self.current_hr = 0
         self.hr_history = deque(maxlen=20)
         self.calibration_offset =10#Add offset to bring readings to normal range 
+        self.roi_extractor = RoiExtractor(roi_names)
+        self.roi_means = {}
         
-    def add_frame(self, frame, face_landmarks, w, h):
-        """Extract ROI and add to buffer"""
-        if face_landmarks is None:
+        # How often callers should poll calculate_heart_rate (seconds)
+        self.update_interval = 1 if mode == "streaming" else 5
+        self.streaming = None
+        if mode == "streaming":
+            self.streaming = StreamingHeartRateEstimator(fps=fps, window_size=self.buffer_size)
+    
+    def reset(self):
+        """Discard the signal (e.g. after a gap with no face) and start measuring again"""
+        self.rgb_buffer.clear()
+        self.time_buffer.clear()
+        self.hr_history.clear()
+        self.current_hr = 0
+        if self.streaming is not None:
+            self.streaming.reset()
+        
+    def add_frame(self, frame, face_landmarks, w, h, points=None, timestamp=None):
+        """Extract ROI and add to buffer
+
+        ``points`` is an optional (478, 2) pixel-space landmark array from
+        eye_tracking.landmarks_to_array; when given it is used instead of
+        converting face_landmarks again. ``timestamp`` defaults to now.
+        """
+        if face_landmarks is None and points is None:
             return
         
-        # Extract forehead region (best for rPPG)
-        forehead_indices = [10, 338, 297, 332, 284, 251, 389, 356, 454, 323, 
-                           361, 288, 397, 365, 379, 378, 400, 377, 152, 148, 
-                           176, 149, 150, 136, 172, 58, 132, 93, 234, 127]
+        if points is None:
+            points = np.array([[lm.x * w, lm.y * h] for lm in face_landmarks.landmark])
         
-        # Get forehead coordinates
-        forehead_points = []
-        for idx in forehead_indices:
-            x = int(face_landmarks.landmark[idx].x * w)
-            y = int(face_landmarks.landmark[idx].y * h)
-            forehead_points.append([x, y])
+        # Mean RGB inside the ROI polygons (forehead/cheeks/face oval)
+        self.roi_means, mean_rgb = self.roi_extractor.extract(frame, points)
+        if mean_rgb is None:
+            return
         
-        forehead_points = np.array(forehead_points)
+        self.add_sample(mean_rgb, timestamp)
+    
+    def add_sample(self, mean_rgb, timestamp=None):
+        """Append one ROI mean colour (B, G, R) to the signal"""
+        if timestamp is None:
+            timestamp = cv2.getTickCount() / cv2.getTickFrequency()
         
-        # Create mask for forehead region
-        mask = np.zeros((h, w), dtype=np.uint8)
-        cv2.fillConvexPoly(mask, forehead_points, 255)
+        self.rgb_buffer.append(mean_rgb)
+        self.time_buffer.append(timestamp)
         
-        # Extract mean RGB values from forehead
-        mean_rgb = cv2.mean(frame, mask=mask)[:3]
+        if self.streaming is not None:
+            # Green channel (best for rPPG)
+            bpm = self.streaming.update(mean_rgb[1])
+            if bpm is not None:
+                self._publish(bpm)
+    
+    def _publish(self, bpm):
+        """Apply calibration, range check and median smoothing to a raw estimate"""
+        # Convert to BPM with calibration
+        heart_rate = abs(bpm) + self.calibration_offset
         
-        self.rgb_buffer.append(mean_rgb)
-        self.time_buffer.append(cv2.getTickCount() / cv2.getTickFrequency())
+        # Validate range (60-120 is more realistic for resting/computer work)
+        if 55 <= heart_rate <= 120:
+            self.hr_history.append(heart_rate)
+            # Median filter for stability
+            self.current_hr = int(np.median(self.hr_history))
     
     def calculate_heart_rate(self):
         """Calculate heart rate using rPPG with improved calibration"""
-        if len(self.rgb_buffer) < self.fps * 10:  # Need at least 10 seconds
+        if self.streaming is not None:
+            # Estimates are published from add_sample as they become due
             return self.current_hr
         
+        bpm = self.batch_estimate()
+        if bpm is not None:
+            self._publish(bpm)
+        return self.current_hr
+    
+    def batch_estimate(self):
+        """Raw BPM from the whole buffer (detrend, filter, window, FFT), or None"""
+        if len(self.rgb_buffer) < self.fps * 10:  # Need at least 10 seconds
+            return None
+        
         # Extract green channel (best for rPPG)
         green_signal = np.array([rgb[1] for rgb in self.rgb_buffer])
         
@@ -68,21 +305,10 @@ class HeartRateMonitor:
         # Find peak in valid range (focus on 60-100 BPM range)
         valid_idx = np.where((frequencies >= 1.0) & (frequencies <= 2.0))[0]  # 60-120 BPM
         if len(valid_idx) == 0:
-            return self.current_hr
+            return None
         
         peak_idx = valid_idx[np.argmax(np.abs(fft_data[valid_idx]))]
-        peak_freq = frequencies[peak_idx]
-        
-        # Convert to BPM with calibration
-        heart_rate = abs(peak_freq * 60) + self.calibration_offset
-        
-        # Validate range (60-120 is more realistic for resting/computer work)
-        if 55 <= heart_rate <= 120:
-            self.hr_history.append(heart_rate)
-            # Median filter for stability
-            self.current_hr = int(np.median(self.hr_history))
-        
-        return self.current_hr
+        return frequencies[peak_idx] * 60
     
     def get_hr_variability(self):
         """Calculate HRV (simplified)"""
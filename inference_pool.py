@@ -0,0 +1,148 @@
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def _close_runner(runner):
+    """Release a session's FaceMesh graphs (full frame and, once used, the crop one)"""
+    runner.face_mesh.close()
+    if runner.crop_mesh is not None:
+        runner.crop_mesh.close()
+
+
+def _worker_main(index, tasks, results, mode):
+    """Inference worker: one FaceMesh (wrapped in AdaptiveFaceMesh) per assigned session"""
+    # Imported here so only the worker pays for MediaPipe's graph setup
+    from eye_tracking import create_face_mesh, landmarks_to_array
+    from face_roi import AdaptiveFaceMesh
+
+    runners = {}
+    buffers = {}
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        kind, session_id = task[0], task[1]
+
+        if kind == "close":
+            runner = runners.pop(session_id, None)
+            if runner is not None:
+                _close_runner(runner)
+            shm = buffers.pop(session_id, None)
+            if shm is not None:
+                shm.close()
+            continue
+
+        # ("frame", session_id, seq, shm_name, shape)
+        _, _, seq, shm_name, shape = task
+        try:
+            shm = buffers.get(session_id)
+            if shm is None or shm.name != shm_name:
+                if shm is not None:
+                    shm.close()
+                # Workers share the parent's resource tracker, so attaching
+                # here doesn't take over the block's lifetime (the session unlinks it)
+                shm = buffers[session_id] = shared_memory.SharedMemory(name=shm_name)
+            frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+
+            runner = runners.get(session_id)
+            if runner is None:
+                runner = runners[session_id] = AdaptiveFaceMesh(create_face_mesh(), mode=mode)
+
+            cpu_start = time.process_time()
+            face_landmarks = runner.process(frame)
+            cpu_ms = (time.process_time() - cpu_start) * 1000.0
+            frame = None   # Drop the view so the buffer can be closed later
+            points = (None if face_landmarks is None
+                      else landmarks_to_array(face_landmarks, 1.0, 1.0).astype(np.float32))
+            results.put((session_id, seq, points, cpu_ms, index))
+        except Exception as e:
+            print(f"Inference worker {index} failed on session {session_id}: {e}")
+            results.put((session_id, seq, None, 0.0, index))
+
+    for runner in runners.values():
+        _close_runner(runner)
+    for shm in buffers.values():
+        shm.close()
+
+
+class InferencePool:
+    """Worker processes that run landmark inference for many sessions
+
+    Each worker owns the FaceMesh graphs of the sessions assigned to it.
+    Assignment is sticky (MediaPipe tracks a face between calls, so a
+    session's frames must always reach the same graph) and goes to the
+    worker with the fewest sessions. Frames travel through per-session
+    shared memory; only small task tuples and (N, 2) float32 landmark
+    arrays (normalized coordinates) are pickled.
+
+    Results are (session_id, seq, points_or_None, cpu_ms, worker_index),
+    read with ``get_result``.
+    """
+
+    def __init__(self, workers=None, mode="crop"):
+        self.size = max(1, workers or os.cpu_count() or 1)
+        ctx = mp.get_context("spawn")
+        self._tasks = [ctx.Queue() for _ in range(self.size)]
+        self._results = ctx.Queue()
+        self._procs = [ctx.Process(target=_worker_main, name=f"inference-{i}",
+                                   args=(i, self._tasks[i], self._results, mode), daemon=True)
+                       for i in range(self.size)]
+        for proc in self._procs:
+            proc.start()
+
+        self._lock = threading.Lock()
+        self._assignment = {}
+        self._load = [0] * self.size
+        self._closed = False
+
+    def assign(self, session_id):
+        """Worker index serving ``session_id`` (assigning the least-loaded one if new)"""
+        with self._lock:
+            worker = self._assignment.get(session_id)
+            if worker is None:
+                worker = min(range(self.size), key=self._load.__getitem__)
+                self._assignment[session_id] = worker
+                self._load[worker] += 1
+            return worker
+
+    def release(self, session_id):
+        """Drop a session's graph and buffer in its worker"""
+        with self._lock:
+            worker = self._assignment.pop(session_id, None)
+            if worker is None:
+                return
+            self._load[worker] -= 1
+        self._tasks[worker].put(("close", session_id))
+
+    def submit(self, session_id, seq, shm_name, shape):
+        """Queue inference of the frame currently in ``shm_name`` (never blocks)"""
+        self._tasks[self.assign(session_id)].put(("frame", session_id, seq, shm_name, shape))
+
+    def get_result(self, timeout=None):
+        """Next finished frame, or None if nothing arrived within ``timeout``"""
+        try:
+            return self._results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def loads(self):
+        with self._lock:
+            return list(self._load)
+
+    def close(self, timeout=5.0):
+        if self._closed:
+            return
+        self._closed = True
+        for tasks in self._tasks:
+            tasks.put(None)
+        deadline = time.monotonic() + timeout
+        for proc in self._procs:
+            proc.join(max(0.0, deadline - time.monotonic()))
+            if proc.is_alive():
+                proc.terminate()
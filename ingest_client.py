@@ -0,0 +1,152 @@
+"""Thin-client side of the ingest protocol, plus a load generator
+
+IngestClient sends one session's landmark frames to ingest_server.py.
+Run as a script it simulates many desks at once: every session streams
+synthetic landmarks and a pulsing ROI colour at the given frame rate, and
+the server-reported processed/dropped counts show how many concurrent
+sessions one server core sustains.
+
+Usage: python ingest_client.py --sessions 50 [--fps 30] [--seconds 10]
+       python ingest_client.py --ramp          # double sessions until frames drop
+"""
+import argparse
+import asyncio
+import json
+
+import numpy as np
+
+from ingest_protocol import (MSG_HELLO, MSG_STATS, decode_json, encode_frame, encode_json,
+                             read_message)
+from eye_tracking import NUM_LANDMARKS
+
+
+class IngestClient:
+    """One session's connection; ``stats`` holds the server's latest STATS message"""
+
+    def __init__(self, session_id, user_id="default", fps=30):
+        self.session_id = session_id
+        self.user_id = user_id
+        self.fps = fps
+        self.stats = {"received": 0, "processed": 0, "dropped": 0, "queued": 0}
+        self._reader = None
+        self._writer = None
+        self._listener = None
+
+    async def connect(self, host="127.0.0.1", port=8765, path=None):
+        if path is not None:
+            self._reader, self._writer = await asyncio.open_unix_connection(path)
+        else:
+            self._reader, self._writer = await asyncio.open_connection(host, port)
+        self._writer.write(encode_json(MSG_HELLO, {"session_id": self.session_id,
+                                                   "user_id": self.user_id, "fps": self.fps}))
+        await self._writer.drain()
+        self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        while True:
+            payload = await read_message(self._reader)
+            if payload is None:
+                return
+            if payload[0] == MSG_STATS:
+                self.stats = decode_json(payload)
+
+    async def send_frame(self, timestamp, width, height, landmarks=None, roi_mean=None):
+        """Send one frame; waits only when the socket buffer is full (TCP backpressure)"""
+        self._writer.write(encode_frame(timestamp, width, height, landmarks, roi_mean))
+        await self._writer.drain()
+
+    async def close(self):
+        """Finish sending, wait for the server's final stats and disconnect"""
+        self._writer.write_eof()
+        try:
+            await asyncio.wait_for(self._listener, 10.0)
+        except asyncio.TimeoutError:
+            self._listener.cancel()
+        self._writer.close()
+
+
+async def _simulate(client, fps, seconds, seed):
+    """Stream jittered synthetic landmarks at ``fps``; returns frames skipped client-side"""
+    rng = np.random.default_rng(seed)
+    face = rng.uniform(0.35, 0.65, (NUM_LANDMARKS, 3)).astype(np.float32)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    skipped = 0
+    frame = 0
+    total = int(seconds * fps)
+    while frame < total:
+        due = start + frame / fps
+        now = loop.time()
+        if now < due:
+            await asyncio.sleep(due - now)
+        elif now - due > 1.0 / fps:
+            # Backpressure made us late: skip frames rather than send stale ones
+            late = int((now - due) * fps)
+            skipped += late
+            frame += late
+            continue
+        t = frame / fps
+        landmarks = face + rng.normal(0, 0.001, face.shape).astype(np.float32)
+        green = 120.0 + 2.0 * np.sin(2 * np.pi * 1.2 * t)   # 72 bpm pulse
+        await client.send_frame(t, 1280, 720, landmarks, (100.0, green, 150.0))
+        frame += 1
+    return skipped
+
+
+async def run_load(sessions, fps=30, seconds=10.0, host="127.0.0.1", port=8765, path=None):
+    """Run ``sessions`` simulated clients at once; returns the aggregate summary"""
+    clients = [IngestClient(f"load-{i}", user_id=None, fps=fps) for i in range(sessions)]
+    await asyncio.gather(*(c.connect(host, port, path) for c in clients))
+    skipped = await asyncio.gather(*(_simulate(c, fps, seconds, i)
+                                     for i, c in enumerate(clients)))
+    await asyncio.gather(*(c.close() for c in clients))
+
+    received = sum(c.stats["received"] for c in clients)
+    processed = sum(c.stats["processed"] for c in clients)
+    dropped = sum(c.stats["dropped"] for c in clients)
+    offered = sessions * int(seconds * fps)
+    return {
+        "sessions": sessions,
+        "offered": offered,
+        "skipped_by_clients": int(sum(skipped)),
+        "received": received,
+        "processed": processed,
+        "dropped_by_server": dropped,
+        "delivered_ratio": round(processed / offered, 3) if offered else 0.0,
+        "processed_per_second": round(processed / seconds, 1),
+    }
+
+
+async def _ramp(args):
+    sessions = 1
+    while True:
+        summary = await run_load(sessions, args.fps, args.seconds, args.host, args.port, args.unix)
+        print(json.dumps(summary))
+        if summary["delivered_ratio"] < 0.99:
+            print(f"Frames start dropping at {sessions} sessions x {args.fps:g} fps")
+            return
+        sessions *= 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for ingest_server.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="connect to this Unix socket instead")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--ramp", action="store_true",
+                        help="double the session count until the server drops frames")
+    args = parser.parse_args()
+
+    if args.ramp:
+        asyncio.run(_ramp(args))
+    else:
+        summary = asyncio.run(run_load(args.sessions, args.fps, args.seconds,
+                                       args.host, args.port, args.unix))
+        print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
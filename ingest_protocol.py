@@ -0,0 +1,88 @@
+"""Binary wire format between thin landmark clients and ingest_server.py
+
+Every message is a 4-byte little-endian payload length followed by the
+payload; the first payload byte is the message type.
+
+    HELLO  (client -> server)  type byte + UTF-8 JSON {"session_id", "user_id", "fps"}
+    FRAME  (client -> server)  FRAME_HEADER, then n x 3 float32 normalized
+                               landmarks (x, y, z) if FLAG_FACE, then 3 float32
+                               ROI means (B, G, R) if FLAG_ROI
+    STATS  (server -> client)  type byte + UTF-8 JSON {"received", "processed",
+                               "dropped", "queued"}
+
+A 478-landmark frame is 5.8 KB.
+"""
+import asyncio
+import json
+import struct
+
+import numpy as np
+
+MSG_HELLO = 1
+MSG_FRAME = 2
+MSG_STATS = 3
+
+FLAG_FACE = 1
+FLAG_ROI = 2
+
+# type, timestamp, image width, image height, flags, landmark count
+FRAME_HEADER = struct.Struct("<BdHHBH")
+_LENGTH = struct.Struct("<I")
+MAX_MESSAGE = 64 * 1024
+
+
+def _frame(payload):
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def encode_json(msg_type, data):
+    return _frame(bytes((msg_type,)) + json.dumps(data).encode("utf-8"))
+
+
+def decode_json(payload):
+    return json.loads(payload[1:].decode("utf-8"))
+
+
+def encode_frame(timestamp, width, height, landmarks=None, roi_mean=None):
+    """One FRAME message; ``landmarks`` is an (N, 3) normalized array or None"""
+    flags = 0
+    parts = []
+    n = 0
+    if landmarks is not None:
+        flags |= FLAG_FACE
+        landmarks = np.ascontiguousarray(landmarks, dtype="<f4")
+        n = len(landmarks)
+        parts.append(landmarks.tobytes())
+    if roi_mean is not None:
+        flags |= FLAG_ROI
+        parts.append(np.asarray(roi_mean, dtype="<f4").tobytes())
+    header = FRAME_HEADER.pack(MSG_FRAME, timestamp, width, height, flags, n)
+    return _frame(header + b"".join(parts))
+
+
+def decode_frame(payload):
+    """(timestamp, width, height, landmarks or None, roi_mean or None) from a FRAME payload
+
+    The arrays are read-only views into ``payload`` (no copy).
+    """
+    _, timestamp, width, height, flags, n = FRAME_HEADER.unpack_from(payload)
+    offset = FRAME_HEADER.size
+    landmarks = roi_mean = None
+    if flags & FLAG_FACE:
+        landmarks = np.frombuffer(payload, dtype="<f4", count=n * 3, offset=offset).reshape(n, 3)
+        offset += n * 12
+    if flags & FLAG_ROI:
+        roi_mean = np.frombuffer(payload, dtype="<f4", count=3, offset=offset)
+    return timestamp, width, height, landmarks, roi_mean
+
+
+async def read_message(reader):
+    """Next payload from a stream, or None at EOF; raises ValueError on oversized messages"""
+    try:
+        header = await reader.readexactly(_LENGTH.size)
+        (length,) = _LENGTH.unpack(header)
+        if length == 0 or length > MAX_MESSAGE:
+            raise ValueError(f"Bad message length: {length}")
+        return await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        return None
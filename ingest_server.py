@@ -0,0 +1,217 @@
+"""Headless asyncio server running the wellness analytics for remote landmark streams
+
+Thin clients run landmark extraction themselves and send compact binary
+frames (see ingest_protocol.py) over TCP or a Unix socket. Each client
+identifies a session in its HELLO; the server keeps one Session (all the
+per-user blink, drowsiness, stress and heart rate state) per session id,
+so a reconnecting client continues where it left off. Reminders go to the
+event store through logging_utils.log_event, like the desktop app's.
+
+Every connection has a bounded queue between its socket reader and its
+analytics task. When a client sends faster than its analytics keep up,
+the oldest queued frame is dropped; the client learns its received,
+processed and dropped counts from periodic STATS messages. Analytics
+tasks hand the loop back after every frame, so busy clients take turns.
+
+Usage: python ingest_server.py [--host 127.0.0.1] [--port 8765] [--unix PATH] [--queue 8]
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+
+from ingest_protocol import (MSG_FRAME, MSG_HELLO, MSG_STATS, decode_frame, decode_json,
+                             encode_json, read_message)
+from instrumentation import Instrumentation
+from logging_utils import close_event_store, log_event
+from session import Session
+
+
+def log_reminders(session, result):
+    """Session consumer: write reminder events through the app's logging path"""
+    for kind, detail in result["events"]:
+        if kind == "reminder":
+            log_event(detail, "remote", result["blinks_last_min"], result["stress"],
+                      result["hr"], result["drowsiness"])
+
+
+class _Connection:
+    """Per-client queue and counters"""
+
+    def __init__(self, session, writer, queue_size):
+        self.session = session
+        self.writer = writer
+        self.queue = deque()
+        self.queue_size = queue_size
+        self.wake = asyncio.Event()
+        self.closed = False
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+
+    def stats(self):
+        return {"received": self.received, "processed": self.processed,
+                "dropped": self.dropped, "queued": len(self.queue)}
+
+
+class IngestServer:
+    """Accepts landmark streams and runs per-session analytics on the event loop"""
+
+    def __init__(self, queue_size=8, stats_interval=1.0, log_events=True, instrumentation=None):
+        self.queue_size = queue_size
+        self.stats_interval = stats_interval
+        self.log_events = log_events
+        self.metrics = instrumentation if instrumentation is not None else Instrumentation()
+        self.sessions = {}
+        self.connections = set()
+        self._server = None
+
+        # Totals since start
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+
+    async def start(self, host="127.0.0.1", port=8765, path=None):
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path=path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for conn in list(self.connections):
+            conn.writer.close()
+
+    def _session(self, session_id, user_id, fps):
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = Session(session_id, user_id=user_id, fps=fps, instrumentation=self.metrics)
+            if self.log_events:
+                session.subscribe(log_reminders)
+            self.sessions[session_id] = session
+        return session
+
+    async def _handle(self, reader, writer):
+        peer = writer.get_extra_info("peername") or "unix"
+        try:
+            payload = await read_message(reader)
+            if payload is None or payload[0] != MSG_HELLO:
+                raise ValueError("expected HELLO")
+            hello = decode_json(payload)
+            session = self._session(str(hello["session_id"]), hello.get("user_id", "default"),
+                                    int(hello.get("fps", 30)))
+        except (ValueError, KeyError, json.JSONDecodeError) as e:
+            print(f"Ingest: rejected {peer}: {e}")
+            writer.close()
+            return
+
+        # Load/fit the stress model off the loop so other clients keep flowing
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, session.analyzer.stress_detector.warm_up)
+
+        conn = _Connection(session, writer, self.queue_size)
+        self.connections.add(conn)
+        worker = asyncio.create_task(self._analyze(conn))
+        try:
+            while True:
+                payload = await read_message(reader)
+                if payload is None:
+                    break
+                if payload[0] != MSG_FRAME:
+                    continue
+                conn.received += 1
+                self.received += 1
+                if len(conn.queue) >= conn.queue_size:
+                    # Client is behind: keep the newest frames
+                    conn.queue.popleft()
+                    conn.dropped += 1
+                    self.dropped += 1
+                    self.metrics.count("ingest_dropped")
+                conn.queue.append(payload)
+                conn.wake.set()
+        except (ValueError, ConnectionError) as e:
+            print(f"Ingest: {session.session_id} disconnected: {e}")
+        finally:
+            conn.closed = True
+            conn.wake.set()
+            await worker
+            self.connections.discard(conn)
+            writer.close()
+
+    async def _analyze(self, conn):
+        """Drain one client's queue, yielding to the loop after every frame"""
+        session = conn.session
+        metrics = self.metrics
+        next_stats = time.monotonic() + self.stats_interval
+        while True:
+            if not conn.queue:
+                if conn.closed:
+                    break
+                conn.wake.clear()
+                await conn.wake.wait()
+                continue
+
+            payload = conn.queue.popleft()
+            try:
+                timestamp, w, h, landmarks, roi_mean = decode_frame(payload)
+                with metrics.timer("ingest_frame"):
+                    session.process_landmarks(landmarks, w, h, timestamp,
+                                              None if roi_mean is None else roi_mean.tolist())
+            except Exception as e:
+                print(f"Ingest: {session.session_id} bad frame: {e}")
+            conn.processed += 1
+            self.processed += 1
+
+            now = time.monotonic()
+            if now >= next_stats:
+                next_stats = now + self.stats_interval
+                self._send_stats(conn)
+            await asyncio.sleep(0)
+        self._send_stats(conn)
+
+    def _send_stats(self, conn):
+        writer = conn.writer
+        # Never let a client that doesn't read its stats grow our buffers
+        if not writer.is_closing() and writer.transport.get_write_buffer_size() < 65536:
+            writer.write(encode_json(MSG_STATS, conn.stats()))
+
+    def stats(self):
+        return {"connections": len(self.connections), "sessions": len(self.sessions),
+                "received": self.received, "processed": self.processed, "dropped": self.dropped}
+
+
+async def _serve(args):
+    server = IngestServer(queue_size=args.queue)
+    await server.start(args.host, args.port, args.unix)
+    print(f"Ingest server listening on {args.unix or f'{args.host}:{args.port}'}")
+    last = server.stats()
+    while True:
+        await asyncio.sleep(args.report_every)
+        stats = server.stats()
+        rate = (stats["processed"] - last["processed"]) / args.report_every
+        print(json.dumps(dict(stats, frames_per_second=round(rate, 1))))
+        last = stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run wellness analytics for remote landmark clients")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="listen on this Unix socket path instead")
+    parser.add_argument("--queue", type=int, default=8, help="frames buffered per client")
+    parser.add_argument("--report-every", type=float, default=10.0)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close_event_store()
+
+
+if __name__ == "__main__":
+    main()
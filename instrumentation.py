@@ -0,0 +1,277 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+# Histogram bucket upper bounds in seconds (Prometheus "le" labels)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.010, 0.020, 0.033,
+                   0.050, 0.100, 0.250, 0.500, 1.0, 5.0)
+
+
+class RollingHistogram:
+    """Latency histogram over the last ``window_seconds``
+
+    Time is split into ``slices`` equal slices, each with its own bucket
+    counts; a slice is cleared when it is reused, so recording is O(log
+    buckets) and old samples age out without any per-sample bookkeeping.
+    Lifetime totals (count and sum) are kept for the Prometheus export.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS, window_seconds=60.0, slices=6):
+        self.buckets = buckets
+        self.slice_seconds = window_seconds / slices
+        self._counts = [[0] * (len(buckets) + 1) for _ in range(slices)]
+        self._sums = [0.0] * slices
+        self._epochs = [-1] * slices
+        self.total_count = 0
+        self.total_sum = 0.0
+        self.lifetime = [0] * (len(buckets) + 1)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        epoch = int(time.monotonic() / self.slice_seconds)
+        i = epoch % len(self._counts)
+        bucket = bisect_left(self.buckets, seconds)
+        with self._lock:
+            if self._epochs[i] != epoch:
+                self._counts[i] = [0] * (len(self.buckets) + 1)
+                self._sums[i] = 0.0
+                self._epochs[i] = epoch
+            self._counts[i][bucket] += 1
+            self._sums[i] += seconds
+            self.lifetime[bucket] += 1
+            self.total_count += 1
+            self.total_sum += seconds
+
+    def window_counts(self):
+        """Bucket counts summed over the slices still inside the window"""
+        oldest = int(time.monotonic() / self.slice_seconds) - len(self._counts) + 1
+        totals = [0] * (len(self.buckets) + 1)
+        with self._lock:
+            for counts, epoch in zip(self._counts, self._epochs):
+                if epoch >= oldest:
+                    for b, c in enumerate(counts):
+                        totals[b] += c
+        return totals
+
+    def percentile(self, q):
+        """Approximate q-th percentile (0-100) of the window, in seconds (bucket upper bound)"""
+        counts = self.window_counts()
+        n = sum(counts)
+        if n == 0:
+            return 0.0
+        target = n * q / 100.0
+        running = 0
+        for b, c in enumerate(counts):
+            running += c
+            if running >= target:
+                return self.buckets[b] if b < len(self.buckets) else float("inf")
+        return float("inf")
+
+
+class _NullTimer:
+    """Context manager that does nothing (used when instrumentation is disabled)"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _StageTimer:
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class Instrumentation:
+    """Per-stage latency histograms, FPS and frame counters for the hot path
+
+    When ``enabled`` is False every call returns immediately (timer()
+    hands back a shared no-op context manager), so the hooks can stay in
+    the hot path permanently.
+    """
+
+    def __init__(self, enabled=False, window_seconds=60.0, prefix="wellness"):
+        self.enabled = enabled
+        self.window_seconds = window_seconds
+        self.prefix = prefix
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self._frame_times = deque()
+        self._lock = threading.Lock()
+        self._exporter_thread = None
+        self._http_server = None
+        self._stop = threading.Event()
+
+    def timer(self, stage):
+        """``with metrics.timer("inference"): ...`` records the block's duration"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, stage)
+
+    def record(self, stage, seconds):
+        if not self.enabled:
+            return
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(
+                    stage, RollingHistogram(window_seconds=self.window_seconds))
+        histogram.record(seconds)
+
+    def count(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set_gauge(self, name, value):
+        if not self.enabled:
+            return
+        self.gauges[name] = value
+
+    def mark_frame(self):
+        """Call once per fully processed frame to track effective FPS"""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self.counters["frames"] = self.counters.get("frames", 0) + 1
+            self._frame_times.append(now)
+            while self._frame_times and now - self._frame_times[0] > 2.0:
+                self._frame_times.popleft()
+
+    def fps(self):
+        """Frames per second over the last two seconds"""
+        with self._lock:
+            if len(self._frame_times) < 2:
+                return 0.0
+            span = self._frame_times[-1] - self._frame_times[0]
+            return (len(self._frame_times) - 1) / span if span > 0 else 0.0
+
+    def summary(self):
+        """{stage: {"p50_ms", "p95_ms", "p99_ms", "count"}} over the rolling window"""
+        report = {}
+        for stage, h in list(self.histograms.items()):
+            report[stage] = {
+                "p50_ms": h.percentile(50) * 1000.0,
+                "p95_ms": h.percentile(95) * 1000.0,
+                "p99_ms": h.percentile(99) * 1000.0,
+                "count": sum(h.window_counts()),
+            }
+        return report
+
+    def prometheus_text(self):
+        """All metrics in the Prometheus text exposition format"""
+        p = self.prefix
+        lines = [f"# HELP {p}_stage_latency_seconds Per-stage processing latency",
+                 f"# TYPE {p}_stage_latency_seconds histogram"]
+        for stage, h in sorted(self.histograms.items()):
+            cumulative = 0
+            for bound, count in zip(h.buckets, h.lifetime):
+                cumulative += count
+                lines.append(f'{p}_stage_latency_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{p}_stage_latency_seconds_bucket{{stage="{stage}",le="+Inf"}} {h.total_count}')
+            lines.append(f'{p}_stage_latency_seconds_sum{{stage="{stage}"}} {h.total_sum:.6f}')
+            lines.append(f'{p}_stage_latency_seconds_count{{stage="{stage}"}} {h.total_count}')
+
+        lines.append(f"# TYPE {p}_fps gauge")
+        lines.append(f"{p}_fps {self.fps():.2f}")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"# TYPE {p}_{name}_total counter")
+            lines.append(f"{p}_{name}_total {value}")
+        for name, value in sorted(self.gauges.items()):
+            lines.append(f"# TYPE {p}_{name} gauge")
+            lines.append(f"{p}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus_file(self, path):
+        """Atomically replace ``path`` with the current metrics (node_exporter textfile style)"""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, path)
+
+    def start_exporter(self, path=None, port=None, interval=5.0):
+        """Publish metrics to a text file every ``interval`` seconds and/or over HTTP on localhost"""
+        if not self.enabled:
+            return
+        self._stop.clear()
+
+        if path:
+            def write_loop():
+                while not self._stop.wait(interval):
+                    try:
+                        self.write_prometheus_file(path)
+                    except OSError as e:
+                        print(f"Metrics file error: {e}")
+
+            self._exporter_thread = threading.Thread(target=write_loop, name="metrics-file",
+                                                     daemon=True)
+            self._exporter_thread.start()
+
+        if port:
+            metrics = self
+
+            class MetricsHandler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.rstrip("/") not in ("", "/metrics"):
+                        self.send_error(404)
+                        return
+                    body = metrics.prometheus_text().encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, *args):
+                    pass
+
+            try:
+                self._http_server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+            except OSError as e:
+                print(f"Metrics endpoint error: {e}")
+                return
+            threading.Thread(target=self._http_server.serve_forever, name="metrics-http",
+                             daemon=True).start()
+            print(f"Metrics available at http://127.0.0.1:{port}/metrics")
+
+    def stop_exporter(self):
+        self._stop.set()
+        if self._http_server is not None:
+            self._http_server.shutdown()
+            self._http_server.server_close()
+            self._http_server = None
+
+    def draw_overlay(self, frame, origin=(10, 200)):
+        """Draw FPS, no-face count and per-stage p50/p95 onto a BGR frame"""
+        if not self.enabled:
+            return
+        x, y = origin
+        cv2.putText(frame, f"FPS {self.fps():.1f}  no-face {self.counters.get('frames_no_face', 0)}",
+                    (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 0), 1)
+        for stage, s in sorted(self.summary().items()):
+            y += 16
+            cv2.putText(frame, f"{stage}: p50 {s['p50_ms']:.1f} / p95 {s['p95_ms']:.1f} ms",
+                        (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 0), 1)
@@ -0,0 +1,170 @@
+"""Live trend charts of the last few minutes of EAR, stress, heart rate and blink rate
+
+The analytics stage appends one sample per frame to a SignalBuffer (a
+fixed-size numpy ring buffer, so memory never grows). LiveDashboard draws
+it in a Tk window with matplotlib blitting: axes, ticks and labels are
+rendered once into a cached background, and every refresh only restores
+that background and redraws the four line artists. The x axis is "seconds
+ago", so it never has to move. A full redraw happens only when the window
+is resized or a value leaves its axis range.
+"""
+import threading
+import time
+import tkinter as tk
+
+import numpy as np
+
+# (name, title, y limits) of each chart, in buffer column order
+SIGNALS = (
+    ("ear", "Eye Aspect Ratio", (0.0, 0.45)),
+    ("stress", "Stress (0-100)", (0.0, 100.0)),
+    ("hr", "Heart Rate (BPM)", (50.0, 110.0)),
+    ("blink_rate", "Blinks / min", (0.0, 30.0)),
+)
+COLORS = ('#2196F3', '#FF9800', '#E91E63', '#4CAF50')
+
+
+class SignalBuffer:
+    """Ring buffer of (timestamp, signal...) rows, written by one thread and read by another
+
+    At most ``max_rate`` samples per second are kept (extra frames are
+    skipped), so ``seconds`` of history is a fixed number of rows. Missing
+    values are stored as NaN, which matplotlib draws as gaps.
+    """
+
+    def __init__(self, seconds=300.0, max_rate=5.0, signals=len(SIGNALS)):
+        self.seconds = seconds
+        self.min_interval = 1.0 / max_rate
+        self.capacity = int(seconds * max_rate) + 1
+        self._data = np.full((self.capacity, signals + 1), np.nan)
+        self._next = 0
+        self._size = 0
+        self._last = -np.inf
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    def append(self, timestamp, *values):
+        """Add one sample (None for missing values); returns False if it was decimated away"""
+        if timestamp - self._last < self.min_interval:
+            return False
+        row = [timestamp] + [np.nan if v is None else v for v in values]
+        with self._lock:
+            self._data[self._next] = row
+            self._next = (self._next + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+        self._last = timestamp
+        return True
+
+    def snapshot(self):
+        """Rows oldest first, as a copy"""
+        with self._lock:
+            if self._size < self.capacity:
+                return self._data[:self._size].copy()
+            return np.roll(self._data, -self._next, axis=0)
+
+    def clear(self):
+        with self._lock:
+            self._data[:] = np.nan
+            self._next = 0
+            self._size = 0
+        self._last = -np.inf
+
+
+class LiveDashboard:
+    """Toplevel window with four blitted line charts fed from a SignalBuffer"""
+
+    def __init__(self, master, buffer, refresh_hz=4.0, instrumentation=None):
+        # Loaded on first use, like the statistics window
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+        self.buffer = buffer
+        self.interval_ms = max(1, int(1000 / refresh_hz))
+        self.metrics = instrumentation
+        self.full_redraws = 0
+        self._background = None
+        self._job = None
+
+        self.window = tk.Toplevel(master)
+        self.window.title("📈 Live Trends")
+        self.window.geometry("800x600")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        # A bare Figure (not pyplot): no global figure manager, no extra GUI loop
+        self.figure = Figure(figsize=(8, 6))
+        self.axes = self.figure.subplots(len(SIGNALS), 1, sharex=True)
+        self.lines = []
+        for ax, (name, title, ylim), color in zip(self.axes, SIGNALS, COLORS):
+            line, = ax.plot([], [], color=color, linewidth=1.2, animated=True)
+            ax.set_title(title, fontsize=9, loc="left")
+            ax.set_xlim(-buffer.seconds, 0)
+            ax.set_ylim(ylim)
+            ax.grid(alpha=0.3)
+            self.lines.append(line)
+        self.axes[-1].set_xlabel("Seconds ago")
+        self.figure.tight_layout()
+
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self.window)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        # Every full draw (first show, resize, rescale) re-caches the static background
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+        self.canvas.draw()
+        self._schedule()
+
+    def _on_draw(self, _event):
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.full_redraws += 1
+        for ax, line in zip(self.axes, self.lines):
+            ax.draw_artist(line)
+
+    def _schedule(self):
+        self._job = self.window.after(self.interval_ms, self._refresh)
+
+    def _refresh(self):
+        start = time.perf_counter()
+        self.update()
+        if self.metrics is not None:
+            self.metrics.record("dashboard_draw", time.perf_counter() - start)
+        self._schedule()
+
+    def update(self, now=None):
+        """Redraw the lines from the buffer (blitted unless an axis had to rescale)"""
+        rows = self.buffer.snapshot()
+        if now is None:
+            now = rows[-1, 0] if len(rows) else 0.0
+        ago = rows[:, 0] - now
+
+        rescaled = False
+        for i, (ax, line) in enumerate(zip(self.axes, self.lines)):
+            values = rows[:, i + 1]
+            line.set_data(ago, values)
+            if np.isfinite(values).any():
+                low, high = ax.get_ylim()
+                vmin, vmax = np.nanmin(values), np.nanmax(values)
+                if vmin < low or vmax > high:
+                    # Rare: grow the range with some headroom and redraw everything once
+                    pad = 0.1 * (max(vmax, high) - min(vmin, low))
+                    ax.set_ylim(min(vmin, low) - pad, max(vmax, high) + pad)
+                    rescaled = True
+
+        if rescaled or self._background is None:
+            self.canvas.draw()   # _on_draw re-caches the background and draws the lines
+            return
+        self.canvas.restore_region(self._background)
+        for ax, line in zip(self.axes, self.lines):
+            ax.draw_artist(line)
+        self.canvas.blit(self.figure.bbox)
+
+    def close(self):
+        if self._job is not None:
+            self.window.after_cancel(self._job)
+            self._job = None
+        self.window.destroy()
+
+    def alive(self):
+        try:
+            return bool(self.window.winfo_exists())
+        except Exception:
+            return False
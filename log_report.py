@@ -0,0 +1,429 @@
+"""Headless reminder-log report: per day, station and trigger, in bounded memory
+
+Reads any mix of legacy reminder CSVs (including rotated segments such as
+``reminder_log.csv.1`` or ``.csv.gz``) and event store databases
+(``wellness_events.db``). Directories are searched for both. Rows are
+streamed in chunks of ``--chunk-size``; each chunk is folded into per-group
+counters and fixed-bin histograms, so memory depends on the number of
+(day, station, trigger) groups, never on the number of rows.
+
+For every group the report has the event count, acknowledgements and ack
+rate, plus the mean and percentiles of stress, heart rate and drowsiness.
+Percentiles come from the histograms: stress and drowsiness to within 1
+point, heart rate to within 2 BPM. A heart rate of 0 means "not measured"
+and is left out.
+
+The station is the CSV's ``station`` column when present, else ``--station``,
+else the name of the directory holding the file (e.g. logs/desk-12/...).
+With ``--workers N`` files are aggregated in N processes and merged.
+
+Usage:
+    python log_report.py logs/ --csv report.csv --json report.json --png report.png
+    python log_report.py a.csv a.csv.1.gz b/wellness_events.db --by day,station --workers 4
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+KEY_FIELDS = ("day", "station", "trigger")
+# (name, log column, histogram low, high, bin width)
+METRICS = (
+    ("stress", "stress_level", 0.0, 100.0, 1.0),
+    ("hr", "heart_rate", 30.0, 220.0, 2.0),
+    ("drowsiness", "drowsiness_score", 0.0, 100.0, 1.0),
+)
+PERCENTILES = (50, 90, 95, 99)
+CHUNK_SIZE = 50000
+
+_CSV_NAME = re.compile(r"\.csv(\.\d+)?(\.gz)?$", re.IGNORECASE)
+_DB_NAME = re.compile(r"\.(db|sqlite3?)$", re.IGNORECASE)
+
+
+def _bins(low, high, width):
+    return int(np.ceil((high - low) / width)) + 1
+
+
+def _num(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def find_log_files(paths):
+    """Expand directories into the CSV segments and databases below them"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, names in os.walk(path):
+                for name in sorted(names):
+                    if _CSV_NAME.search(name) or _DB_NAME.search(name):
+                        files.append(os.path.join(directory, name))
+        else:
+            files.append(path)
+    return files
+
+
+def station_for(path, override=None):
+    if override:
+        return override
+    return os.path.basename(os.path.dirname(os.path.abspath(path))) or "default"
+
+
+def _chunk(day, station, trigger, ack, values):
+    return {"day": np.array(day, dtype=object), "station": np.array(station, dtype=object),
+            "trigger": np.array(trigger, dtype=object),
+            "acked": np.array(ack, dtype=bool),
+            "values": np.array(values, dtype=np.float64).reshape(-1, len(METRICS))}
+
+
+def iter_csv_chunks(path, station, chunk_size=CHUNK_SIZE):
+    """Chunks of a (possibly gzipped) reminder CSV; rows without a timestamp are skipped"""
+    opener = gzip.open if path.lower().endswith(".gz") else open
+    with opener(path, "rt", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        col = {name.strip(): i for i, name in enumerate(header)}
+        if "timestamp" not in col:
+            print(f"Skipping {path}: no timestamp column")
+            return
+        ts_i, st_i = col["timestamp"], col.get("station")
+        tr_i, ack_i = col.get("trigger"), col.get("ack")
+        metric_i = [col.get(column) for _, column, _, _, _ in METRICS]
+
+        def field(row, i):
+            return row[i] if i is not None and i < len(row) else ""
+
+        day, stations, trigger, ack, values = [], [], [], [], []
+        for row in reader:
+            ts = field(row, ts_i)
+            if len(ts) < 10 or ts[4] != "-":
+                continue
+            day.append(ts[:10])
+            stations.append(field(row, st_i) or station)
+            trigger.append(field(row, tr_i))
+            ack.append(field(row, ack_i) == "ack")
+            values.extend(_num(field(row, i)) for i in metric_i)
+            if len(day) >= chunk_size:
+                yield _chunk(day, stations, trigger, ack, values)
+                day, stations, trigger, ack, values = [], [], [], [], []
+        if day:
+            yield _chunk(day, stations, trigger, ack, values)
+
+
+def iter_db_chunks(path, station, chunk_size=CHUNK_SIZE):
+    """Chunks of an event store database, read-only (safe while the app is writing)"""
+    conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+    try:
+        cursor = conn.execute(
+            "SELECT date(ts, 'unixepoch', 'localtime'), trigger, ack, stress_level, "
+            "heart_rate, drowsiness_score FROM events")
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            values = [np.nan if v is None else v for r in rows for v in r[3:]]
+            yield _chunk([r[0] for r in rows], [station] * len(rows), [r[1] for r in rows],
+                         [r[2] == "ack" for r in rows], values)
+    finally:
+        conn.close()
+
+
+def _grow(array, size):
+    grown = np.zeros((size, array.shape[1]), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class ReportAggregate:
+    """Per-group counters and metric histograms; groups merge by addition
+
+    ``totals`` holds one row per group: count, acknowledged, then the
+    number of values and their sum for each metric. ``hists`` holds one
+    (groups x bins) array per metric. ``rows_read`` counts every row read,
+    ``rows_matched`` only those inside the --since/--until range.
+    """
+
+    def __init__(self, fields=KEY_FIELDS):
+        self.fields = tuple(fields)
+        self.index = {}
+        self.keys = []
+        self.totals = np.zeros((0, 2 + 2 * len(METRICS)))
+        self.hists = [np.zeros((0, _bins(lo, hi, w)), dtype=np.int32)
+                      for _, _, lo, hi, w in METRICS]
+        self.rows_read = 0
+        self.rows_matched = 0
+        self.files = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _rows_for(self, keys):
+        """Group rows for ``keys``, adding new groups (capacity grows by doubling)"""
+        rows = np.empty(len(keys), dtype=np.intp)
+        for i, key in enumerate(keys):
+            row = self.index.get(key)
+            if row is None:
+                row = self.index[key] = len(self.keys)
+                self.keys.append(key)
+            rows[i] = row
+        if len(self.keys) > len(self.totals):
+            size = max(len(self.keys), 2 * len(self.totals), 64)
+            self.totals = _grow(self.totals, size)
+            self.hists = [_grow(h, size) for h in self.hists]
+        return rows
+
+    def add_chunk(self, chunk, since=None, until=None):
+        """Fold one chunk in (vectorized per chunk; Python work only per distinct group)"""
+        self.rows_read += len(chunk["day"])
+        mask = np.ones(len(chunk["day"]), dtype=bool)
+        if since:
+            mask &= chunk["day"] >= since
+        if until:
+            mask &= chunk["day"] <= until
+        if not mask.all():
+            chunk = {k: v[mask] for k, v in chunk.items()}
+        n = len(chunk["day"])
+        self.rows_matched += n
+        if n == 0:
+            return
+
+        # Integer code per row from each key column, then the distinct groups in this chunk
+        code = np.zeros(n, dtype=np.int64)
+        uniques = []
+        for field in self.fields:
+            values, inverse = np.unique(chunk[field], return_inverse=True)
+            code = code * len(values) + inverse
+            uniques.append(values)
+        codes, local = np.unique(code, return_inverse=True)
+        keys = []
+        for c in codes:
+            key = []
+            for values in reversed(uniques):
+                c, i = divmod(int(c), len(values))
+                key.append(values[i])
+            keys.append(tuple(reversed(key)))
+        rows = self._rows_for(keys)
+        groups = len(keys)
+
+        totals = np.zeros((groups, self.totals.shape[1]))
+        totals[:, 0] = np.bincount(local, minlength=groups)
+        totals[:, 1] = np.bincount(local, weights=chunk["acked"], minlength=groups)
+        for m, (name, _, lo, hi, width) in enumerate(METRICS):
+            v = chunk["values"][:, m]
+            valid = np.isfinite(v)
+            if name == "hr":
+                valid &= v > 0   # 0 = no reading
+            g, v = local[valid], v[valid]
+            totals[:, 2 + 2 * m] = np.bincount(g, minlength=groups)
+            totals[:, 3 + 2 * m] = np.bincount(g, weights=v, minlength=groups)
+            nb = self.hists[m].shape[1]
+            b = np.clip(((v - lo) / width).astype(np.int64), 0, nb - 1)
+            self.hists[m][rows] += np.bincount(g * nb + b, minlength=groups * nb).reshape(groups, nb)
+        self.totals[rows] += totals
+
+    def merge(self, other):
+        """Add another aggregate's groups (e.g. one file from a worker process)"""
+        self.rows_read += other.rows_read
+        self.rows_matched += other.rows_matched
+        self.files.extend(other.files)
+        if not len(other):
+            return
+        rows = self._rows_for(other.keys)
+        n = len(other.keys)
+        self.totals[rows] += other.totals[:n]
+        for mine, theirs in zip(self.hists, other.hists):
+            mine[rows] += theirs[:n]
+
+    def rollup(self, fields):
+        """Aggregate keyed by a subset of the fields (e.g. ("day",) across stations)"""
+        positions = [self.fields.index(f) for f in fields]
+        result = ReportAggregate(fields)
+        n = len(self.keys)
+        # Groups that project onto the same key land in the same result row
+        rows = result._rows_for([tuple(key[p] for p in positions) for key in self.keys])
+        np.add.at(result.totals, rows, self.totals[:n])
+        for mine, theirs in zip(result.hists, self.hists):
+            np.add.at(mine, rows, theirs[:n])
+        result.rows_read, result.rows_matched = self.rows_read, self.rows_matched
+        result.files = list(self.files)
+        return result
+
+    def percentile(self, row, m, q):
+        hist = self.hists[m][row]
+        total = hist.sum()
+        if total == 0:
+            return None
+        _, _, lo, hi, width = METRICS[m]
+        cumulative = np.cumsum(hist)
+        target = q / 100.0 * total
+        b = int(np.searchsorted(cumulative, target))
+        before = cumulative[b - 1] if b else 0
+        # Interpolate inside the bin; the last bin would otherwise run past the scale
+        return min(max(lo + width * (b + (target - before) / hist[b]), lo), hi)
+
+    def rows(self):
+        """One dict per group, sorted by key"""
+        out = []
+        for row in sorted(range(len(self.keys)), key=lambda r: self.keys[r]):
+            t = self.totals[row]
+            record = dict(zip(self.fields, self.keys[row]))
+            record["count"] = int(t[0])
+            record["acknowledged"] = int(t[1])
+            record["ack_rate"] = round(t[1] / t[0] * 100, 2) if t[0] else 0.0
+            for m, (name, _, _, _, _) in enumerate(METRICS):
+                n, total = t[2 + 2 * m], t[3 + 2 * m]
+                record[f"{name}_mean"] = round(total / n, 2) if n else None
+                for q in PERCENTILES:
+                    p = self.percentile(row, m, q)
+                    record[f"{name}_p{q}"] = None if p is None else round(p, 1)
+            out.append(record)
+        return out
+
+
+def aggregate_file(path, station=None, chunk_size=CHUNK_SIZE, since=None, until=None):
+    """ReportAggregate of one log file or database (runs in a worker with --workers)"""
+    agg = ReportAggregate()
+    name = station_for(path, station)
+    reader = iter_db_chunks if _DB_NAME.search(path) else iter_csv_chunks
+    try:
+        for chunk in reader(path, name, chunk_size):
+            agg.add_chunk(chunk, since, until)
+    except (OSError, sqlite3.Error, csv.Error, UnicodeDecodeError, EOFError) as e:
+        print(f"Could not read {path}: {e}")
+    agg.files.append(path)
+    return agg
+
+
+def build_report(paths, workers=1, chunk_size=CHUNK_SIZE, since=None, until=None, station=None):
+    """Aggregate every file, in parallel across files when ``workers`` > 1"""
+    files = find_log_files(paths)
+    report = ReportAggregate()
+    if workers > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(aggregate_file, f, station, chunk_size, since, until)
+                       for f in files]
+            # Merge as they finish: at most one file's groups wait in memory per worker
+            for future in as_completed(futures):
+                report.merge(future.result())
+    else:
+        for f in files:
+            report.merge(aggregate_file(f, station, chunk_size, since, until))
+    return report
+
+
+def write_csv(rows, path):
+    if not rows:
+        open(path, "w").close()
+        return
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def write_json(report, rows, path):
+    with open(path, "w") as f:
+        json.dump({"files": report.files, "rows_read": report.rows_read,
+                   "rows_matched": report.rows_matched, "group_by": list(report.fields), "groups": rows}, f, indent=2)
+
+
+def _dates(rows):
+    """Day strings as dates, so the x axis gets date ticks instead of one label per day"""
+    return np.array([r["day"] for r in rows], dtype="datetime64[D]")
+
+
+def write_png(report, path):
+    """Events per day by station, ack rate and stress percentiles per day"""
+    # Loaded on first use; Agg renders without a display
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=(12, 9))
+    FigureCanvasAgg(fig)
+    axs = fig.subplots(3, 1, sharex=True)
+
+    if "station" in report.fields and "day" in report.fields:
+        by_station = report.rollup(("station", "day")).rows()
+        for name in sorted({r["station"] for r in by_station}):
+            points = [r for r in by_station if r["station"] == name]
+            axs[0].plot(_dates(points), [r["count"] for r in points],
+                        marker=".", label=name)
+        if len({r["station"] for r in by_station}) <= 12:
+            axs[0].legend(fontsize=7)
+    axs[0].set_title("Reminders per day")
+    axs[0].set_ylabel("Count")
+
+    if "day" in report.fields:
+        daily = report.rollup(("day",)).rows()
+        days = _dates(daily)
+        axs[1].plot(days, [r["ack_rate"] for r in daily], marker="o", color="#4CAF50")
+        axs[1].set_ylim([0, 105])
+        for q, style in ((50, "-"), (90, "--"), (99, ":")):
+            axs[2].plot(days, [np.nan if r[f"stress_p{q}"] is None else r[f"stress_p{q}"]
+                               for r in daily], style, color="#FF9800", label=f"p{q}")
+        axs[2].legend(fontsize=8)
+    axs[1].set_title("Acknowledgment Rate")
+    axs[1].set_ylabel("% Acknowledged")
+    axs[2].set_title("Stress Level")
+    axs[2].set_ylabel("Stress (0-100)")
+    fig.autofmt_xdate()
+    fig.tight_layout()
+    fig.savefig(path, dpi=100)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate reminder logs without the GUI")
+    parser.add_argument("paths", nargs="+", help="CSV logs (rotated/.gz ok), event DBs or directories")
+    parser.add_argument("--by", default="day,station,trigger",
+                        help="comma-separated grouping from day, station, trigger")
+    parser.add_argument("--since", help="first day to include (YYYY-MM-DD)")
+    parser.add_argument("--until", help="last day to include (YYYY-MM-DD)")
+    parser.add_argument("--station", help="station name for files without a station column")
+    parser.add_argument("--workers", type=int, default=1, help="processes to spread files over")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--csv", help="write the grouped rows to this CSV")
+    parser.add_argument("--json", help="write the grouped rows to this JSON file")
+    parser.add_argument("--png", help="write summary charts to this PNG")
+    args = parser.parse_args()
+
+    by = tuple(f.strip() for f in args.by.split(",") if f.strip())
+    unknown = set(by) - set(KEY_FIELDS)
+    if unknown or not by:
+        parser.error(f"--by takes fields from {', '.join(KEY_FIELDS)}")
+
+    start = time.perf_counter()
+    report = build_report(args.paths, args.workers, args.chunk_size, args.since, args.until,
+                          args.station)
+    elapsed = time.perf_counter() - start
+    grouped = report.rollup(by) if by != report.fields else report
+    rows = grouped.rows()
+
+    if args.csv:
+        write_csv(rows, args.csv)
+    if args.json:
+        write_json(grouped, rows, args.json)
+    if args.png:
+        write_png(report, args.png)
+    if not (args.csv or args.json) and rows:
+        # No file output asked for: print the table
+        writer = csv.DictWriter(sys.stdout, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"{report.rows_matched} of {report.rows_read} events from {len(report.files)} files "
+          f"in {len(rows)} groups ({elapsed:.2f} s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
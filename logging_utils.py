@@ -1,15 +1,40 @@
-import csv
-from datetime import datetime
-import os
+import threading
+
+from config import EVENT_DB, LOG_FILE
+from event_store import EventStore
+
+_store = None
+_store_closed = False
+_store_lock = threading.Lock()
+
+def get_event_store():
+    """Shared event store; opened (and the legacy CSV imported) on first use
+
+    Returns None once close_event_store() has been called: late events
+    during shutdown are dropped rather than reopening the database.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            if _store_closed:
+                return None
+            _store = EventStore(EVENT_DB)
+            _store.migrate_csv(LOG_FILE)
+        return _store
+
+def close_event_store():
+    """Flush pending events and stop the writer (for good)"""
+    global _store, _store_closed
+    with _store_lock:
+        _store_closed = True
+        if _store is not None:
+            _store.close()
+            _store = None
 
 def log_event(trigger, ack, blinks_last_min, stress_level=0, heart_rate=0, drowsiness_score=0):
-    """Log event with enhanced metrics"""
-    ts = datetime.now().isoformat(timespec='seconds')
-    file_exists = os.path.exists("reminder_log.csv")
-    
-    with open("reminder_log.csv", mode="a", newline="") as f:
-        writer = csv.writer(f)
-        if not file_exists:
-            # Write header once
-            writer.writerow(["timestamp", "trigger", "ack", "blinks_last_min", "stress_level", "heart_rate", "drowsiness_score"])
-        writer.writerow([ts, trigger, ack, blinks_last_min, stress_level, heart_rate, drowsiness_score])
+    """Log event with enhanced metrics (queued; written in batches by the store)"""
+    store = get_event_store()
+    if store is None:
+        print(f"Event store closed, dropping '{trigger}' event")
+        return
+    store.append(trigger, ack, blinks_last_min, stress_level, heart_rate, drowsiness_score)
@@ -1,20 +1,44 @@
+from startup_profile import mark   # first, so startup milestones are timed from here
+import sys
 import warnings
 warnings.filterwarnings("ignore", category=UserWarning, module='google.protobuf')
 
 import tkinter as tk
 from tkinter import messagebox
 from app import EnhancedWellnessApp
+from logging_utils import close_event_store
+
+mark("imports_done")
+
+def shutdown(root, app):
+    # Producers first, the event store last, so queued events are still written
+    app.cam_running = False
+    if app.pipeline is not None:
+        app.pipeline.stop()
+        app.pipeline.join(timeout=2.0)
+    app.alerts.stop()
+    app.audio.stop()
+    app.music_therapy.library.stop_watching()
+    if app.telemetry is not None:
+        app.telemetry.close()
+    root.destroy()
+    close_event_store()
 
 def on_close(root, app):
     if messagebox.askokcancel("Quit", "Stop monitoring and exit?"):
-        app.cam_running = False
-        root.destroy()
+        shutdown(root, app)
 
 def main():
+    # --profile-startup: start monitoring once warmed up and exit after the
+    # first processed frame (used by startup_profile.py)
+    profile = "--profile-startup" in sys.argv[1:]
     root = tk.Tk()
-    app = EnhancedWellnessApp(root)
+    app = EnhancedWellnessApp(root, profile_startup=profile)
     root.protocol("WM_DELETE_WINDOW", lambda: on_close(root, app))
+    root.after(0, lambda: mark("window_shown"))
     root.mainloop()
+    if profile:
+        shutdown(root, app)
 
 if __name__ == "__main__":
     main()
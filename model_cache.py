@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+import time
+
+import joblib
+import sklearn
+
+DEFAULT_CACHE_DIR = "model_cache"
+
+
+class ModelCache:
+    """On-disk store for fitted models, keyed by feature schema and model version
+
+    Each entry is a joblib file holding the model plus the metadata it was
+    built for. Entries whose schema, version or scikit-learn version do not
+    match are ignored (the caller retrains). Arrays are memory-mapped on
+    load where joblib can do so.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def key(self, name, schema, version):
+        """Stable key for a model name + feature schema + version"""
+        spec = json.dumps({"name": name, "schema": list(schema), "version": version,
+                           "sklearn": sklearn.__version__}, sort_keys=True)
+        return hashlib.sha1(spec.encode()).hexdigest()[:16]
+
+    def path(self, name, schema, version):
+        safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in name)
+        return os.path.join(self.cache_dir, f"{safe_name}-{self.key(name, schema, version)}.joblib")
+
+    def load(self, name, schema, version):
+        """Cached model for this name/schema/version, or None if missing or invalid"""
+        path = self.path(name, schema, version)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            entry = joblib.load(path, mmap_mode="r")
+        except Exception as e:
+            print(f"Ignoring unreadable model cache {path}: {e}")
+            return None
+
+        if (not isinstance(entry, dict)
+                or entry.get("schema") != list(schema)
+                or entry.get("version") != version
+                or entry.get("sklearn") != sklearn.__version__):
+            print(f"Ignoring stale model cache {path}")
+            return None
+        return entry["model"]
+
+    def save(self, model, name, schema, version, **metadata):
+        """Write a model atomically; returns its path"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.path(name, schema, version)
+        entry = {"model": model, "schema": list(schema), "version": version,
+                 "sklearn": sklearn.__version__, "created": time.time()}
+        entry.update(metadata)
+
+        tmp = f"{path}.tmp"
+        joblib.dump(entry, tmp)
+        os.replace(tmp, path)
+        return path
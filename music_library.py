@@ -0,0 +1,313 @@
+import json
+import os
+import random
+import struct
+import threading
+import wave
+
+import numpy as np
+
+try:
+    import mutagen
+    MUTAGEN_AVAILABLE = True
+except Exception:
+    MUTAGEN_AVAILABLE = False
+
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.ogg')
+CATEGORIES = ("Low", "Medium", "High")
+INDEX_VERSION = 1
+TARGET_LOUDNESS_DB = -20.0   # RMS dBFS every track is normalized towards
+
+# Filename / folder keywords per category (first match wins; default Medium)
+CATEGORY_KEYWORDS = (
+    ("Low", ('calm', 'relax', 'ambient', 'low')),
+    ("Medium", ('medium', 'peace', 'nature')),
+    ("High", ('high', 'meditation', 'deep', 'binaural')),
+)
+
+# MPEG audio Layer III tables
+_MP3_BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def categorize(relpath):
+    """Stress category from keywords in the file or folder names"""
+    name = relpath.lower()
+    for category, words in CATEGORY_KEYWORDS:
+        if any(word in name for word in words):
+            return category
+    return "Medium"
+
+
+def _probe_wav(path):
+    with wave.open(path, "rb") as w:
+        rate, frames, width = w.getframerate(), w.getnframes(), w.getsampwidth()
+        # Loudness from up to the first 60 s of samples
+        raw = w.readframes(min(frames, rate * 60))
+    dtype = {1: np.uint8, 2: np.int16, 4: np.int32}.get(width)
+    loudness = None
+    if dtype is not None and raw:
+        samples = np.frombuffer(raw, dtype=dtype).astype(np.float64)
+        if width == 1:
+            samples -= 128.0
+        full_scale = float(2 ** (8 * width - 1))
+        rms = np.sqrt(np.mean(np.square(samples / full_scale)))
+        loudness = 20.0 * np.log10(max(rms, 1e-9))
+    return {"duration": frames / rate if rate else None, "sample_rate": rate,
+            "loudness_db": loudness}
+
+
+def _probe_mp3(path):
+    """Sample rate and duration from the first MPEG frame (Xing/Info count or CBR size)"""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        head = f.read(65536)
+    offset = 0
+    if head[:3] == b"ID3" and len(head) >= 10:
+        tag_size = ((head[6] & 0x7f) << 21) | ((head[7] & 0x7f) << 14) | \
+                   ((head[8] & 0x7f) << 7) | (head[9] & 0x7f)
+        offset = 10 + tag_size + (10 if head[5] & 0x10 else 0)
+        with open(path, "rb") as f:
+            f.seek(offset)
+            head = f.read(65536)
+        size -= offset
+
+    for i in range(len(head) - 4):
+        b1, b2, b3 = head[i + 1], head[i + 2], head[i + 3]
+        if head[i] != 0xFF or (b1 & 0xE0) != 0xE0:
+            continue
+        version, layer = (b1 >> 3) & 3, (b1 >> 1) & 3
+        bitrate_index, rate_index = b2 >> 4, (b2 >> 2) & 3
+        if layer != 1 or version == 1 or rate_index == 3 or bitrate_index in (0, 15):
+            continue   # not a valid Layer III header
+        rate = _MP3_RATES[version][rate_index]
+        bitrate = _MP3_BITRATES[1 if version == 3 else 2][bitrate_index] * 1000
+        samples_per_frame = 1152 if version == 3 else 576
+        mono = (b3 >> 6) == 3
+        side_info = (17 if mono else 32) if version == 3 else (9 if mono else 17)
+
+        xing = i + 4 + side_info
+        if head[xing:xing + 4] in (b"Xing", b"Info"):
+            (flags,) = struct.unpack(">I", head[xing + 4:xing + 8])
+            if flags & 1:
+                (frames,) = struct.unpack(">I", head[xing + 8:xing + 12])
+                return {"duration": frames * samples_per_frame / rate, "sample_rate": rate}
+        return {"duration": (size - i) * 8.0 / bitrate, "sample_rate": rate}
+    return {}
+
+
+def _probe_ogg(path):
+    """Sample rate from the Vorbis/Opus header, duration from the last page's granule"""
+    with open(path, "rb") as f:
+        head = f.read(4096)
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 65536))
+        tail = f.read()
+    if head[:4] != b"OggS":
+        return {}
+    body = 27 + head[26]
+    if head[body:body + 7] == b"\x01vorbis":
+        (rate,) = struct.unpack("<I", head[body + 12:body + 16])
+    elif head[body:body + 8] == b"OpusHead":
+        rate = 48000   # Opus granules always count 48 kHz samples
+    else:
+        return {}
+    last = tail.rfind(b"OggS")
+    if last < 0 or last + 14 > len(tail):
+        return {"sample_rate": rate}
+    (granule,) = struct.unpack("<q", tail[last + 6:last + 14])
+    return {"duration": granule / rate if granule > 0 else None, "sample_rate": rate}
+
+
+def _replaygain_db(tags):
+    """Track ReplayGain (dB) from mutagen tags, if present"""
+    for key in ("replaygain_track_gain", "REPLAYGAIN_TRACK_GAIN", "TXXX:REPLAYGAIN_TRACK_GAIN",
+                "TXXX:replaygain_track_gain"):
+        value = tags.get(key) if tags is not None else None
+        if value is None:
+            continue
+        text = value[0] if isinstance(value, list) else getattr(value, "text", [value])[0]
+        try:
+            return float(str(text).lower().replace("db", "").strip())
+        except ValueError:
+            return None
+    return None
+
+
+def probe_track(path):
+    """{"format", "duration", "sample_rate", "loudness_db"} for one file (missing values None)"""
+    ext = os.path.splitext(path)[1].lower()
+    info = {"format": ext.lstrip("."), "duration": None, "sample_rate": None,
+            "loudness_db": None}
+    try:
+        if ext == ".wav":
+            info.update(_probe_wav(path))
+        elif ext == ".mp3":
+            info.update(_probe_mp3(path))
+        elif ext == ".ogg":
+            info.update(_probe_ogg(path))
+        if MUTAGEN_AVAILABLE and ext != ".wav":
+            tagged = mutagen.File(path)
+            if tagged is not None:
+                info["duration"] = getattr(tagged.info, "length", None) or info["duration"]
+                info["sample_rate"] = getattr(tagged.info, "sample_rate", None) or info["sample_rate"]
+                gain = _replaygain_db(tagged.tags)
+                if gain is not None:
+                    # ReplayGain targets ~-18 LUFS: loudness is roughly that minus the gain
+                    info["loudness_db"] = -18.0 - gain
+    except Exception as e:
+        print(f"Could not read metadata of {path}: {e}")
+    return info
+
+
+def normalized_volume(loudness_db):
+    """Playback volume (0.1-1.0) that brings a track towards TARGET_LOUDNESS_DB"""
+    if loudness_db is None:
+        return 1.0
+    return float(np.clip(10 ** ((TARGET_LOUDNESS_DB - loudness_db) / 20.0), 0.1, 1.0))
+
+
+class MusicLibrary:
+    """Persistent index of the therapy music folder
+
+    Each track is keyed by its path relative to the folder and stored with
+    its size and mtime, category, format, duration, sample rate, loudness
+    and normalized volume. ``load`` reads the JSON index (no filesystem
+    walk), so tracks can be picked immediately; ``rescan`` stats every file
+    and probes only new or changed ones, then swaps in the new index in one
+    assignment. ``pick`` is O(1) and never touches the filesystem.
+    """
+
+    def __init__(self, folder="assets/music", index_path="music_index.json"):
+        self.folder = folder
+        self.index_path = index_path
+        # (tracks, relpaths by category), replaced in one assignment so readers
+        # on other threads never see one without the other
+        self._index = ({}, {c: [] for c in CATEGORIES})
+        self._lock = threading.Lock()   # one rescan at a time
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def __len__(self):
+        return len(self._index[0])
+
+    @property
+    def tracks(self):
+        return self._index[0]
+
+    def __contains__(self, path):
+        """Whether a path returned by ``pick`` is still indexed (no filesystem access)"""
+        return os.path.relpath(path, self.folder).replace(os.sep, "/") in self._index[0]
+
+    def load(self):
+        """Read the saved index; returns the number of tracks"""
+        try:
+            with open(self.index_path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if data.get("version") != INDEX_VERSION or \
+                data.get("folder") != os.path.abspath(self.folder):
+            return 0
+        self._swap(data.get("tracks", {}))
+        return len(self.tracks)
+
+    def save(self):
+        data = {"version": INDEX_VERSION, "folder": os.path.abspath(self.folder),
+                "tracks": self.tracks}
+        tmp = f"{self.index_path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.index_path)
+
+    def _swap(self, tracks):
+        by_category = {c: [] for c in CATEGORIES}
+        for relpath, entry in tracks.items():
+            by_category.setdefault(entry["category"], []).append(relpath)
+        self._index = (tracks, by_category)
+
+    def _walk(self):
+        """(relpath, size, mtime_ns) of every audio file under the folder"""
+        stack = [self.folder]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.lower().endswith(AUDIO_EXTENSIONS):
+                    st = entry.stat()
+                    yield (os.path.relpath(entry.path, self.folder).replace(os.sep, "/"),
+                           st.st_size, st.st_mtime_ns)
+
+    def rescan(self):
+        """Bring the index up to date; returns (added_or_changed, removed)"""
+        if not os.path.exists(self.folder):
+            os.makedirs(self.folder)
+            print(f"Created {self.folder} - Please add music files!")
+
+        with self._lock:
+            old = self.tracks
+            tracks = {}
+            changed = 0
+            for relpath, size, mtime_ns in self._walk():
+                entry = old.get(relpath)
+                if entry is None or entry["size"] != size or entry["mtime_ns"] != mtime_ns:
+                    info = probe_track(os.path.join(self.folder, relpath))
+                    entry = dict(info, size=size, mtime_ns=mtime_ns, category=categorize(relpath),
+                                 volume=normalized_volume(info["loudness_db"]))
+                    changed += 1
+                tracks[relpath] = entry
+            removed = len(old.keys() - tracks.keys())
+
+            if changed or removed or not os.path.exists(self.index_path):
+                self._swap(tracks)
+                try:
+                    self.save()
+                except OSError as e:
+                    print(f"Could not save music index: {e}")
+            return changed, removed
+
+    def pick(self, category, exclude=None):
+        """Random track of a category as (path, entry), or None; ``exclude`` avoids a repeat"""
+        tracks, by_category = self._index
+        choices = by_category.get(category) or []
+        if not choices:
+            return None
+        relpath = random.choice(choices)
+        if exclude is not None and len(choices) > 1 and os.path.join(self.folder, relpath) == exclude:
+            relpath = random.choice(choices)   # one retry keeps it O(1)
+        entry = tracks.get(relpath)
+        if entry is None:
+            return None
+        return os.path.join(self.folder, relpath), entry
+
+    def count(self, category):
+        return len(self._index[1].get(category) or [])
+
+    def watch(self, interval=30.0):
+        """Rescan in the background every ``interval`` seconds"""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch_loop, args=(interval,),
+                                         name="music-library-watch", daemon=True)
+        self._watcher.start()
+
+    def _watch_loop(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                changed, removed = self.rescan()
+                if changed or removed:
+                    print(f"Music library updated: {changed} new/changed, {removed} removed")
+            except Exception as e:
+                print(f"Music library rescan failed: {e}")
+
+    def stop_watching(self):
+        self._stop.set()
@@ -1,48 +1,38 @@
-import pygame
 import os
-import random
+
+from audio_engine import AudioEngine
+from music_library import MusicLibrary
 
 class MusicTherapy:
-    def __init__(self, music_folder="assets/music"):
+    def __init__(self, music_folder="assets/music", autoload=True, audio=None,
+                 index_path="music_index.json", rescan_interval=None):
+        """``audio`` is the shared AudioEngine; without one, a private engine is started.
+        ``rescan_interval`` (seconds) keeps the library index fresh in the background"""
         self.music_folder = music_folder
+        self.audio = audio
+        if self.audio is None:
+            self.audio = AudioEngine()
+            self.audio.start()
+        self._next_track = {}  # stress level -> (path, entry) already prefetched for the next play
         self.current_stress_level = "Low"
         self.is_playing = False
         self.current_track = None
+        self.rescan_interval = rescan_interval
         
-        # Music categories
-        self.music_library = {
-            "Low": [],      # Ambient/background
-            "Medium": [],   # Calming music
-            "High": []      # Active relaxation
-        }
-        
-        self._load_music_library()
-        
-    def _load_music_library(self):
-        """Load available music files"""
-        if not os.path.exists(self.music_folder):
-            os.makedirs(self.music_folder)
-            print(f"Created {self.music_folder} - Please add music files!")
-            return
+        # Indexed by category with cached metadata; picking never touches the disk
+        self.library = MusicLibrary(music_folder, index_path)
         
-        # Scan for music files
-        for file in os.listdir(self.music_folder):
-            if file.endswith(('.mp3', '.wav', '.ogg')):
-                full_path = os.path.join(self.music_folder, file)
-                
-                # Categorize by filename keywords
-                file_lower = file.lower()
-                if any(word in file_lower for word in ['calm', 'relax', 'ambient', 'low']):
-                    self.music_library["Low"].append(full_path)
-                elif any(word in file_lower for word in ['medium', 'peace', 'nature']):
-                    self.music_library["Medium"].append(full_path)
-                elif any(word in file_lower for word in ['high', 'meditation', 'deep', 'binaural']):
-                    self.music_library["High"].append(full_path)
-                else:
-                    # Default to medium
-                    self.music_library["Medium"].append(full_path)
+        if autoload:
+            self.load_library()
         
-        print(f"Music library loaded: {sum(len(v) for v in self.music_library.values())} tracks")
+    def load_library(self):
+        """Load the saved index, then rescan only new or changed files"""
+        cached = self.library.load()
+        changed, removed = self.library.rescan()
+        print(f"Music library loaded: {len(self.library)} tracks "
+              f"({cached} cached, {changed} scanned, {removed} removed)")
+        if self.rescan_interval:
+            self.library.watch(self.rescan_interval)
     
     def update_stress_level(self, stress_score, stress_text):
         """Update music based on stress level"""
@@ -59,28 +49,39 @@ class MusicTherapy:
     
     def play_relaxation_music(self):
         """Play appropriate music for current stress level"""
-        if not self.music_library[self.current_stress_level]:
-            print(f"No music available for {self.current_stress_level} stress level")
+        level = self.current_stress_level
+        if not self.library.count(level):
+            print(f"No music available for {level} stress level")
             return
         
-        # Choose random track from appropriate category
-        track = random.choice(self.music_library[self.current_stress_level])
+        # Random track from the index (prefetched last time), unless it has since been removed
+        pick = self._next_track.pop(level, None)
+        if pick is None or pick[0] not in self.library:
+            pick = self.library.pick(level)
+        if pick is None:
+            # The background rescan emptied this category since the count check
+            return
+        track, entry = pick
         
         if self.current_track != track:
-            try:
-                pygame.mixer.music.load(track)
-                pygame.mixer.music.play(-1)  # Loop
-                pygame.mixer.music.set_volume(0.5)
-                self.is_playing = True
-                self.current_track = track
-                print(f"Playing: {os.path.basename(track)}")
-            except Exception as e:
-                print(f"Error playing music: {e}")
+            # Queued on the audio thread: loading never blocks the caller.
+            # Volume is scaled by the track's loudness so all tracks sound alike
+            self.audio.play_music(track, loops=-1, volume=0.5 * entry.get("volume", 1.0))
+            self.is_playing = True
+            self.current_track = track
+            print(f"Playing: {os.path.basename(track)}")
+        
+        # Read the next pick for this level into memory ahead of time
+        upcoming = self.library.pick(level, exclude=track)
+        if upcoming is None:
+            return
+        self._next_track[level] = upcoming
+        self.audio.prefetch(upcoming[0])
     
     def stop_music(self):
         """Stop music playback"""
         if self.is_playing:
-            pygame.mixer.music.stop()
+            self.audio.stop_music()
             self.is_playing = False
             self.current_track = None
 
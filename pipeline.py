@@ -0,0 +1,214 @@
+import threading
+import time
+from collections import deque
+
+
+class DropOldestQueue:
+    """Bounded queue that discards the oldest item instead of blocking the producer"""
+
+    def __init__(self, maxsize=2):
+        self._items = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        """Add item, evicting the oldest one if the queue is full (never blocks)"""
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Return the oldest item, or None if nothing arrived within timeout"""
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def clear(self):
+        with self._cond:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class SnapshotSlot:
+    """Latest-value handoff between one producer thread and one consumer
+
+    ``publish`` replaces a single (sequence, value) tuple reference, which is
+    atomic, so neither side takes a lock. Consumers compare the sequence to
+    skip values they already applied; intermediate values are coalesced.
+    """
+
+    def __init__(self, value=None):
+        self._latest = (0, value)
+
+    def publish(self, value):
+        self._latest = (self._latest[0] + 1, value)
+
+    def latest(self):
+        """(sequence, value) of the most recent publish"""
+        return self._latest
+
+
+class StageStats:
+    """Throughput and latency counters for one pipeline stage"""
+
+    def __init__(self, window_seconds=2.0):
+        self.window_seconds = window_seconds
+        self.processed = 0
+        self.total_busy = 0.0
+        self._completions = deque()
+        self._lock = threading.Lock()
+
+    def record(self, busy_seconds):
+        now = time.perf_counter()
+        with self._lock:
+            self.processed += 1
+            self.total_busy += busy_seconds
+            self._completions.append(now)
+            cutoff = now - self.window_seconds
+            while self._completions and self._completions[0] < cutoff:
+                self._completions.popleft()
+
+    def fps(self):
+        """Items completed per second over the recent window"""
+        now = time.perf_counter()
+        with self._lock:
+            cutoff = now - self.window_seconds
+            while self._completions and self._completions[0] < cutoff:
+                self._completions.popleft()
+            return len(self._completions) / self.window_seconds
+
+    def avg_ms(self):
+        if self.processed == 0:
+            return 0.0
+        return (self.total_busy / self.processed) * 1000.0
+
+
+class PipelineStage:
+    """Worker thread that pulls from an input queue, processes and pushes downstream
+
+    A stage without an input queue is a source: its function is called
+    repeatedly with no arguments. Returning None from the function drops
+    the item (nothing is pushed downstream).
+    """
+
+    def __init__(self, name, func, in_queue=None, out_queue=None, on_stop=None):
+        self.name = name
+        self.func = func
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+        self.on_stop = on_stop
+        self.stats = StageStats()
+        self.thread = None
+        self.error = None
+        self._pipeline = None
+
+    def _run(self):
+        metrics = self._pipeline.instrumentation
+        if metrics is not None and not metrics.enabled:
+            metrics = None
+        try:
+            while self._pipeline.running:
+                if self.in_queue is not None:
+                    item = self.in_queue.get(timeout=0.1)
+                    if item is None:
+                        continue
+                    start = time.perf_counter()
+                    result = self.func(item)
+                else:
+                    start = time.perf_counter()
+                    result = self.func()
+
+                busy = time.perf_counter() - start
+                self.stats.record(busy)
+                if metrics is not None:
+                    metrics.record(self.name, busy)
+
+                if result is not None and self.out_queue is not None:
+                    self.out_queue.put(result)
+        except Exception as e:
+            self.error = e
+            print(f"Pipeline stage '{self.name}' failed: {e}")
+            self._pipeline.stop()
+        finally:
+            if self.on_stop is not None:
+                try:
+                    self.on_stop()
+                except Exception as e:
+                    print(f"Pipeline stage '{self.name}' cleanup error: {e}")
+
+
+class Pipeline:
+    """Chain of stages connected by bounded drop-oldest queues"""
+
+    def __init__(self, queue_size=2, instrumentation=None):
+        self.queue_size = queue_size
+        self.instrumentation = instrumentation
+        self.stages = []
+        self.queues = []
+        self.running = False
+
+    def add_stage(self, name, func, on_stop=None):
+        """Append a stage; the first stage added is the source"""
+        in_queue = None
+        if self.stages:
+            in_queue = DropOldestQueue(self.queue_size)
+            self.stages[-1].out_queue = in_queue
+            self.queues.append(in_queue)
+
+        stage = PipelineStage(name, func, in_queue=in_queue, on_stop=on_stop)
+        stage._pipeline = self
+        self.stages.append(stage)
+        return stage
+
+    def start(self):
+        self.running = True
+        for stage in self.stages:
+            stage.thread = threading.Thread(target=stage._run,
+                                            name=f"pipeline-{stage.name}",
+                                            daemon=True)
+            stage.thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def join(self, timeout=None):
+        for stage in self.stages:
+            if stage.thread is not None and stage.thread is not threading.current_thread():
+                stage.thread.join(timeout)
+
+    def is_alive(self):
+        return any(s.thread is not None and s.thread.is_alive() for s in self.stages)
+
+    def stats(self):
+        """Per-stage throughput: {name: {"fps", "avg_ms", "processed", "dropped"}}"""
+        report = {}
+        for stage in self.stages:
+            dropped = stage.in_queue.dropped if stage.in_queue is not None else 0
+            report[stage.name] = {
+                "fps": stage.stats.fps(),
+                "avg_ms": stage.stats.avg_ms(),
+                "processed": stage.stats.processed,
+                "dropped": dropped,
+            }
+        return report
+
+    def dropped_total(self):
+        """Frames evicted from all inter-stage queues so far"""
+        return sum(q.dropped for q in self.queues)
+
+    def summary(self):
+        """One-line text summary of stage throughput"""
+        parts = []
+        for name, s in self.stats().items():
+            text = f"{name} {s['fps']:.0f}fps"
+            if s["dropped"]:
+                text += f" (-{s['dropped']})"
+            parts.append(text)
+        return " | ".join(parts)
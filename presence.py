@@ -0,0 +1,90 @@
+PRESENT = "present"
+ABSENT = "absent"
+
+
+class PresenceMonitor:
+    """Presence state machine for duty-cycling the camera pipeline
+
+    PRESENT: every frame is processed at full rate. After ``absent_after``
+    seconds without a face it switches to ABSENT, where only one probe
+    frame every 1 / ``probe_fps`` seconds is examined (at ``probe_scale``).
+    The first probe that finds a face switches straight back, so full rate
+    resumes within one probe interval.
+
+    ``tick`` accumulates wall and process CPU time per state; the CPU saved
+    is the present-state CPU rate minus the probe CPU rate, times the time
+    spent away.
+    """
+
+    def __init__(self, absent_after=5.0, probe_fps=2.0, probe_scale=0.5):
+        self.absent_after = absent_after
+        self.probe_interval = 1.0 / probe_fps
+        self.probe_scale = probe_scale
+        self.state = PRESENT
+        self.last_face_time = None
+        self.absent_since = None
+        self.next_probe = 0.0
+        self.transitions = 0
+
+        # Per-state wall/CPU seconds, for the savings estimate
+        self._wall = {PRESENT: 0.0, ABSENT: 0.0}
+        self._cpu = {PRESENT: 0.0, ABSENT: 0.0}
+        self._last_tick = None
+
+    @property
+    def probing(self):
+        return self.state == ABSENT
+
+    def update(self, face_found, timestamp):
+        """Feed one processed frame; returns the new state if it changed, else None"""
+        if face_found:
+            self.last_face_time = timestamp
+            if self.state == ABSENT:
+                self.state = PRESENT
+                self.absent_since = None
+                self.transitions += 1
+                return PRESENT
+            return None
+
+        if self.last_face_time is None:
+            self.last_face_time = timestamp
+        if self.state == PRESENT and timestamp - self.last_face_time >= self.absent_after:
+            self.state = ABSENT
+            self.absent_since = timestamp
+            self.next_probe = timestamp + self.probe_interval
+            self.transitions += 1
+            return ABSENT
+        return None
+
+    def probe_delay(self, timestamp):
+        """Seconds to wait before the next frame is worth grabbing (0 when present)"""
+        if self.state == PRESENT:
+            return 0.0
+        delay = self.next_probe - timestamp
+        if delay <= 0:
+            self.next_probe = timestamp + self.probe_interval
+            return 0.0
+        return delay
+
+    def tick(self, wall_time, cpu_time):
+        """Account the interval since the last tick to the current state"""
+        if self._last_tick is not None:
+            last_wall, last_cpu = self._last_tick
+            self._wall[self.state] += max(0.0, wall_time - last_wall)
+            self._cpu[self.state] += max(0.0, cpu_time - last_cpu)
+        self._last_tick = (wall_time, cpu_time)
+
+    def time_absent(self):
+        return self._wall[ABSENT]
+
+    def cpu_rate(self, state):
+        """Process CPU seconds per wall second while in ``state`` (None if unseen)"""
+        wall = self._wall[state]
+        return self._cpu[state] / wall if wall > 0 else None
+
+    def cpu_saved(self):
+        """Estimated CPU seconds saved by probing instead of running at full rate"""
+        present, absent = self.cpu_rate(PRESENT), self.cpu_rate(ABSENT)
+        if present is None or absent is None:
+            return 0.0
+        return max(0.0, present - absent) * self._wall[ABSENT]
@@ -2,10 +2,14 @@ import os
 import tkinter as tk
 from tkinter import ttk
 from datetime import datetime, timedelta
-import pygame
+
+from config import BEEP_FILE
 
 class ReminderPopup(tk.Toplevel):
-    def __init__(self, master, trigger_type, blinks_count, stress_level=0, heart_rate=0, sound_on=True):
+    def __init__(self, master, trigger_type, blinks_count, stress_level=0, heart_rate=0, sound_on=True,
+                 on_close=None, audio=None):
+        """``on_close(result)`` is called once with ack, snoozed or ignored;
+        ``audio`` is the AudioEngine used for the alert sound"""
         super().__init__(master)
         self.title("⚠ Health Alert")
         self.geometry("400x280")
@@ -14,6 +18,8 @@ class ReminderPopup(tk.Toplevel):
         
         self.acknowledged = False
         self.trigger_type = trigger_type
+        self.on_close = on_close
+        self.protocol("WM_DELETE_WINDOW", self.auto_close)
         
         # Alert icon and title based on trigger
         if "Drowsy" in trigger_type or "Sleep" in trigger_type:
@@ -88,31 +94,28 @@ class ReminderPopup(tk.Toplevel):
         # Auto-close timer
         self.after(20000, self.auto_close)
         
-        # Play sound
-        if sound_on:
-            try:
-                beep_file = "assets/beep.mp3"
-                if os.path.exists(beep_file) and not pygame.mixer.music.get_busy():
-                    pygame.mixer.music.load(beep_file)
-                    # Play multiple times for drowsiness
-                    if "Drowsy" in trigger_type:
-                        pygame.mixer.music.play(3)  # Play 3 times
-                    else:
-                        pygame.mixer.music.play()
-            except Exception as e:
-                print(f"Sound error: {e}")
+        # Play sound on a cue channel (ducks, never replaces, therapy music)
+        if sound_on and audio is not None and os.path.exists(BEEP_FILE):
+            # Play multiple times for drowsiness
+            audio.play_cue(BEEP_FILE, loops=2 if "Drowsy" in trigger_type else 0)
+    
+    def _close(self, result):
+        self.destroy()
+        callback, self.on_close = self.on_close, None
+        if callback is not None:
+            callback(result)
     
     def on_ack(self):
         self.acknowledged = True
-        self.destroy()
+        self._close("ack")
     
     def on_snooze(self):
         self.acknowledged = False
         self.master.snooze_until = datetime.now() + timedelta(minutes=2)
-        self.destroy()
+        self._close("snoozed")
     
     def auto_close(self):
         if self.winfo_exists():
             self.acknowledged = False
-            self.destroy()
+            self._close("ignored")
 
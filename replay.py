@@ -0,0 +1,173 @@
+"""Headless replay of recorded video through the wellness analytics
+
+Feeds a video file or a directory of frames through the same landmark,
+blink, drowsiness, stress and heart rate logic as the live app, as fast as
+the CPU allows. Frame timestamps come from the recording (not the wall
+clock), so runs are reproducible. Per-frame metrics and events go to a
+JSON-lines file, and a throughput summary is printed at the end.
+
+Usage: python replay.py INPUT [--output metrics.jsonl] [--fps 30] [--max-frames N]
+"""
+import argparse
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from eye_tracking import create_face_mesh
+from heart_rate_monitor import HeartRateMonitor
+from stress_detector import StressDetector
+from wellness_analyzer import WellnessAnalyzer
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+def iter_frames(source, fps):
+    """Yield (index, timestamp_seconds, bgr_frame) from a video file or frame directory"""
+    if os.path.isdir(source):
+        files = sorted(f for f in os.listdir(source) if f.lower().endswith(IMAGE_EXTENSIONS))
+        for index, name in enumerate(files):
+            frame = cv2.imread(os.path.join(source, name))
+            if frame is None:
+                print(f"Skipping unreadable frame: {name}")
+                continue
+            yield index, index / fps, frame
+        return
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video: {source}")
+
+    try:
+        index = 0
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            # Prefer the container timestamp; some backends report 0 throughout
+            pos_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
+            timestamp = pos_ms / 1000.0 if pos_ms > 0 or index == 0 else index / fps
+            yield index, timestamp, frame
+            index += 1
+    finally:
+        cap.release()
+
+
+def source_fps(source, default=30.0):
+    """Frame rate of a video file, or ``default`` for frame directories"""
+    if os.path.isdir(source):
+        return default
+    cap = cv2.VideoCapture(source)
+    fps = cap.get(cv2.CAP_PROP_FPS) if cap.isOpened() else 0
+    cap.release()
+    return fps if fps and fps > 0 else default
+
+
+def _stage_summary(samples):
+    if not samples:
+        return {"mean_ms": 0.0, "p95_ms": 0.0}
+    arr = np.array(samples) * 1000.0
+    return {"mean_ms": round(float(arr.mean()), 3),
+            "p95_ms": round(float(np.percentile(arr, 95)), 3)}
+
+
+def replay(source, output_path, fps=None, max_frames=None, hr_mode="streaming"):
+    """Run the analytics over a recording; returns the throughput summary dict"""
+    fps = fps or source_fps(source)
+
+    # Baseline stress model only (no per-user calibration) so replays are reproducible
+    analyzer = WellnessAnalyzer(fps=fps,
+                                stress_detector=StressDetector(user_id=None),
+                                hr_monitor=HeartRateMonitor(fps=int(round(fps)), mode=hr_mode))
+    face_mesh = create_face_mesh()
+
+    timings = {"decode": [], "inference": [], "analytics": []}
+    frames = 0
+    faces = 0
+    event_counts = {}
+    first_ts = last_ts = None
+
+    wall_start = time.perf_counter()
+    frame_iter = iter_frames(source, fps)
+    with open(output_path, "w") as out:
+        while max_frames is None or frames < max_frames:
+            t0 = time.perf_counter()
+            item = next(frame_iter, None)
+            if item is None:
+                break
+            index, timestamp, frame = item
+
+            t1 = time.perf_counter()
+            results = face_mesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            face_landmarks = results.multi_face_landmarks[0] if results.multi_face_landmarks else None
+
+            t2 = time.perf_counter()
+            result = analyzer.process(frame, face_landmarks, timestamp)
+            events = list(result["events"])
+            for trigger in analyzer.check_alerts(timestamp, result["blinks_last_min"]):
+                events.append(("reminder", trigger))
+            t3 = time.perf_counter()
+
+            timings["decode"].append(t1 - t0)
+            timings["inference"].append(t2 - t1)
+            timings["analytics"].append(t3 - t2)
+
+            frames += 1
+            faces += face_landmarks is not None
+            first_ts = timestamp if first_ts is None else first_ts
+            last_ts = timestamp
+            for kind, _ in events:
+                event_counts[kind] = event_counts.get(kind, 0) + 1
+
+            avg_ear = result["avg_ear"]
+            out.write(json.dumps({
+                "frame": index,
+                "t": round(timestamp, 4),
+                "face": face_landmarks is not None,
+                "ear": None if avg_ear is None else round(float(avg_ear), 4),
+                "blinks": analyzer.blink_count,
+                "blinks_last_min": result["blinks_last_min"],
+                "drowsiness": analyzer.drowsiness_score,
+                "perclos": round(result["perclos"], 2),
+                "stress": analyzer.current_stress,
+                "hr": analyzer.current_hr,
+                "events": [[kind, detail] for kind, detail in events],
+            }) + "\n")
+
+    face_mesh.close()
+    wall = time.perf_counter() - wall_start
+    media_seconds = (last_ts - first_ts) if frames > 1 else 0.0
+
+    return {
+        "source": source,
+        "frames": frames,
+        "frames_with_face": faces,
+        "media_seconds": round(media_seconds, 3),
+        "wall_seconds": round(wall, 3),
+        "frames_per_second": round(frames / wall, 2) if wall > 0 else 0.0,
+        "realtime_factor": round(media_seconds / wall, 2) if wall > 0 else 0.0,
+        "stages": {name: _stage_summary(samples) for name, samples in timings.items()},
+        "events": event_counts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recording through the wellness analytics")
+    parser.add_argument("input", help="video file or directory of frames")
+    parser.add_argument("--output", default="replay_metrics.jsonl",
+                        help="per-frame metrics/events (JSON lines)")
+    parser.add_argument("--fps", type=float, default=None,
+                        help="frame rate (default: from the video, 30 for frame directories)")
+    parser.add_argument("--max-frames", type=int, default=None)
+    parser.add_argument("--hr-mode", choices=("streaming", "batch"), default="streaming")
+    args = parser.parse_args()
+
+    summary = replay(args.input, args.output, fps=args.fps, max_frames=args.max_frames,
+                     hr_mode=args.hr_mode)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
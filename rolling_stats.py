@@ -0,0 +1,115 @@
+DEFAULT_WINDOWS = (10.0, 60.0, 300.0)   # seconds
+
+
+class RollingStats:
+    """Time-windowed count, sum and mean over several windows of one stream
+
+    Samples are stored once, in arrival order, for the longest window. Each
+    window keeps its own start index and running sums, so ``advance`` only
+    moves those indices past samples that fell out, and every query is O(1).
+    Updates are amortized O(1) per sample regardless of window length.
+
+    ``mean`` is sum(value) / sum(weight): with the default weight of 1 it is
+    the plain mean, and with weight = frame duration it is time-weighted
+    (e.g. value = duration if eyes closed else 0 gives PERCLOS).
+    """
+
+    def __init__(self, windows=DEFAULT_WINDOWS):
+        self.windows = tuple(sorted(float(w) for w in windows))
+        self._ts = []
+        self._values = []
+        self._weights = []
+        self._base = 0   # absolute index of self._ts[0]
+        self._start = {w: 0 for w in self.windows}
+        self._sum = {w: 0.0 for w in self.windows}
+        self._weight = {w: 0.0 for w in self.windows}
+
+    def add(self, timestamp, value=1.0, weight=1.0):
+        """Record a sample and expire anything now outside the windows"""
+        self._ts.append(timestamp)
+        self._values.append(value)
+        self._weights.append(weight)
+        for w in self.windows:
+            self._sum[w] += value
+            self._weight[w] += weight
+        self.advance(timestamp)
+
+    def advance(self, timestamp):
+        """Drop samples older than each window (relative to ``timestamp``)"""
+        ts = self._ts
+        base = self._base
+        end = base + len(ts)
+        for w in self.windows:
+            cutoff = timestamp - w
+            start = self._start[w]
+            while start < end and ts[start - base] < cutoff:
+                self._sum[w] -= self._values[start - base]
+                self._weight[w] -= self._weights[start - base]
+                start += 1
+            if start == end:
+                # Empty window: reset so floating-point drift can't accumulate
+                self._sum[w] = 0.0
+                self._weight[w] = 0.0
+            self._start[w] = start
+
+        # Samples before the longest window's start are no longer needed;
+        # trim in bulk once they are half the buffer (amortized O(1))
+        dead = self._start[self.windows[-1]] - base
+        if dead > 64 and dead * 2 > len(ts):
+            del self._ts[:dead]
+            del self._values[:dead]
+            del self._weights[:dead]
+            self._base += dead
+
+    def count(self, window):
+        return self._base + len(self._ts) - self._start[window]
+
+    def sum(self, window):
+        return self._sum[window]
+
+    def weight(self, window):
+        return self._weight[window]
+
+    def mean(self, window):
+        """sum(value) / sum(weight) over the window, or None if it is empty"""
+        weight = self._weight[window]
+        return self._sum[window] / weight if weight > 0 else None
+
+    def summary(self):
+        """{window: {"count", "sum", "mean"}} for every window"""
+        return {w: {"count": self.count(w), "sum": self._sum[w], "mean": self.mean(w)}
+                for w in self.windows}
+
+
+class PerclosTracker:
+    """Percent of time the eyes were closed (PERCLOS) over rolling windows
+
+    Each frame contributes its duration (time since the previous frame,
+    capped at ``max_gap`` so pauses in the video don't count) as closed or
+    open time.
+    """
+
+    def __init__(self, windows=DEFAULT_WINDOWS, max_gap=0.5):
+        self.stats = RollingStats(windows)
+        self.max_gap = max_gap
+        self._last_ts = None
+
+    def update(self, timestamp, eyes_closed):
+        if self._last_ts is not None:
+            dt = min(max(timestamp - self._last_ts, 0.0), self.max_gap)
+            if dt > 0:
+                self.stats.add(timestamp, dt if eyes_closed else 0.0, dt)
+        self._last_ts = timestamp
+
+    def reset_gap(self):
+        """Call when frames stop arriving (e.g. no face) so the gap isn't counted"""
+        self._last_ts = None
+
+    def advance(self, timestamp):
+        """Expire old samples on frames that didn't call ``update``"""
+        self.stats.advance(timestamp)
+
+    def perclos(self, window):
+        """Percent (0-100) of the window with eyes closed, or 0 with no data"""
+        fraction = self.stats.mean(window)
+        return 0.0 if fraction is None else fraction * 100.0
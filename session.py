@@ -0,0 +1,343 @@
+"""Monitoring sessions: per-user state for many cameras, inference in worker processes
+
+A Session holds everything that belongs to one person at one station
+(blink/drowsiness timers, stress model, heart rate signal). The
+SessionManager feeds frames from any number of sessions to an
+InferencePool and runs each session's analytics on a small pool of
+threads as its landmarks come back; consumers (the Tk app, a logger, a network sink) subscribe to the
+per-frame results.
+
+Usage: python session.py SOURCE [SOURCE ...] [--workers N] [--seconds S]
+       (SOURCE is a camera index or a video file)
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from config import FACE_INPUT_MODE
+from heart_rate_monitor import HeartRateMonitor
+from inference_pool import InferencePool
+from instrumentation import Instrumentation
+from stress_detector import StressDetector
+from wellness_analyzer import WellnessAnalyzer
+
+
+class Session:
+    """All per-user monitoring state for one camera / station
+
+    At most one frame per session is at a worker at a time; a frame offered
+    meanwhile waits as ``pending`` and replaces any older pending frame
+    (drop-oldest), so a slow worker never builds a backlog. The frame in
+    flight sits in this session's shared memory block, which is reused
+    until the frame size changes.
+    """
+
+    def __init__(self, session_id, user_id="default", fps=30, instrumentation=None,
+                 raise_reminders=True):
+        """``raise_reminders=False`` leaves reminders to the caller (e.g. the Tk app's snooze)"""
+        self.session_id = session_id
+        self.user_id = user_id
+        self.raise_reminders = raise_reminders
+        self.metrics = instrumentation if instrumentation is not None else Instrumentation()
+        self.analyzer = WellnessAnalyzer(
+            fps=fps,
+            stress_detector=StressDetector(user_id=user_id, instrumentation=self.metrics),
+            hr_monitor=HeartRateMonitor(fps=fps),
+            instrumentation=self.metrics)
+
+        self._lock = threading.Lock()
+        self._consumers = []
+        self._shm = None
+        self._seq = 0
+        self._inflight = None   # (seq, frame, timestamp)
+        self._pending = None    # (frame, timestamp)
+
+        # Stats
+        self.frames_offered = 0
+        self.frames_processed = 0
+        self.frames_dropped = 0
+        self.cpu_ms = 0.0
+        self.last_result = None
+
+    def subscribe(self, callback):
+        """Call ``callback(session, result)`` after every analyzed frame (result thread)"""
+        self._consumers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._consumers:
+            self._consumers.remove(callback)
+
+    def offer(self, frame, timestamp):
+        """Hand over a frame; returns the inference task to submit now, or None if queued"""
+        with self._lock:
+            self.frames_offered += 1
+            if self._inflight is not None:
+                if self._pending is not None:
+                    self.frames_dropped += 1
+                self._pending = (frame, timestamp)
+                return None
+            return self._stage(frame, timestamp)
+
+    def _stage(self, frame, timestamp):
+        """Copy a frame into shared memory and mark it in flight (caller holds the lock)"""
+        if self._shm is None or self._shm.size < frame.nbytes:
+            self._release_buffer()
+            self._shm = shared_memory.SharedMemory(create=True, size=frame.nbytes)
+        np.ndarray(frame.shape, dtype=np.uint8, buffer=self._shm.buf)[...] = frame
+        self._seq += 1
+        self._inflight = (self._seq, frame, timestamp)
+        return self._seq, self._shm.name, frame.shape
+
+    def complete(self, seq, points, cpu_ms):
+        """Run analytics for a finished frame; returns the next task to submit, or None"""
+        with self._lock:
+            inflight = self._inflight
+            if inflight is None or inflight[0] != seq:
+                return None
+            pending, self._pending = self._pending, None
+            self._inflight = None
+            task = self._stage(*pending) if pending is not None else None
+
+        _, frame, timestamp = inflight
+        self.cpu_ms += cpu_ms
+        try:
+            self._publish(self.analyzer.process(frame, points, timestamp), timestamp,
+                          points is not None)
+        except Exception as e:
+            # The next frame is already staged; losing this one must not stall the session
+            print(f"Session {self.session_id} analytics failed: {e}")
+        return task
+
+    def process_frame(self, frame, face_landmarks, timestamp):
+        """Analyze a frame whose landmarks were found in this process; returns the result dict"""
+        return self._publish(self.analyzer.process(frame, face_landmarks, timestamp), timestamp,
+                             face_landmarks is not None)
+
+    def process_landmarks(self, points, w, h, timestamp, roi_mean=None):
+        """Analyze landmarks computed elsewhere (e.g. by a remote thin client)
+
+        ``points`` are normalized (N, 2) or (N, 3) coordinates of a ``w`` x ``h``
+        image, or None when no face was found; returns the result dict.
+        """
+        if points is not None:
+            points = points[:, :2] * (w, h)
+        return self._publish(self.analyzer.process_points(points, timestamp, roi_mean),
+                             timestamp, points is not None)
+
+    def _publish(self, result, timestamp, face):
+        """Add reminders and session fields to an analyzer result and notify consumers"""
+        a = self.analyzer
+        events = list(result["events"])
+        if self.raise_reminders:
+            for trigger in a.check_alerts(timestamp, result["blinks_last_min"]):
+                events.append(("reminder", trigger))
+
+        result.update({
+            "session_id": self.session_id,
+            "timestamp": timestamp,
+            "face": face,
+            "drowsiness": a.drowsiness_score,
+            "stress": a.current_stress,
+            "hr": a.current_hr,
+            "events": events,
+        })
+        self.frames_processed += 1
+        self.last_result = result
+
+        for callback in list(self._consumers):
+            try:
+                callback(self, result)
+            except Exception as e:
+                print(f"Session {self.session_id} consumer error: {e}")
+        return result
+
+    def stats(self):
+        return {
+            "session_id": self.session_id,
+            "user_id": self.user_id,
+            "offered": self.frames_offered,
+            "processed": self.frames_processed,
+            "dropped": self.frames_dropped,
+            "inference_cpu_ms": round(self.cpu_ms / self.frames_processed, 2)
+                                if self.frames_processed else 0.0,
+            "blinks": self.analyzer.blink_count,
+        }
+
+    def _release_buffer(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def close(self):
+        with self._lock:
+            self._inflight = self._pending = None
+            self._release_buffer()
+
+
+class SessionManager:
+    """Schedules many sessions across an InferencePool and runs their analytics
+
+    ``submit`` may be called from any thread (one capture thread per camera
+    is typical). A collector thread receives landmarks from the workers and
+    hands them to ``analytics_threads`` analytics threads (default: one per
+    worker, at most 4). Each session is pinned to one of them, so its
+    frames are analyzed in order, and the next pending frame is sent as
+    soon as one is analyzed, keeping every worker busy while sessions have
+    frames. The threads overlap only where numpy/OpenCV release the GIL,
+    so past a few of them extra workers stop adding analyzed frames.
+    """
+
+    def __init__(self, workers=None, mode=FACE_INPUT_MODE, pool=None, analytics_threads=None):
+        self.pool = pool if pool is not None else InferencePool(workers, mode=mode)
+        self.sessions = {}
+        self._cameras = {}
+        self._running = True
+
+        count = max(1, analytics_threads or min(self.pool.size, 4))
+        self._analytics = [queue.Queue() for _ in range(count)]
+        self._partition = {}   # session_id -> index of its analytics thread
+        self._partition_load = [0] * count
+        self._analytics_threads = [threading.Thread(target=self._analytics_loop, args=(q,),
+                                                    name=f"session-analytics-{i}", daemon=True)
+                                   for i, q in enumerate(self._analytics)]
+        for thread in self._analytics_threads:
+            thread.start()
+        self._collector = threading.Thread(target=self._collect_loop, name="session-collector",
+                                           daemon=True)
+        self._collector.start()
+
+    def add_session(self, session_id, **kwargs):
+        """Create a session (see Session for kwargs) and assign it a worker"""
+        if session_id in self.sessions:
+            raise ValueError(f"Session already exists: {session_id}")
+        session = Session(session_id, **kwargs)
+        index = min(range(len(self._analytics)), key=self._partition_load.__getitem__)
+        self._partition_load[index] += 1
+        self._partition[session_id] = index
+        self.sessions[session_id] = session
+        self.pool.assign(session_id)
+        return session
+
+    def remove_session(self, session_id):
+        self.stop_camera(session_id)
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            self._partition_load[self._partition.pop(session_id)] -= 1
+            self.pool.release(session_id)
+            session.close()
+
+    def submit(self, session_id, frame, timestamp=None):
+        """Offer one BGR frame to a session (never blocks on inference)"""
+        session = self.sessions[session_id]
+        task = session.offer(frame, time.time() if timestamp is None else timestamp)
+        if task is not None:
+            self.pool.submit(session_id, *task)
+
+    def _collect_loop(self):
+        """Route each finished frame to the analytics thread of its session"""
+        while self._running:
+            item = self.pool.get_result(timeout=0.1)
+            if item is None:
+                continue
+            index = self._partition.get(item[0])
+            if index is not None:
+                self._analytics[index].put(item)
+
+    def _analytics_loop(self, results):
+        while True:
+            item = results.get()
+            if item is None:
+                break
+            session_id, seq, points, cpu_ms, _ = item
+            session = self.sessions.get(session_id)
+            if session is None:
+                continue
+            task = session.complete(seq, points, cpu_ms)
+            if task is not None:
+                self.pool.submit(session_id, *task)
+
+    # Cameras
+
+    def open_camera(self, session_id, source):
+        """Capture from a camera index or video file into a session on its own thread"""
+        stop = threading.Event()
+        thread = threading.Thread(target=self._capture_loop, args=(session_id, source, stop),
+                                  name=f"capture-{session_id}", daemon=True)
+        self._cameras[session_id] = (thread, stop)
+        thread.start()
+        return thread
+
+    def stop_camera(self, session_id):
+        camera = self._cameras.pop(session_id, None)
+        if camera is not None:
+            camera[1].set()
+            camera[0].join(2.0)
+
+    def _capture_loop(self, session_id, source, stop):
+        cap = cv2.VideoCapture(source)
+        if not cap.isOpened():
+            print(f"Session {session_id}: could not open {source}")
+            return
+        try:
+            while not stop.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                self.submit(session_id, frame)
+        finally:
+            cap.release()
+
+    def stats(self):
+        return {"workers": self.pool.loads(),
+                "analytics_backlog": [q.qsize() for q in self._analytics],
+                "sessions": [s.stats() for s in self.sessions.values()]}
+
+    def close(self):
+        for session_id in list(self._cameras):
+            self.stop_camera(session_id)
+        self._running = False
+        self._collector.join(2.0)
+        for results in self._analytics:
+            results.put(None)
+        for thread in self._analytics_threads:
+            thread.join(2.0)
+        for session in self.sessions.values():
+            session.close()
+        self.pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monitor several cameras headlessly")
+    parser.add_argument("sources", nargs="+", help="camera indexes and/or video files")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="inference processes (default: one per core)")
+    parser.add_argument("--seconds", type=float, default=None, help="stop after this long")
+    parser.add_argument("--report-every", type=float, default=5.0)
+    args = parser.parse_args()
+
+    manager = SessionManager(workers=args.workers)
+    try:
+        for i, source in enumerate(args.sources):
+            session_id = f"station-{i}"
+            manager.add_session(session_id)
+            manager.open_camera(session_id, int(source) if source.isdigit() else source)
+
+        start = time.monotonic()
+        while args.seconds is None or time.monotonic() - start < args.seconds:
+            time.sleep(args.report_every)
+            print(json.dumps(manager.stats()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Startup timing: milestones marked by the app plus an import-time breakdown
+
+main.py imports this module first, so mark() times are seconds since
+main started importing. The app marks "imports_done", "window_shown",
+"warmup_done" and "first_frame"; only the first mark of each name counts.
+
+Run ``python startup_profile.py`` to launch ``main.py --profile-startup``
+under ``python -X importtime``. In that mode the app starts monitoring as
+soon as it is warmed up and exits after the first processed frame. The
+report lists the milestones and the slowest imports (cumulative and self
+time), and is also written to a JSON file so numbers can be tracked.
+
+Usage: python startup_profile.py [--top 15] [--output startup_profile.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+_T0 = time.perf_counter()
+MARKS = {}
+MARKS_PREFIX = "STARTUP_MARKS "
+
+
+def mark(name):
+    """Record a milestone (seconds since startup); later marks of the same name are ignored"""
+    if name not in MARKS:
+        MARKS[name] = round(time.perf_counter() - _T0, 4)
+
+
+def dump_marks(stream=None):
+    """Print the milestones on one machine-readable line"""
+    print(MARKS_PREFIX + json.dumps(MARKS), file=stream or sys.stdout, flush=True)
+
+
+def parse_importtime(lines):
+    """[(name, self_us, cumulative_us, depth)] from ``-X importtime`` stderr lines"""
+    entries = []
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        try:
+            self_us, cumulative_us, raw_name = line[len("import time:"):].split("|", 2)
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+        except ValueError:
+            continue   # the header line
+        name = raw_name.lstrip()
+        depth = (len(raw_name) - len(name) - 1) // 2
+        entries.append((name.rstrip(), self_us, cumulative_us, depth))
+    return entries
+
+
+def profile(top=15, timeout=180.0):
+    """Run the app once under -X importtime; returns the report dict"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", os.path.join(here, "main.py"),
+                           "--profile-startup"],
+                          cwd=here, capture_output=True, text=True, timeout=timeout)
+    wall = time.perf_counter() - start
+
+    marks = {}
+    for line in proc.stdout.splitlines():
+        if line.startswith(MARKS_PREFIX):
+            marks = json.loads(line[len(MARKS_PREFIX):])
+
+    imports = parse_importtime(proc.stderr.splitlines())
+    top_level = [e for e in imports if e[3] == 0]
+    return {
+        "exit_code": proc.returncode,
+        "process_wall_s": round(wall, 3),
+        "marks_s": marks,
+        "import_total_s": round(sum(e[2] for e in top_level) / 1e6, 3),
+        "slowest_imports": [{"module": n, "cumulative_ms": round(c / 1000, 1),
+                             "self_ms": round(s / 1000, 1)}
+                            for n, s, c, _ in sorted(top_level, key=lambda e: -e[2])[:top]],
+        "slowest_self": [{"module": n, "self_ms": round(s / 1000, 1)}
+                         for n, s, c, _ in sorted(imports, key=lambda e: -e[1])[:top]],
+    }
+
+
+def print_report(report):
+    print(f"Process wall time: {report['process_wall_s']:.2f} s (exit code {report['exit_code']})")
+    print("Milestones (s since main.py started):")
+    for name, seconds in sorted(report["marks_s"].items(), key=lambda kv: kv[1]):
+        print(f"  {name:<16} {seconds:8.3f}")
+    print(f"All imports (window thread and warm-up): {report['import_total_s']:.3f} s")
+    print("Slowest top-level imports (cumulative / self ms):")
+    for e in report["slowest_imports"]:
+        print(f"  {e['module']:<40} {e['cumulative_ms']:9.1f} {e['self_ms']:9.1f}")
+    print("Slowest modules by self time (ms):")
+    for e in report["slowest_self"]:
+        print(f"  {e['module']:<40} {e['self_ms']:9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile app startup")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", default="startup_profile.json")
+    args = parser.parse_args()
+
+    report = profile(top=args.top)
+    print_report(report)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import numpy as np
+
+
+class InferenceBackend:
+    """Scores stress feature vectors with a fitted model
+
+    ``predict_proba(X)`` takes an (n, n_features) array and returns the
+    probability of the stressed class for each row; ``score(x)`` does the
+    same for a single feature vector and returns a float.
+    """
+
+    name = "base"
+
+    def predict_proba(self, X):
+        raise NotImplementedError
+
+    def score(self, x):
+        return float(self.predict_proba(np.asarray(x).reshape(1, -1))[0])
+
+
+def _positive_class_index(classes):
+    """Column of class 1 (stressed) in a classifier's classes_, or None"""
+    matches = np.where(np.asarray(classes) == 1)[0]
+    return int(matches[0]) if len(matches) else None
+
+
+class SklearnBackend(InferenceBackend):
+    """The fitted scikit-learn model as is (reference implementation)"""
+
+    name = "sklearn"
+
+    def __init__(self, model):
+        self.model = model
+        self.positive = _positive_class_index(model.classes_)
+
+    def predict_proba(self, X):
+        if self.positive is None:
+            return np.zeros(len(X))
+        return self.model.predict_proba(X)[:, self.positive]
+
+
+class CompiledForestBackend(InferenceBackend):
+    """A random forest flattened into NumPy node tables
+
+    All trees are concatenated into one set of feature/threshold/child
+    arrays. Evaluation walks every tree at once: each step gathers the
+    current node of every tree and moves it left or right, so a prediction
+    costs max_depth vectorized steps instead of one Python call per tree.
+    Leaves point to themselves, so finished trees simply stay put.
+    """
+
+    name = "compiled_forest"
+
+    def __init__(self, feature, threshold, left, right, leaf_value, roots, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.leaf_value = leaf_value
+        self.roots = roots
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        """Compile a fitted RandomForestClassifier (or a single decision tree)"""
+        estimators = getattr(forest, "estimators_", [forest])
+        positive = _positive_class_index(forest.classes_)
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            n = tree.node_count
+            node_ids = np.arange(n)
+            is_leaf = tree.children_left == -1
+
+            # Leaves loop back to themselves and test feature 0 harmlessly
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+
+            # Per-leaf probability of the stressed class
+            counts = tree.value[:, 0, :]
+            totals = counts.sum(axis=1)
+            totals[totals == 0] = 1.0
+            if positive is None:
+                values.append(np.zeros(n))
+            else:
+                values.append(counts[:, positive] / totals)
+
+            roots.append(offset)
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(np.concatenate(features).astype(np.intp),
+                   np.concatenate(thresholds),
+                   np.concatenate(lefts).astype(np.intp),
+                   np.concatenate(rights).astype(np.intp),
+                   np.concatenate(values),
+                   np.array(roots, dtype=np.intp),
+                   max_depth)
+
+    def score(self, x):
+        # scikit-learn trees compare float32 features against float64 thresholds
+        x = np.asarray(x, dtype=np.float32).astype(np.float64)
+        nodes = self.roots
+        for _ in range(self.max_depth):
+            go_left = x[self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return float(self.leaf_value[nodes].mean())
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.leaf_value[nodes].mean(axis=1)
+
+
+class LinearBackend(InferenceBackend):
+    """Logistic model evaluated as sigmoid(x . w + b) with NumPy
+
+    Built from a fitted LogisticRegression, optionally behind a
+    StandardScaler (e.g. a Pipeline); the scaler is folded into the
+    weights so scoring is a single dot product.
+    """
+
+    name = "linear"
+
+    def __init__(self, weights, bias):
+        self.weights = weights
+        self.bias = bias
+
+    @classmethod
+    def from_sklearn(cls, model):
+        scaler = None
+        if hasattr(model, "steps"):
+            scaler = model.steps[0][1] if len(model.steps) > 1 else None
+            model = model.steps[-1][1]
+
+        weights = model.coef_[0].astype(np.float64)
+        bias = float(model.intercept_[0])
+        if _positive_class_index(model.classes_) == 0:
+            weights, bias = -weights, -bias
+
+        if scaler is not None:
+            # w . ((x - mean) / scale) + b  ==  (w / scale) . x + (b - w . mean / scale)
+            weights = weights / scaler.scale_
+            bias = bias - float(np.dot(weights, scaler.mean_))
+        return cls(weights, bias)
+
+    def score(self, x):
+        z = float(np.dot(self.weights, x)) + self.bias
+        return 1.0 / (1.0 + np.exp(-z))
+
+    def predict_proba(self, X):
+        z = np.asarray(X, dtype=np.float64) @ self.weights + self.bias
+        return 1.0 / (1.0 + np.exp(-z))
+
+
+BACKENDS = {
+    "sklearn": SklearnBackend,
+    "compiled_forest": CompiledForestBackend.from_sklearn,
+    "linear": LinearBackend.from_sklearn,
+}
+
+
+def build_backend(name, model):
+    """Wrap a fitted model in the named backend"""
+    try:
+        factory = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown stress backend: {name}")
+    return factory(model)
@@ -1,31 +1,127 @@
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
 from collections import deque
+import threading
 import time
 
+from instrumentation import Instrumentation
+from model_cache import ModelCache
+from stress_backends import build_backend
+
+# Feature vector produced by eye_tracking.extract_stress_features (order matters)
+STRESS_FEATURES = ("brow_dist_l", "brow_dist_r", "brow_gap", "mouth_ratio",
+                   "jaw_width", "left_ear", "right_ear")
+MODEL_VERSION = 1        # Bump when the baseline training data or model settings change
+BASELINE_SEED = 42
+DEFAULT_BACKEND = "compiled_forest"   # "sklearn", "compiled_forest" or "linear"
+MIN_CALIBRATION_SAMPLES = 20
+RETRAIN_EVERY_SAMPLES = 5     # Retrain after this many new calibration samples...
+RETRAIN_MIN_INTERVAL = 10.0   # ...but start at most one retrain per this many seconds
+
 class StressDetector:
-    def __init__(self):
-        self.model = self._create_baseline_model()
+    def __init__(self, user_id="default", model_cache=None, backend=DEFAULT_BACKEND,
+                 instrumentation=None):
+        """``user_id`` selects the calibrated model to use; None means baseline only
+
+        ``backend`` picks how predictions are evaluated (see stress_backends);
+        "linear" trains a logistic model instead of the random forest.
+        """
+        self.user_id = user_id
+        self.model_cache = model_cache if model_cache is not None else ModelCache()
+        self.backend_name = backend
+        self._model = None   # Loaded lazily from the cache (or trained) on first use
+        self._backend = None # Built from the model on first prediction
         self.feature_buffer = deque(maxlen=100)  # Store last 100 feature sets
         self.stress_scores = deque(maxlen=50)    # Store last 50 stress scores
         self.baseline_features = None
         self.calibration_samples = []
+        self.metrics = instrumentation if instrumentation is not None else Instrumentation()
+        
+        # Background retraining: requests are coalesced and served by one worker thread
+        self._retrain_cond = threading.Condition()
+        self._retrain_requested = False
+        self._retrain_thread = None
+        self._last_retrain_start = float("-inf")
+        self.retraining = False
+        self.trained_samples = 0      # Calibration samples in the live model
+        self.retrain_count = 0
+        self.last_retrain_seconds = None
+    
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = self._load_model()
+        return self._model
+    
+    @model.setter
+    def model(self, value):
+        self._model = value
+        self._backend = None
+    
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = build_backend(self.backend_name, self.model)
+        return self._backend
+    
+    def warm_up(self):
+        """Load (or train) the model and build its backend now instead of on the first prediction"""
+        return self.backend
+    
+    def _model_suffix(self):
+        return "-linear" if self.backend_name == "linear" else ""
+    
+    def _baseline_name(self):
+        return f"stress-baseline{self._model_suffix()}"
+    
+    def _calibrated_name(self):
+        return f"stress-calibrated-{self.user_id}{self._model_suffix()}"
+    
+    def _new_model(self):
+        """Untrained model of the kind the backend evaluates"""
+        if self.backend_name == "linear":
+            return make_pipeline(StandardScaler(), LogisticRegression())
+        return RandomForestClassifier(n_estimators=50, random_state=42)
+    
+    def _load_model(self):
+        """Calibrated model for this user, else the cached baseline, else train one"""
+        if self.user_id is not None:
+            model = self.model_cache.load(self._calibrated_name(), STRESS_FEATURES, MODEL_VERSION)
+            if model is not None:
+                return model
+        
+        model = self.model_cache.load(self._baseline_name(), STRESS_FEATURES, MODEL_VERSION)
+        if model is not None:
+            return model
+        
+        start = time.time()
+        model = self._create_baseline_model()
+        print(f"Trained baseline stress model in {time.time() - start:.2f}s")
+        try:
+            self.model_cache.save(model, self._baseline_name(), STRESS_FEATURES, MODEL_VERSION)
+        except OSError as e:
+            print(f"Could not cache stress model: {e}")
+        return model
         
     def _create_baseline_model(self):
         """Create a simple baseline model (will be replaced with trained model)"""
         # For demo purposes - in production, load pre-trained model
-        model = RandomForestClassifier(n_estimators=50, random_state=42)
+        model = self._new_model()
+        rng = np.random.default_rng(BASELINE_SEED)
         
         # Create synthetic training data (replace with real data)
         # Features: [brow_dist_l, brow_dist_r, brow_gap, mouth_ratio, jaw_width, left_ear, right_ear]
         
         # Relaxed samples (larger brow distance, relaxed mouth, higher EAR)
-        X_relaxed = np.random.randn(100, 7) * [5, 5, 10, 0.1, 5, 0.05, 0.05] + \
+        X_relaxed = rng.standard_normal((100, 7)) * [5, 5, 10, 0.1, 5, 0.05, 0.05] + \
                     [45, 45, 100, 0.3, 120, 0.25, 0.25]
         y_relaxed = np.zeros(100)
         
         # Stressed samples (smaller brow distance, tight mouth, lower EAR)
-        X_stressed = np.random.randn(100, 7) * [3, 3, 8, 0.08, 4, 0.03, 0.03] + \
+        X_stressed = rng.standard_normal((100, 7)) * [3, 3, 8, 0.08, 4, 0.03, 0.03] + \
                      [35, 35, 80, 0.15, 110, 0.20, 0.20]
         y_stressed = np.ones(100)
         
@@ -36,22 +132,99 @@ class StressDetector:
         return model
     
     def add_calibration_sample(self, features, is_stressed):
-        """Add calibration sample for personalization"""
-        self.calibration_samples.append((features, is_stressed))
-        
-        if len(self.calibration_samples) >= 20:
-            self._retrain_model()
+        """Add calibration sample for personalization (never blocks on training)"""
+        with self._retrain_cond:
+            self.calibration_samples.append((features, is_stressed))
+            total = len(self.calibration_samples)
+            pending = self.retrain_queue_depth()
+            self.metrics.set_gauge("stress_retrain_queue_depth", pending)
+            
+            if total >= MIN_CALIBRATION_SAMPLES and (
+                    self.trained_samples == 0 or pending >= RETRAIN_EVERY_SAMPLES):
+                self._retrain_requested = True
+                self._ensure_retrain_worker()
+                self._retrain_cond.notify()
+    
+    def retrain_queue_depth(self):
+        """Calibration samples not yet in the live model"""
+        return len(self.calibration_samples) - self.trained_samples
+    
+    def _ensure_retrain_worker(self):
+        if self._retrain_thread is None or not self._retrain_thread.is_alive():
+            self._retrain_thread = threading.Thread(target=self._retrain_worker,
+                                                    name="stress-retrain", daemon=True)
+            self._retrain_thread.start()
     
-    def _retrain_model(self):
-        """Retrain model with calibration data"""
-        if len(self.calibration_samples) < 20:
+    def _retrain_worker(self):
+        while True:
+            with self._retrain_cond:
+                while not self._retrain_requested:
+                    self._retrain_cond.wait()
+                
+                # Debounce: let more samples arrive instead of refitting back to back
+                wait = self._last_retrain_start + RETRAIN_MIN_INTERVAL - time.monotonic()
+                if wait > 0:
+                    self._retrain_cond.wait(wait)
+                    continue
+                
+                self._retrain_requested = False
+                self.retraining = True
+                self._last_retrain_start = time.monotonic()
+                samples = list(self.calibration_samples)
+            
+            try:
+                self._retrain_model(samples)
+            except Exception as e:
+                print(f"Stress model retraining failed: {e}")
+            finally:
+                with self._retrain_cond:
+                    self.retraining = False
+                    self._retrain_cond.notify_all()
+    
+    def wait_for_retrain(self, timeout=None):
+        """Block until no retrain is queued or running; returns False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._retrain_cond:
+            while self._retrain_requested or self.retraining:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._retrain_cond.wait(remaining)
+        return True
+    
+    def _retrain_model(self, samples=None):
+        """Fit a fresh model on calibration data and swap it in atomically
+        
+        The live model keeps scoring until the new model and its backend are
+        fully built; then both references are replaced together.
+        """
+        samples = list(self.calibration_samples) if samples is None else samples
+        if len(samples) < MIN_CALIBRATION_SAMPLES:
             return
         
-        X = np.array([s[0] for s in self.calibration_samples])
-        y = np.array([s[1] for s in self.calibration_samples])
+        start = time.perf_counter()
+        X = np.array([s[0] for s in samples])
+        y = np.array([s[1] for s in samples])
         
-        self.model.fit(X, y)
-        print(f"Model retrained with {len(self.calibration_samples)} samples")
+        model = self._new_model()
+        model.fit(X, y)
+        backend = build_backend(self.backend_name, model)
+        
+        self._backend, self._model = backend, model
+        self.trained_samples = len(samples)
+        self.retrain_count += 1
+        self.last_retrain_seconds = time.perf_counter() - start
+        self.metrics.record("stress_retrain", self.last_retrain_seconds)
+        self.metrics.set_gauge("stress_retrain_queue_depth", self.retrain_queue_depth())
+        print(f"Model retrained with {len(samples)} samples in {self.last_retrain_seconds:.2f}s")
+        
+        if self.user_id is None:
+            return
+        try:
+            self.model_cache.save(model, self._calibrated_name(), STRESS_FEATURES,
+                                  MODEL_VERSION, samples=len(samples))
+        except OSError as e:
+            print(f"Could not cache calibrated model: {e}")
     
     def calculate_stress(self, features):
         """Calculate stress level from facial features"""
@@ -65,8 +238,7 @@ class StressDetector:
             return 0
         
         # Predict stress probability
-        features_reshaped = features.reshape(1, -1)
-        stress_prob = self.model.predict_proba(features_reshaped)[0][1]
+        stress_prob = self.backend.score(features)
         
         # Convert to 0-100 scale
         stress_score = int(stress_prob * 100)
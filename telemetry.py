@@ -0,0 +1,321 @@
+import os
+import threading
+
+import numpy as np
+
+# Per-frame values kept in the time series (NaN when not measured that frame)
+TELEMETRY_METRICS = ("ear", "stress", "drowsiness", "hr", "blinks_last_min")
+
+FLAG_FACE = 1    # A face was found in the frame
+FLAG_BLINK = 2   # A blink completed on this frame
+
+RAW_DTYPE = np.dtype([("ts", "<f8")] + [(m, "<f4") for m in TELEMETRY_METRICS]
+                     + [("flags", "<u4")])
+
+# One downsampled bucket: frame/blink counts plus min/mean/max and the number
+# of valid samples per metric (so coarser tiers can weight the means exactly)
+AGG_DTYPE = np.dtype([("ts", "<f8"), ("frames", "<u4"), ("face_frames", "<u4"), ("blinks", "<u4")]
+                     + [(f"{m}_{s}", "<u4" if s == "n" else "<f4")
+                        for m in TELEMETRY_METRICS for s in ("min", "mean", "max", "n")])
+
+# Seconds of history kept per tier; each tier is a fixed-size ring file
+DEFAULT_RETENTION = {
+    "raw": 10 * 60,          # per frame
+    "1s": 10 * 3600,         # a full shift at 1 s resolution
+    "1m": 30 * 86400,
+    "1h": 365 * 86400,
+}
+TIER_SECONDS = {"1s": 1, "1m": 60, "1h": 3600}
+
+_HEADER_DTYPE = np.dtype([("magic", "S8"), ("itemsize", "<u8"), ("capacity", "<u8"),
+                          ("count", "<u8")])
+_HEADER_SIZE = 64
+_MAGIC = b"WELLTLM1"
+
+
+class RingFile:
+    """Fixed-capacity ring of fixed-width records in a memory-mapped file
+
+    The header holds the total number of records ever written; the writer
+    stores a record and only then bumps the count, so a reader never sees a
+    half-written record. Once full, the oldest records are overwritten.
+    """
+
+    def __init__(self, path, dtype, capacity):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.capacity = int(capacity)
+        size = _HEADER_SIZE + self.capacity * self.dtype.itemsize
+
+        reuse = False
+        if os.path.exists(path) and os.path.getsize(path) == size:
+            header = np.fromfile(path, dtype=_HEADER_DTYPE, count=1)
+            reuse = (header["magic"][0] == _MAGIC
+                     and header["itemsize"][0] == self.dtype.itemsize
+                     and header["capacity"][0] == self.capacity)
+
+        self._mm = np.memmap(path, dtype=np.uint8, mode="r+" if reuse else "w+", shape=(size,))
+        self._header = self._mm[:_HEADER_DTYPE.itemsize].view(_HEADER_DTYPE)
+        self.records = self._mm[_HEADER_SIZE:].view(self.dtype)
+        if not reuse:
+            self._header["magic"] = _MAGIC
+            self._header["itemsize"] = self.dtype.itemsize
+            self._header["capacity"] = self.capacity
+            self._header["count"] = 0
+
+    @property
+    def count(self):
+        """Records written since the file was created"""
+        return int(self._header["count"][0])
+
+    def append(self, row):
+        """Write one record (a tuple in dtype field order)"""
+        count = self.count
+        self.records[count % self.capacity] = row
+        self._header["count"] = count + 1
+
+    def extend(self, rows):
+        """Write a structured array of records"""
+        count = self.count
+        rows = rows[-self.capacity:]
+        idx = (count + np.arange(len(rows))) % self.capacity
+        self.records[idx] = rows
+        self._header["count"] = count + len(rows)
+
+    def last(self):
+        """The newest record (as a one-row array), or None if nothing was written"""
+        count = self.count
+        if count == 0:
+            return None
+        i = (count - 1) % self.capacity
+        return self.records[i:i + 1].copy()
+
+    def replace_last(self, row):
+        """Overwrite the newest record in place"""
+        self.records[(self.count - 1) % self.capacity] = row
+
+    def read_since(self, position):
+        """Records written at or after ``position``, plus the new position
+
+        If the writer has lapped the reader, the overwritten records are
+        skipped.
+        """
+        count = self.count
+        position = max(position, count - self.capacity)
+        if position >= count:
+            return self.records[:0].copy(), count
+        idx = np.arange(position, count) % self.capacity
+        return self.records[idx], count
+
+    def read_all(self):
+        """Every retained record, oldest first"""
+        return self.read_since(0)[0]
+
+    def flush(self):
+        self._mm.flush()
+
+
+def _empty_agg(n):
+    rows = np.zeros(n, dtype=AGG_DTYPE)
+    for m in TELEMETRY_METRICS:
+        rows[f"{m}_min"] = np.nan
+        rows[f"{m}_mean"] = np.nan
+        rows[f"{m}_max"] = np.nan
+    return rows
+
+
+def _bucket_starts(keys):
+    """Start index of each run of equal keys (keys are sorted)"""
+    return np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+
+
+def aggregate_raw(raw, seconds):
+    """Downsample raw records into ``seconds``-wide buckets"""
+    keys = np.floor(raw["ts"] / seconds).astype(np.int64)
+    starts = _bucket_starts(keys)
+    out = _empty_agg(len(starts))
+    out["ts"] = keys[starts] * seconds
+    out["frames"] = np.diff(np.r_[starts, len(raw)])
+    flags = raw["flags"]
+    out["face_frames"] = np.add.reduceat((flags & FLAG_FACE) > 0, starts)
+    out["blinks"] = np.add.reduceat((flags & FLAG_BLINK) > 0, starts)
+
+    for m in TELEMETRY_METRICS:
+        values = raw[m].astype(np.float64)
+        valid = ~np.isnan(values)
+        n = np.add.reduceat(valid, starts)
+        total = np.add.reduceat(np.where(valid, values, 0.0), starts)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[f"{m}_mean"] = np.where(n > 0, total / np.maximum(n, 1), np.nan)
+        out[f"{m}_min"] = np.fmin.reduceat(values, starts)
+        out[f"{m}_max"] = np.fmax.reduceat(values, starts)
+        out[f"{m}_n"] = n
+    return out
+
+
+def aggregate_tier(rows, seconds):
+    """Downsample finer aggregate rows into ``seconds``-wide buckets"""
+    keys = np.floor(rows["ts"] / seconds).astype(np.int64)
+    starts = _bucket_starts(keys)
+    out = _empty_agg(len(starts))
+    out["ts"] = keys[starts] * seconds
+    for field in ("frames", "face_frames", "blinks"):
+        out[field] = np.add.reduceat(rows[field], starts)
+
+    for m in TELEMETRY_METRICS:
+        n = rows[f"{m}_n"].astype(np.float64)
+        means = rows[f"{m}_mean"].astype(np.float64)
+        total_n = np.add.reduceat(n, starts)
+        total = np.add.reduceat(np.where(n > 0, means * n, 0.0), starts)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[f"{m}_mean"] = np.where(total_n > 0, total / np.maximum(total_n, 1), np.nan)
+        out[f"{m}_min"] = np.fmin.reduceat(rows[f"{m}_min"], starts)
+        out[f"{m}_max"] = np.fmax.reduceat(rows[f"{m}_max"], starts)
+        out[f"{m}_n"] = total_n
+    return out
+
+
+def _split_complete(rows, seconds):
+    """Split rows into (finished buckets, rows of the newest, still open bucket)"""
+    if len(rows) == 0:
+        return rows, rows
+    keys = np.floor(rows["ts"] / seconds).astype(np.int64)
+    cut = int(np.searchsorted(keys, keys[-1]))
+    return rows[:cut], rows[cut:]
+
+
+class TelemetryRecorder:
+    """Per-frame time series in a memory-mapped raw ring, downsampled into tiers
+
+    ``record`` writes one fixed-width record and is cheap enough for the
+    analytics stage. A compactor thread rolls finished seconds into the 1 s
+    tier, finished minutes into 1 min and finished hours into 1 h, each
+    keeping min/mean/max. Every tier is a ring sized from its retention, so
+    disk and memory stay fixed however long the session runs.
+    """
+
+    def __init__(self, directory="telemetry", fps=30, retention=None, compact_interval=1.0):
+        self.directory = directory
+        self.compact_interval = compact_interval
+        self.retention = dict(DEFAULT_RETENTION)
+        self.retention.update(retention or {})
+        os.makedirs(directory, exist_ok=True)
+
+        self.raw = RingFile(os.path.join(directory, "raw.ring"), RAW_DTYPE,
+                            max(1, int(self.retention["raw"] * fps)))
+        self.tiers = {name: RingFile(os.path.join(directory, f"{name}.ring"), AGG_DTYPE,
+                                     max(1, self.retention[name] // seconds))
+                      for name, seconds in TIER_SECONDS.items()}
+
+        # Rows of the newest (unfinished) bucket of each level, awaiting more data
+        self._open_raw = np.zeros(0, dtype=RAW_DTYPE)
+        self._raw_position, self._open = self._recover_open()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def _recover_open(self):
+        """Raw read position and open buckets left over from the previous run
+
+        A tier's newest row covers everything up to the end of its bucket
+        (close() writes partial buckets and later data is merged into them),
+        so newer rows of the finer level were still open when the last run
+        stopped, or lost with a crash, and are rolled up again.
+        """
+        def newer(rows, ring, seconds):
+            last = ring.last()
+            if last is None:
+                return rows
+            return rows[rows["ts"] >= last["ts"][0] + seconds]
+
+        raw = self.raw.read_all()
+        position = self.raw.count - len(newer(raw, self.tiers["1s"], 1))
+        open_rows = {}
+        finer = "1s"
+        for name, seconds in TIER_SECONDS.items():
+            if name != "1s":
+                open_rows[name] = newer(self.tiers[finer].read_all(), self.tiers[name], seconds)
+                finer = name
+        return position, open_rows
+
+    def disk_bytes(self):
+        """Total size of all ring files (fixed at creation)"""
+        rings = [self.raw] + list(self.tiers.values())
+        return sum(_HEADER_SIZE + r.capacity * r.dtype.itemsize for r in rings)
+
+    def record(self, timestamp, ear=None, stress=None, drowsiness=None, hr=None,
+               blinks_last_min=None, face=False, blink=False):
+        """Append one frame's values (None = not measured)"""
+        nan = np.nan
+        self.raw.append((timestamp,
+                         nan if ear is None else ear,
+                         nan if stress is None else stress,
+                         nan if drowsiness is None else drowsiness,
+                         nan if hr is None else hr,
+                         nan if blinks_last_min is None else blinks_last_min,
+                         (FLAG_FACE if face else 0) | (FLAG_BLINK if blink else 0)))
+
+    def compact(self, final=False):
+        """Roll new raw records up through the tiers; ``final`` also closes open buckets"""
+        with self._lock:
+            new, self._raw_position = self.raw.read_since(self._raw_position)
+            raw = np.concatenate([self._open_raw, new]) if len(self._open_raw) else new
+            done, self._open_raw = _split_complete(raw, 1)
+            if final:
+                done, self._open_raw = raw, raw[:0]
+
+            rows = aggregate_raw(done, 1) if len(done) else np.zeros(0, dtype=AGG_DTYPE)
+            for name, seconds in TIER_SECONDS.items():
+                if name != "1s":
+                    pending = np.concatenate([self._open[name], rows])
+                    finished, self._open[name] = _split_complete(pending, seconds)
+                    if final:
+                        finished, self._open[name] = pending, pending[:0]
+                    rows = aggregate_tier(finished, seconds) if len(finished) else finished
+                if len(rows):
+                    self._write_tier(self.tiers[name], rows, seconds)
+
+    @staticmethod
+    def _write_tier(ring, rows, seconds):
+        """Append rows, merging the first into the newest stored row if it is the same bucket"""
+        last = ring.last()
+        if last is not None and rows["ts"][0] == last["ts"][0]:
+            # A partial bucket written by close() before a restart
+            ring.replace_last(aggregate_tier(np.concatenate([last, rows[:1]]), seconds)[0])
+            rows = rows[1:]
+        if len(rows):
+            ring.extend(rows)
+
+    def read(self, tier="1s", start=None, end=None):
+        """Retained records of a tier ("raw", "1s", "1m", "1h") with start <= ts < end"""
+        ring = self.raw if tier == "raw" else self.tiers[tier]
+        rows = ring.read_all()
+        if start is not None:
+            rows = rows[rows["ts"] >= start]
+        if end is not None:
+            rows = rows[rows["ts"] < end]
+        return rows
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="telemetry-compactor", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.compact_interval):
+            try:
+                self.compact()
+            except Exception as e:
+                print(f"Telemetry compaction error: {e}")
+
+    def close(self):
+        """Stop the compactor, roll up everything recorded and flush the files"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(2.0)
+        self.compact(final=True)
+        self.raw.flush()
+        for ring in self.tiers.values():
+            ring.flush()
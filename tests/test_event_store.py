@@ -0,0 +1,185 @@
+import csv
+from datetime import datetime
+
+import pytest
+
+from event_store import EventStore
+
+
+def ts(day, hour=12):
+    return datetime.fromisoformat(f"{day}T{hour:02d}:00:00").timestamp()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "events.db")
+
+
+@pytest.fixture
+def store(db_path):
+    store = EventStore(db_path, batch_size=3, flush_interval=5.0)
+    yield store
+    store.close()
+
+
+def test_writer_batches_and_flush_commits(store):
+    batches = []
+    insert = store._insert
+
+    def recording_insert(conn, rows):
+        batches.append(len(rows))
+        insert(conn, rows)
+
+    store._insert = recording_insert
+    for i in range(7):
+        store.append("blink", "ack", i, timestamp=1000.0 + i)
+
+    assert store.flush(timeout=10.0)
+    # Full batches of batch_size, then the remainder committed by the flush marker
+    assert batches == [3, 3, 1]
+    assert store.count() == 7
+    assert [e["blinks_last_min"] for e in store.query()] == list(range(7))
+
+
+def test_query_filters_by_time_and_trigger(store):
+    store.append("blink", "ack", 1, timestamp=10.0)
+    store.append("stress", "ignored", 2, timestamp=20.0)
+    store.append("blink", "ignored", 3, timestamp=30.0)
+    assert store.flush()
+
+    assert [e["timestamp"] for e in store.query(start=15.0, end=30.0)] == [20.0]
+    assert [e["timestamp"] for e in store.query(trigger="blink")] == [10.0, 30.0]
+    assert store.count(start=20.0) == 2
+
+
+def test_week_and_month_summaries(store):
+    # 2024-01-01 is a Monday; weeks are keyed by their Monday
+    store.append("blink", "ack", 5, stress_level=40, heart_rate=70, timestamp=ts("2024-01-01"))
+    store.append("blink", "ignored", 5, stress_level=60, heart_rate=80, timestamp=ts("2024-01-07"))
+    store.append("stress", "ack", 5, stress_level=50, timestamp=ts("2024-01-08"))
+    store.append("stress", "ack", 5, stress_level=20, timestamp=ts("2024-02-05"))
+    assert store.flush()
+
+    weeks = store.summary("week")
+    assert [(w["date"], w["total"]) for w in weeks] == [
+        ("2024-01-01", 2), ("2024-01-08", 1), ("2024-02-05", 1)]
+    assert weeks[0]["ack_rate"] == pytest.approx(50.0)
+    assert weeks[0]["stress_level"] == pytest.approx(50.0)
+    assert weeks[0]["heart_rate"] == pytest.approx(75.0)
+
+    months = store.summary("month")
+    assert [(m["date"], m["total"], m["acknowledged"]) for m in months] == [
+        ("2024-01", 3, 2), ("2024-02", 1, 1)]
+
+    days = store.summary("day", start_day="2024-01-07", end_day="2024-01-08")
+    assert [d["date"] for d in days] == ["2024-01-07", "2024-01-08"]
+
+    with pytest.raises(ValueError):
+        store.summary("year")
+
+
+def test_rollups_rebuilt_for_old_databases(db_path):
+    store = EventStore(db_path)
+    store.append("blink", "ack", 5, timestamp=ts("2024-03-01"))
+    assert store.flush()
+    reader = store._reader()
+    reader.execute("DELETE FROM daily_rollups")
+    reader.execute("DELETE FROM meta WHERE key = 'rollups'")
+    reader.commit()
+    store.close()
+
+    store = EventStore(db_path)
+    assert [(d["date"], d["total"]) for d in store.summary()] == [("2024-03-01", 1)]
+    store.close()
+
+
+def write_legacy_csv(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["timestamp", "trigger", "ack", "blinks_in_last_min", "stress_level"])
+        writer.writerows(rows)
+
+
+def test_migrate_csv_imports_once(db_path, tmp_path):
+    legacy = tmp_path / "reminder_log.csv"
+    write_legacy_csv(legacy, [
+        ["2024-01-01T09:00:00", "blink", "ack", "4", "30"],
+        ["not a date", "blink", "ack", "4", "30"],
+        ["2024-01-02T09:00:00", "stress", "ignored", "", "70"],
+    ])
+
+    store = EventStore(db_path)
+    store.migrate_csv(str(legacy))
+    store.migrate_csv(str(legacy))
+    assert store.flush()
+    events = store.query()
+    assert [(e["trigger"], e["blinks_last_min"], e["stress_level"]) for e in events] == [
+        ("blink", 4, 30.0), ("stress", 0, 70.0)]
+    store.close()
+
+    # The meta marker survives a restart
+    store = EventStore(db_path)
+    store.migrate_csv(str(legacy))
+    assert store.flush()
+    assert store.count() == 2
+    store.migrate_csv(str(tmp_path / "missing.csv"))
+    assert store.flush()
+    assert store.count() == 2
+    store.close()
+
+
+def test_unreadable_csv_is_rolled_back_and_retried(db_path, tmp_path):
+    legacy = tmp_path / "reminder_log.csv"
+    write_legacy_csv(legacy, [["2024-01-01T09:00:00", "blink", "ack", "4", "30"]])
+    with open(legacy, "ab") as f:
+        f.write(b"\xff\xfe broken\n")
+
+    store = EventStore(db_path)
+    store.migrate_csv(str(legacy))
+    assert store.flush()
+    assert store.count() == 0
+    store.close()
+
+    write_legacy_csv(legacy, [["2024-01-01T09:00:00", "blink", "ack", "4", "30"]])
+    store = EventStore(db_path)
+    store.migrate_csv(str(legacy))
+    assert store.flush()
+    assert store.count() == 1
+    store.close()
+
+
+def test_failing_batch_does_not_stop_the_writer(store):
+    store.append("blink", "ack", 1, timestamp=1.0)
+    store.append(None, "ack", 1, timestamp=2.0)   # violates NOT NULL: the batch rolls back
+    assert store.flush()
+    assert store.count() == 0
+
+    store.append("blink", "ack", 1, timestamp=3.0)
+    assert store.flush()
+    assert [e["timestamp"] for e in store.query()] == [3.0]
+
+
+def test_failing_job_only_undoes_its_own_writes(store):
+    def bad_job(conn):
+        conn.execute("INSERT INTO meta (key, value) VALUES ('bad', '1')")
+        raise RuntimeError("boom")
+
+    store.append("blink", "ack", 1, timestamp=1.0)
+    store.submit(bad_job)
+    store.append("blink", "ack", 1, timestamp=2.0)
+    assert store.flush()
+
+    assert store.count() == 2
+    reader = store._reader()
+    assert reader.execute("SELECT 1 FROM meta WHERE key = 'bad'").fetchone() is None
+
+
+def test_close_writes_pending_events(db_path):
+    store = EventStore(db_path, flush_interval=5.0)
+    store.append("blink", "ack", 1, timestamp=1.0)
+    store.close()
+    store.close()
+
+    store = EventStore(db_path)
+    assert store.count() == 1
+    store.close()
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from heart_rate_monitor import HeartRateMonitor
+
+FPS = 30
+# Both modes read a 15 s window, so their spectral resolution is 60 * fps / samples BPM
+BIN_BPM = 60.0 * FPS / (FPS * 15)
+
+
+def synthetic_pulse(bpm, seconds=20, seed=0):
+    """Green-channel trace with a pulse at ``bpm``, slow drift and sensor noise"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * FPS)) / FPS
+    return 120 + 0.5 * np.sin(2 * np.pi * bpm / 60 * t) + 0.05 * t + rng.normal(0, 0.3, len(t))
+
+
+@pytest.mark.parametrize("bpm", [62, 72, 90, 105])
+def test_streaming_matches_batch(bpm):
+    streaming = HeartRateMonitor(fps=FPS, mode="streaming")
+    batch = HeartRateMonitor(fps=FPS, mode="batch")
+    for value in synthetic_pulse(bpm):
+        streaming.add_sample((0, value, 0))
+        batch.add_sample((0, value, 0))
+
+    streaming_bpm = streaming.streaming.estimate()
+    batch_bpm = batch.batch_estimate()
+
+    # The two modes agree to within one frequency bin...
+    assert abs(streaming_bpm - batch_bpm) <= BIN_BPM
+    # ...and both find the true rate to within one bin
+    assert abs(streaming_bpm - bpm) <= BIN_BPM
+    assert abs(batch_bpm - bpm) <= BIN_BPM
@@ -0,0 +1,109 @@
+import csv
+import gzip
+import json
+import os
+
+import numpy as np
+import pytest
+
+from event_store import EventStore
+from log_report import METRICS, ReportAggregate, _chunk, build_report, write_json
+
+HEADER = ["timestamp", "trigger", "ack", "blinks_last_min", "stress_level", "heart_rate",
+          "drowsiness_score"]
+
+
+def write_log(path, rows):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "wt", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+
+
+@pytest.fixture
+def logs(tmp_path):
+    write_log(str(tmp_path / "desk-1" / "reminder_log.csv"), [
+        ["2024-01-01T09:00:00", "blink", "ack", 5, 40, 70, 10],
+        ["2024-01-02T09:00:00", "blink", "ack", 5, 60, 0, 20],     # hr 0 = not measured
+        ["2024-01-02T10:00:00", "blink", "ignored", 5, 50, 80, 30],
+        ["not a timestamp", "blink", "ack", 5, 50, 80, 30],
+        ["2024-01-05T09:00:00", "stress", "ack", 5, 90, 100, 0],
+    ])
+    write_log(str(tmp_path / "desk-2" / "reminder_log.csv.1.gz"), [
+        ["2023-12-31T09:00:00", "blink", "ack", 5, 10, 60, 0],
+        ["2024-01-02T09:00:00", "blink", "ack", 5, 20, 65, 0],
+        ["2024-01-03T09:00:00", "stress", "ignored", 5, 80, 90, 50],
+    ])
+    return tmp_path
+
+
+def by_key(report):
+    return {(r["day"], r["station"], r["trigger"]): r for r in report.rows()}
+
+
+def test_csv_and_gz_with_date_filter(logs):
+    report = build_report([str(logs)], since="2024-01-01", until="2024-01-03")
+
+    # Rows without a timestamp are never read; the date filter only reduces the matches
+    assert report.rows_read == 7
+    assert report.rows_matched == 5
+    assert len(report.files) == 2
+
+    rows = by_key(report)
+    assert set(rows) == {("2024-01-01", "desk-1", "blink"), ("2024-01-02", "desk-1", "blink"),
+                         ("2024-01-02", "desk-2", "blink"), ("2024-01-03", "desk-2", "stress")}
+    day2 = rows[("2024-01-02", "desk-1", "blink")]
+    assert (day2["count"], day2["acknowledged"], day2["ack_rate"]) == (2, 1, 50.0)
+    assert day2["stress_mean"] == 55.0
+    assert day2["hr_mean"] == 80.0
+
+    daily = {r["day"]: r["count"] for r in report.rollup(("day",)).rows()}
+    assert daily == {"2024-01-01": 1, "2024-01-02": 3, "2024-01-03": 1}
+
+
+def test_event_store_database_input(tmp_path):
+    path = str(tmp_path / "desk-3" / "wellness_events.db")
+    os.makedirs(os.path.dirname(path))
+    store = EventStore(path)
+    for stress in (30, 50):
+        store.append("blink", "ack", 5, stress_level=stress, heart_rate=72)
+    store.close()
+
+    report = build_report([str(tmp_path)])
+    (row,) = report.rows()
+    assert (row["station"], row["trigger"], row["count"]) == ("desk-3", "blink", 2)
+    assert row["stress_mean"] == 40.0
+
+
+def test_percentiles_stay_on_the_scale():
+    agg = ReportAggregate()
+    n = 50
+    values = [[100.0, 220.0, 0.0]] * (n - 1) + [[150.0, 300.0, 0.0]]
+    agg.add_chunk(_chunk(["2024-01-01"] * n, ["desk"] * n, ["blink"] * n, [True] * n, values))
+
+    (row,) = agg.rows()
+    for name, _, lo, hi, _ in METRICS:
+        for q in (50, 90, 95, 99):
+            assert lo <= row[f"{name}_p{q}"] <= hi
+    assert row["stress_p99"] == 100.0
+    assert row["hr_p99"] == 220.0
+    assert row["drowsiness_p50"] == pytest.approx(0.5)
+
+
+def test_parallel_merge_matches_serial(logs, tmp_path):
+    serial = build_report([str(logs)], workers=1, chunk_size=2, since="2024-01-01")
+    parallel = build_report([str(logs)], workers=2, chunk_size=2, since="2024-01-01")
+
+    assert parallel.rows() == serial.rows()
+    assert (parallel.rows_read, parallel.rows_matched) == (serial.rows_read, serial.rows_matched)
+    assert (serial.rows_read, serial.rows_matched) == (7, 6)
+    assert sorted(parallel.files) == sorted(serial.files)
+
+    out = str(tmp_path / "report.json")
+    write_json(parallel, parallel.rows(), out)
+    with open(out) as f:
+        saved = json.load(f)
+    assert (saved["rows_read"], saved["rows_matched"]) == (7, 6)
+    assert np.sum([g["count"] for g in saved["groups"]]) == 6
@@ -0,0 +1,104 @@
+import random
+
+import pytest
+
+from rolling_stats import PerclosTracker, RollingStats
+
+
+def brute_force(samples, now, window):
+    """(count, sum, mean) of the samples with now - window <= ts"""
+    inside = [(v, w) for ts, v, w in samples if ts >= now - window]
+    total = sum(v for v, _ in inside)
+    weight = sum(w for _, w in inside)
+    return len(inside), total, total / weight if weight > 0 else None
+
+
+def test_windows_match_brute_force():
+    rng = random.Random(0)
+    stats = RollingStats((1.0, 5.0, 20.0))
+    samples = []
+    ts = 0.0
+    for _ in range(3000):
+        ts += rng.uniform(0.0, 0.1)
+        value, weight = rng.uniform(0, 10), rng.uniform(0.5, 1.5)
+        samples.append((ts, value, weight))
+        stats.add(ts, value, weight)
+        for window in stats.windows:
+            count, total, mean = brute_force(samples, ts, window)
+            assert stats.count(window) == count
+            assert stats.sum(window) == pytest.approx(total)
+            assert stats.mean(window) == pytest.approx(mean)
+
+
+def test_windows_are_sorted_and_summarized():
+    stats = RollingStats((60, 10))
+    assert stats.windows == (10.0, 60.0)
+    for ts in range(30):
+        stats.add(float(ts), value=2.0)
+    summary = stats.summary()
+    assert summary[10.0] == {"count": 11, "sum": 22.0, "mean": 2.0}
+    assert summary[60.0] == {"count": 30, "sum": 60.0, "mean": 2.0}
+
+
+def test_advance_expires_without_new_samples():
+    stats = RollingStats((10.0,))
+    for ts in range(5):
+        stats.add(float(ts), value=0.1)
+    stats.advance(12.0)
+    assert stats.count(10.0) == 3
+    stats.advance(100.0)
+    assert stats.count(10.0) == 0
+    # An empty window resets its sums exactly (no floating-point residue)
+    assert stats.sum(10.0) == 0.0
+    assert stats.mean(10.0) is None
+
+
+def test_buffer_is_trimmed_to_the_longest_window():
+    stats = RollingStats((1.0, 10.0))
+    for i in range(100000):
+        stats.add(i * 0.01)
+    assert stats.count(10.0) == 1001
+    assert stats.count(1.0) == 101
+    # Old samples are dropped in bulk; at most about twice the window stays buffered
+    assert len(stats._ts) <= 2 * 1001 + 64
+    assert stats._base > 0
+    assert stats._ts[stats._start[10.0] - stats._base] == pytest.approx(999.99 - 10.0)
+
+
+def test_perclos_is_time_weighted():
+    tracker = PerclosTracker(windows=(60.0,))
+    # Closed for one 0.3 s frame after every three 0.1 s open frames
+    ts = 0.0
+    tracker.update(ts, False)
+    for _ in range(20):
+        for closed, dt in ((False, 0.1), (False, 0.1), (False, 0.1), (True, 0.3)):
+            ts += dt
+            tracker.update(ts, closed)
+    assert tracker.perclos(60.0) == pytest.approx(50.0)
+
+
+def test_perclos_caps_gaps_and_ignores_reset():
+    tracker = PerclosTracker(windows=(60.0,), max_gap=0.5)
+    tracker.update(0.0, False)
+    tracker.update(1.0, False)    # a 1 s open gap counts as max_gap
+    tracker.update(1.5, True)
+    assert tracker.stats.weight(60.0) == pytest.approx(1.0)
+    assert tracker.perclos(60.0) == pytest.approx(50.0)
+
+    tracker.reset_gap()
+    tracker.update(20.0, True)    # first frame after a reset adds no time
+    assert tracker.stats.weight(60.0) == pytest.approx(1.0)
+    tracker.update(20.25, True)
+    assert tracker.perclos(60.0) == pytest.approx(0.75 / 1.25 * 100)
+
+    tracker.update(19.0, True)    # a timestamp going backwards adds nothing
+    assert tracker.stats.weight(60.0) == pytest.approx(1.25)
+
+
+def test_perclos_without_data_is_zero():
+    tracker = PerclosTracker(windows=(10.0,))
+    assert tracker.perclos(10.0) == 0.0
+    tracker.update(0.0, True)
+    tracker.update(0.2, True)
+    tracker.advance(30.0)
+    assert tracker.perclos(10.0) == 0.0
@@ -0,0 +1,109 @@
+import queue
+import threading
+
+import pytest
+
+import session as session_module
+from session import SessionManager
+
+
+class FakePool:
+    """InferencePool stand-in: every submitted frame comes straight back as a result"""
+
+    size = 3
+
+    def __init__(self):
+        self._results = queue.Queue()
+        self.released = []
+
+    def assign(self, session_id):
+        return 0
+
+    def release(self, session_id):
+        self.released.append(session_id)
+
+    def submit(self, session_id, seq, shm_name, shape):
+        self._results.put((session_id, seq, None, 1.0, 0))
+
+    def get_result(self, timeout=None):
+        try:
+            return self._results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def loads(self):
+        return [0]
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    """Records which thread analyzed each frame, and in what order"""
+
+    def __init__(self, session_id, frames=0):
+        self.session_id = session_id
+        self.remaining = frames
+        self.seen = []
+        self.threads = set()
+        self.done = threading.Event()
+
+    def offer(self, frame, timestamp):
+        return self._next()
+
+    def _next(self):
+        if self.remaining == 0:
+            self.done.set()
+            return None
+        self.remaining -= 1
+        return len(self.seen) + 1, "shm", (1, 1, 3)
+
+    def complete(self, seq, points, cpu_ms):
+        self.seen.append(seq)
+        self.threads.add(threading.current_thread().name)
+        return self._next()
+
+    def stats(self):
+        return {"session_id": self.session_id}
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(session_module, "Session", FakeSession)
+    manager = SessionManager(pool=FakePool())
+    yield manager
+    manager.close()
+
+
+def test_default_analytics_threads_follow_workers(manager):
+    assert len(manager._analytics_threads) == 3
+    assert manager.stats()["analytics_backlog"] == [0, 0, 0]
+
+
+def test_sessions_are_spread_and_pinned_to_analytics_threads(manager):
+    sessions = [manager.add_session(f"s{i}", frames=200) for i in range(6)]
+    for s in sessions:
+        manager.submit(s.session_id, frame=None, timestamp=0.0)
+    for s in sessions:
+        assert s.done.wait(10.0)
+
+    for s in sessions:
+        # Every frame of a session ran, in order, on the same thread
+        assert s.seen == list(range(1, 201))
+        assert len(s.threads) == 1
+    used = [next(iter(s.threads)) for s in sessions]
+    assert sorted(used.count(name) for name in set(used)) == [2, 2, 2]
+
+
+def test_removed_session_frees_its_partition(manager):
+    manager.add_session("a")
+    manager.add_session("b")
+    manager.remove_session("a")
+    assert manager.pool.released == ["a"]
+    manager.add_session("c")
+    assert manager._partition["c"] != manager._partition["b"]
+    with pytest.raises(ValueError):
+        manager.add_session("b")
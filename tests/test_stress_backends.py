@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from model_cache import ModelCache
+from stress_backends import CompiledForestBackend, LinearBackend
+from stress_detector import StressDetector, STRESS_FEATURES
+
+
+def feature_rows(n=500, seed=7):
+    """Rows spread over and beyond the baseline training distribution"""
+    rng = np.random.default_rng(seed)
+    centre = np.array([40, 40, 90, 0.22, 115, 0.22, 0.22])
+    spread = np.array([10, 10, 20, 0.2, 10, 0.08, 0.08])
+    return rng.standard_normal((n, len(STRESS_FEATURES))) * spread + centre
+
+
+@pytest.fixture(scope="module")
+def cache(tmp_path_factory):
+    return ModelCache(str(tmp_path_factory.mktemp("model_cache")))
+
+
+@pytest.fixture(scope="module")
+def forest(cache):
+    return StressDetector(user_id=None, model_cache=cache, backend="sklearn").model
+
+
+@pytest.fixture(scope="module")
+def linear(cache):
+    return StressDetector(user_id=None, model_cache=cache, backend="linear").model
+
+
+def reference(model, X):
+    return model.predict_proba(X)[:, list(model.classes_).index(1)]
+
+
+@pytest.mark.parametrize("factory, model_name", [
+    (CompiledForestBackend.from_sklearn, "forest"),
+    (LinearBackend.from_sklearn, "linear"),
+])
+def test_backend_matches_sklearn(request, factory, model_name):
+    model = request.getfixturevalue(model_name)
+    backend = factory(model)
+    X = feature_rows()
+    expected = reference(model, X)
+
+    # Batches
+    assert np.allclose(backend.predict_proba(X), expected, atol=1e-9)
+    assert np.allclose(backend.predict_proba(X[:7]), expected[:7], atol=1e-9)
+
+    # Single rows, through both entry points
+    for x, p in zip(X[:50], expected[:50]):
+        assert np.allclose(backend.predict_proba(x.reshape(1, -1)), [p], atol=1e-9)
+        assert abs(backend.score(x) - p) <= 1e-9
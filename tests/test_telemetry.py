@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from telemetry import TelemetryRecorder
+
+
+def record_frames(recorder, start, end, fps=10):
+    """One frame every 1/fps s in [start, end), EAR = 0.3, a blink once per second"""
+    for i in range(int(round((end - start) * fps))):
+        ts = start + i / fps
+        recorder.record(ts, ear=0.3, stress=40.0, face=True, blink=i % fps == 0)
+
+
+def totals(recorder, tier):
+    rows = recorder.read(tier)
+    return list(rows["ts"]), int(rows["frames"].sum()), int(rows["blinks"].sum())
+
+
+@pytest.fixture
+def directory(tmp_path):
+    return str(tmp_path / "telemetry")
+
+
+def test_tiers_roll_up_finished_buckets(directory):
+    recorder = TelemetryRecorder(directory, fps=10)
+    record_frames(recorder, 3590.0, 3725.0)
+    recorder.compact()
+
+    # The newest second, minute and hour are still open
+    ts_1s, frames_1s, _ = totals(recorder, "1s")
+    assert ts_1s[0] == 3590.0 and ts_1s[-1] == 3723.0
+    assert frames_1s == 1340
+    assert totals(recorder, "1m")[0] == [3540.0, 3600.0, 3660.0]
+    assert totals(recorder, "1h")[0] == [0.0]
+
+    recorder.close()
+    assert totals(recorder, "1h") == ([0.0, 3600.0], 1350, 135)
+    assert recorder.read("1m")["ear_mean"] == pytest.approx([0.3, 0.3, 0.3, 0.3])
+
+
+def test_close_and_reopen_within_one_bucket(directory):
+    recorder = TelemetryRecorder(directory, fps=10)
+    record_frames(recorder, 100.0, 100.5)
+    recorder.close()
+
+    recorder = TelemetryRecorder(directory, fps=10)
+    recorder.record(100.5, ear=0.1, face=True)
+    record_frames(recorder, 100.6, 101.0)
+    recorder.close()
+
+    # One row per bucket: the second run is merged into the partial rows
+    for tier, ts in (("1s", 100.0), ("1m", 60.0), ("1h", 0.0)):
+        rows = recorder.read(tier)
+        assert list(rows["ts"]) == [ts]
+        assert rows["frames"][0] == 10
+        assert rows["ear_n"][0] == 10
+        assert rows["ear_mean"][0] == pytest.approx((9 * 0.3 + 0.1) / 10)
+        assert rows["ear_min"][0] == pytest.approx(0.1)
+        assert rows["stress_n"][0] == 9
+
+
+def test_open_buckets_recovered_after_crash(directory):
+    recorder = TelemetryRecorder(directory, fps=10)
+    record_frames(recorder, 50.0, 75.0)
+    recorder.compact()
+    assert totals(recorder, "1s")[0][-1] == 73.0
+    assert len(recorder.read("1m")) == 1
+    # No close(): the open second and minute only exist in the raw and 1 s rings
+    recorder.raw.flush()
+    for ring in recorder.tiers.values():
+        ring.flush()
+    del recorder
+
+    recorder = TelemetryRecorder(directory, fps=10)
+    record_frames(recorder, 75.0, 80.0)
+    recorder.close()
+
+    ts_1s, frames_1s, blinks_1s = totals(recorder, "1s")
+    assert ts_1s == [float(s) for s in range(50, 80)]
+    assert (frames_1s, blinks_1s) == (300, 30)
+    assert totals(recorder, "1m") == ([0.0, 60.0], 300, 30)
+    assert totals(recorder, "1h") == ([0.0], 300, 30)
+
+
+def test_rings_are_fixed_size(directory):
+    recorder = TelemetryRecorder(directory, fps=10, retention={"raw": 2, "1s": 5})
+    for second in range(20):
+        record_frames(recorder, second, second + 1)
+        recorder.compact()
+    recorder.close()
+
+    assert len(recorder.read("raw")) == 20
+    assert list(recorder.read("1s")["ts"]) == [15.0, 16.0, 17.0, 18.0, 19.0]
+    assert np.all(recorder.read("1s")["frames"] == 10)
+    assert totals(recorder, "1m") == ([0.0], 200, 20)
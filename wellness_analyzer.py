@@ -0,0 +1,276 @@
+from eye_tracking import landmarks_to_array, calculate_EAR_array, extract_stress_features_array
+from stress_detector import StressDetector
+from heart_rate_monitor import HeartRateMonitor
+from instrumentation import Instrumentation
+from rolling_stats import RollingStats, PerclosTracker, DEFAULT_WINDOWS
+
+PERCLOS_DROWSY = 30.0   # PERCLOS (% over the last minute) that maps to a drowsiness score of 100
+
+
+class WellnessAnalyzer:
+    """Blink, drowsiness, stress and heart rate analytics for one face stream
+
+    Everything is driven by the timestamps passed in (seconds, any epoch),
+    so the same logic runs live from a webcam or faster than real time from
+    a recording. Side effects such as beeps and reminders are not performed
+    here; they are returned as events for the caller to act on:
+
+        ("blink", blink_count)
+        ("beep", reason)
+        ("reminder", trigger_type)
+    """
+
+    def __init__(self, fps=30, stress_detector=None, hr_monitor=None, instrumentation=None):
+        # Settings (the app overwrites these from the UI)
+        self.ear_threshold = 0.21
+        self.consec_frames = 3
+        self.blink_threshold = 8
+        self.interval_minutes = 20
+        self.eye_closure_alert_time = 20.0  # seconds
+        self.stress_sustained_time = 20.0   # seconds
+
+        # Blink tracking
+        self.frame_counter = 0
+        self.blink_count = 0
+        self.blink_stats = RollingStats(DEFAULT_WINDOWS)  # blinks per 10 s / 1 min / 5 min
+        self.last_reminder_time = None
+
+        # Drowsiness tracking
+        self.eyes_closed_start = None
+        self.eyes_open_start = None
+        self.drowsy_state = False
+        self.drowsiness_score = 0
+        self.last_drowsy_beep = float("-inf")
+        self.perclos = PerclosTracker(DEFAULT_WINDOWS)
+
+        # Stress tracking with sustained timer
+        self.high_stress_start = None
+
+        # Advanced modules
+        self.metrics = instrumentation if instrumentation is not None else Instrumentation()
+        self.stress_detector = (stress_detector if stress_detector is not None
+                                else StressDetector(instrumentation=self.metrics))
+        self.hr_monitor = hr_monitor if hr_monitor is not None else HeartRateMonitor(fps=fps)
+
+        # Current metrics
+        self.current_stress = 0
+        self.current_hr = 0
+        self.last_hr_update = None
+        self._landmark_points = None
+        self.paused_at = None
+
+    def pause(self, timestamp):
+        """Stop tracking while nobody is in view (the caller stops calling process)
+
+        Closure, stress and blink timers are cleared so the gap is never
+        counted as eyes closed or sustained stress.
+        """
+        self.paused_at = timestamp
+        self.frame_counter = 0
+        self.eyes_closed_start = None
+        self.eyes_open_start = None
+        self.drowsy_state = False
+        self.drowsiness_score = 0
+        self.high_stress_start = None
+        self.current_stress = 0
+        self.perclos.reset_gap()
+
+    def resume(self, timestamp):
+        """Start tracking again after ``pause``; reminders don't count the time away"""
+        if self.paused_at is None:
+            return
+        if self.last_reminder_time is not None:
+            self.last_reminder_time += max(0.0, timestamp - self.paused_at)
+        self.paused_at = None
+
+        # The rPPG signal can't bridge the gap: measure heart rate from scratch
+        self.hr_monitor.reset()
+        self.current_hr = 0
+        self.last_hr_update = None
+
+    def process(self, frame, face_landmarks, timestamp):
+        """Analyze one frame; returns {"avg_ear", "blinks_last_min", "perclos", "events"}"""
+        if face_landmarks is None:
+            return self._analyze(None, timestamp)
+
+        h, w = frame.shape[:2]
+        # Convert landmarks to a pixel-space array once; everything below indexes into it
+        self._landmark_points = landmarks_to_array(face_landmarks, w, h,
+                                                   out=self._landmark_points)
+        return self._analyze(self._landmark_points, timestamp, frame=frame,
+                             face_landmarks=face_landmarks)
+
+    def process_points(self, points, timestamp, roi_mean=None):
+        """Analyze one frame given as pixel-space landmarks (no image)
+
+        For remote clients that run inference themselves: ``roi_mean`` is the
+        (B, G, R) mean of the heart rate ROI, or None if it wasn't measured.
+        ``points`` is None when no face was found.
+        """
+        return self._analyze(points, timestamp, roi_mean=roi_mean)
+
+    def _analyze(self, points, timestamp, frame=None, face_landmarks=None, roi_mean=None):
+        events = []
+        avg_ear = None
+        metrics = self.metrics
+
+        if points is None:
+            metrics.count("frames_no_face")
+            self.perclos.reset_gap()
+        else:
+            # 1. EYE TRACKING & BLINK DETECTION
+            left_ear, right_ear = calculate_EAR_array(points)
+            avg_ear = (left_ear + right_ear) / 2.0
+
+            # Blink detection
+            if avg_ear < self.ear_threshold:
+                self.frame_counter += 1
+            else:
+                if self.frame_counter >= self.consec_frames:
+                    self.blink_count += 1
+                    self.blink_stats.add(timestamp)
+                    events.append(("blink", self.blink_count))
+                self.frame_counter = 0
+
+            # 2. DROWSINESS DETECTION
+            self._detect_drowsiness(avg_ear, timestamp, events)
+
+            # 3. STRESS DETECTION
+            stress_features = extract_stress_features_array(points)
+            with metrics.timer("stress_detector"):
+                self.current_stress = self.stress_detector.calculate_stress(stress_features)
+
+            # Track sustained high stress
+            self._track_sustained_stress(timestamp)
+
+            # 4. HEART RATE MONITORING
+            with metrics.timer("hr_add_frame"):
+                if frame is not None:
+                    h, w = frame.shape[:2]
+                    self.hr_monitor.add_frame(frame, face_landmarks, w, h, points=points,
+                                              timestamp=timestamp)
+                elif roi_mean is not None:
+                    self.hr_monitor.add_sample(roi_mean, timestamp)
+
+            # Update heart rate (every second when streaming, 5 s in batch mode)
+            if self.last_hr_update is None:
+                self.last_hr_update = timestamp
+            if timestamp - self.last_hr_update > self.hr_monitor.update_interval:
+                with metrics.timer("hr_estimate"):
+                    self.current_hr = self.hr_monitor.calculate_heart_rate()
+                self.last_hr_update = timestamp
+
+        # Expire old blinks/closure samples (amortized O(1), no list rebuilding)
+        self.blink_stats.advance(timestamp)
+        self.perclos.advance(timestamp)
+
+        return {
+            "avg_ear": avg_ear,
+            "blinks_last_min": self.blink_stats.count(60.0),
+            "perclos": self.perclos.perclos(60.0),
+            "events": events,
+        }
+
+    def rolling_summary(self):
+        """Blink counts/rates and PERCLOS for every rolling window (10 s, 1 min, 5 min)"""
+        return {w: {"blinks": self.blink_stats.count(w),
+                    "blinks_per_min": self.blink_stats.count(w) * 60.0 / w,
+                    "perclos": self.perclos.perclos(w)}
+                for w in self.blink_stats.windows}
+
+    def _track_sustained_stress(self, timestamp):
+        """Track sustained high stress levels"""
+        if self.current_stress >= 70:
+            if self.high_stress_start is None:
+                self.high_stress_start = timestamp
+        else:
+            self.high_stress_start = None
+
+    def stress_duration(self, timestamp):
+        """Seconds stress has been continuously high, or None"""
+        if self.high_stress_start is None:
+            return None
+        return timestamp - self.high_stress_start
+
+    def closure_duration(self, timestamp):
+        """Seconds the eyes have been continuously closed (0 when open)"""
+        if self.eyes_closed_start is None:
+            return 0.0
+        return timestamp - self.eyes_closed_start
+
+    def _detect_drowsiness(self, avg_ear, timestamp, events):
+        """Detect drowsiness based on eye closure duration"""
+        if avg_ear is None:
+            return
+
+        eyes_closed = avg_ear < self.ear_threshold
+        self.perclos.update(timestamp, eyes_closed)
+        self.perclos.advance(timestamp)
+        # Sustained partial closure over the last minute raises the score floor
+        perclos_score = min(100, int(self.perclos.perclos(60.0) / PERCLOS_DROWSY * 100))
+
+        # Eyes closed
+        if eyes_closed:
+            if self.eyes_closed_start is None:
+                self.eyes_closed_start = timestamp
+
+            self.eyes_open_start = None  # Reset open timer
+
+            closed_duration = timestamp - self.eyes_closed_start
+
+            # Calculate drowsiness score (0-100)
+            self.drowsiness_score = max(perclos_score,
+                                        min(100, int((closed_duration / 4.0) * 100)))
+
+            # Alert when eyes closed for configured time
+            if closed_duration >= self.eye_closure_alert_time:
+                if timestamp - self.last_drowsy_beep >= 3.0:
+                    self.last_drowsy_beep = timestamp
+                    events.append(("beep", "eyes_closed"))
+
+                    if not self.drowsy_state:
+                        self.drowsy_state = True
+                        events.append(("reminder", "Drowsiness Detected"))
+
+        else:
+            # Eyes open
+            if self.eyes_open_start is None:
+                self.eyes_open_start = timestamp
+
+            self.eyes_closed_start = None  # Reset closed timer
+            self.drowsy_state = False
+            self.drowsiness_score = max(perclos_score, self.drowsiness_score - 5)  # Decay score
+
+            # Alert if eyes open for too long (staring)
+            open_duration = timestamp - self.eyes_open_start
+            if open_duration >= self.eye_closure_alert_time:
+                if timestamp - self.last_drowsy_beep >= 10.0:
+                    self.last_drowsy_beep = timestamp
+                    events.append(("beep", "staring"))
+
+    def check_alerts(self, timestamp, blinks_last_min):
+        """Return the reminder triggers due at ``timestamp`` (snooze is up to the caller)"""
+        triggers = []
+        if self.last_reminder_time is None:
+            self.last_reminder_time = timestamp
+
+        # 1. Low blink rate alert
+        if blinks_last_min < self.blink_threshold:
+            if timestamp - self.last_reminder_time > 30:
+                self.last_reminder_time = timestamp
+                triggers.append("Low Blink Rate")
+
+        # 2. High stress alert (only after sustained time)
+        stress_duration = self.stress_duration(timestamp)
+        if stress_duration is not None and stress_duration >= self.stress_sustained_time:
+            if timestamp - self.last_reminder_time > 60:
+                self.last_reminder_time = timestamp
+                triggers.append("High Stress Level")
+
+        # 3. Regular interval reminder
+        interval_seconds = self.interval_minutes * 60.0
+        if timestamp - self.last_reminder_time >= interval_seconds:
+            self.last_reminder_time = timestamp
+            triggers.append("Scheduled Reminder")
+
+        return triggers